@@ -3,7 +3,7 @@
     'name': 'Decidely',
 
     # Version of the module
-    'version': '1.0.0',
+    'version': '1.0.1',
 
     # Category under which the module will be listed in Odoo apps
     'category': 'Tools',
@@ -0,0 +1,21 @@
+# Link existing polls to the Discuss channels that were previously looked up by name.
+# When several channels share a name, the oldest one is kept.
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE poll_poll poll
+           SET channel_id = channel.id
+          FROM (
+                SELECT DISTINCT ON (substring(name FROM '^Poll №(\\d+) \\(')::int)
+                       substring(name FROM '^Poll №(\\d+) \\(')::int AS poll_id, id
+                  FROM discuss_channel
+                 WHERE name ~ '^Poll №\\d+ \\('
+                 ORDER BY substring(name FROM '^Poll №(\\d+) \\(')::int, id
+               ) channel
+         WHERE channel.poll_id = poll.id
+           AND poll.channel_id IS NULL
+    """)
@@ -1,6 +1,10 @@
+import logging
+
 from markupsafe import Markup
 from odoo import models, fields, api
 
+_logger = logging.getLogger(__name__)
+
 # Main model representing a poll
 class Poll(models.Model):
     _name = 'poll.poll'
@@ -20,6 +24,8 @@ class Poll(models.Model):
     vote_ids = fields.One2many('poll.vote', 'poll_id', string='Votes')
     # Flag to prevent duplicate notification after poll creation
     create_notification_sent = fields.Boolean(default=False, required=True)
+    # Discuss channel used for the notifications of the poll
+    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', readonly=True, copy=False, ondelete='set null')
 
     # Check if all votes are submitted and notify the poll creator
     def _check_poll_votes_complete(self):
@@ -50,27 +56,47 @@ class Poll(models.Model):
                 (str(self.id), str(self.name))
             )
 
-    # Override write method to control permissions and regenerate votes
+    # Bring the vote entries in line with the invited users and options.
+    # Only the entries of removed users or options are deleted and only missing (user, option) pairs are created,
+    # so votes already cast are kept. Returns the number of created and deleted entries.
+    def _reconcile_votes(self):
+        created = deleted = 0
+        for poll in self:
+            user_ids = set(poll.user_ids.ids)
+            option_ids = set(poll.option_ids.ids)
+
+            obsolete = poll.vote_ids.filtered(lambda v: v.user_id.id not in user_ids or v.option_id.id not in option_ids)
+            existing = {(vote.user_id.id, vote.option_id.id) for vote in poll.vote_ids - obsolete}
+            new_votes = [{
+                'poll_id': poll.id,
+                'user_id': user_id,
+                'option_id': option_id,
+            } for user_id in poll.user_ids.ids for option_id in poll.option_ids.ids
+                if (user_id, option_id) not in existing]
+
+            if obsolete:
+                obsolete.unlink()
+                deleted += len(obsolete)
+            if new_votes:
+                self.env['poll.vote'].create(new_votes)
+                created += len(new_votes)
+
+        _logger.info("Poll votes reconciled for %s: %s created, %s deleted", self.ids, created, deleted)
+        return {'created': created, 'deleted': deleted}
+
+    # Override write method to control permissions and reconcile votes
     def write(self, vals):
         # Restrict updates to poll creator
         if self.env.user != self.created_by:
-            restricted_fields = set(vals.keys()) - {'vote_ids', 'visible_vote_ids'}
+            restricted_fields = set(vals.keys()) - {'vote_ids', 'visible_vote_ids', 'channel_id'}
             if restricted_fields:
                 raise models.ValidationError("Only the creator can modify these fields.")
 
         result = super().write(vals)
 
-        # If users or options changed, regenerate vote entries
+        # If users or options changed, add and remove the affected vote entries
         if 'user_ids' in vals or 'option_ids' in vals:
-            self.vote_ids.unlink()
-            new_votes = []
-            for user in self.user_ids:
-                for option in self.option_ids:
-                    new_votes.append((0, 0, {
-                        'user_id': user.id,
-                        'option_id': option.id,
-                    }))
-            self.vote_ids = new_votes
+            self._reconcile_votes()
 
             # Send appropriate notification
             if not self.create_notification_sent:
@@ -113,15 +139,14 @@ class PollVote(models.Model):
     vote = fields.Selection([('yes', 'Yes'), ('maybe', 'Maybe'), ('no', 'No')])
 
     # Restrict vote creation to poll creator
-    @api.model
-    def create(self, vals):
-        poll = self.env['poll.poll'].browse(vals.get('poll_id'))
-        if self.env.user != poll.created_by:
+    @api.model_create_multi
+    def create(self, vals_list):
+        polls = self.env['poll.poll'].browse({vals['poll_id'] for vals in vals_list if vals.get('poll_id')})
+        if any(self.env.user != poll.created_by for poll in polls):
             raise models.ValidationError("Only the poll creator can add new vote entries.")
-        vote = super().create(vals)
-        if vote.poll_id:
-            vote.poll_id._check_poll_votes_complete()
-        return vote
+        votes = super().create(vals_list)
+        votes.poll_id._check_poll_votes_complete()
+        return votes
 
     # Restrict editing votes to vote owner or poll creator
     def write(self, vals):
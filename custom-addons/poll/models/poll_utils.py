@@ -19,8 +19,9 @@ class PollUtils(models.AbstractModel):
         else:
             raise ValueError(f"Unknown source type: {source}")
 
-        # Look for an existing Discuss channel with this name
-        channel = context.env['discuss.channel'].sudo().search([('name', '=', channel_name)], limit=1)
+        # Use the channel linked to the poll instead of searching it by name
+        poll = context.env['poll.poll'].sudo().browse(int(tuple_id)).exists()
+        channel = poll.channel_id
 
         # If no such channel exists, create a new one
         if not channel:
@@ -36,6 +37,9 @@ class PollUtils(models.AbstractModel):
                 'channel_partner_ids': [(4, recipient.partner_id.id) for recipient in recipients]
             })
 
+            # Link the channel to the poll for the next notifications
+            poll.channel_id = channel
+
         # Post the message in the channel
         channel.sudo().message_post(
             body=Markup(message_text),  # Use Markup to safely render HTML
@@ -1,3 +1,6 @@
 # This file marks the directory as a Python package and ensures that the models are properly registered in Odoo.
-# It imports all model definitions from the `models` submodule.
+# It imports all model definitions from the `models` submodule, the HTTP routes from the `controllers` submodule
+# and the odoo-bin commands from the `cli` submodule.
 from . import models
+from . import controllers
+from . import cli
@@ -5,7 +5,7 @@
 
 {
     'name': 'PaLMS 2',
-    'version': '2.0.0',
+    'version': '2.0.4',
     'category': 'Academic',
     'sequence': 15,
     'summary': 'A prototype ERP solution for handling Course works and Final qualification works submissions',
@@ -33,6 +33,7 @@
         'views/student_student_views.xml',
         'views/student_supervisor_views.xml',
         'views/student_manager_views.xml',
+        'views/student_roster_import_views.xml',
         'views/student_util_views.xml',
         'views/student_commission_views.xml',
         'views/student_announcement_views.xml',
@@ -42,7 +43,11 @@
         'views/student_milestone_result_views.xml',
         'views/student_projects_group_views.xml',
         'views/student_review_views.xml',
+        'views/student_kpi_views.xml',
         'views/student_dashboard_views.xml',
+        'views/student_notification_outbox_views.xml',
+        'views/student_notification_digest_views.xml',
+        'views/student_instrumentation_views.xml',
         'views/student_menus.xml',
         'views/custom_project_views.xml',
         'views/custom_poll_views.xml',
@@ -0,0 +1,4 @@
+# This package contains the synthetic university generator and the workflow benchmark suite of PaLMS.
+# They are run from the command line (see the cli package): `odoo-bin palms_generate` and `odoo-bin palms_bench`.
+from .generator import GENERATOR_SIZES, UniversityGenerator
+from .flows import FLOWS, BenchmarkRunner, compare_results
@@ -0,0 +1,373 @@
+# This module defines the workflow benchmark suite of PaLMS.
+# Every flow prepares its records, then the measured part runs as a representative user of a role in a generated
+# university (see generator.py). Each run is timed, its SQL queries are counted (including the final flush) and
+# it is rolled back, so the flows can be repeated and the results compared between releases.
+
+import statistics
+import time
+from datetime import timedelta
+
+from odoo import Command, fields
+
+from .generator import bench_login
+
+# Registered flows: {name: (function preparing the measured callable, roles the flow is measured for)}
+FLOWS = {}
+
+# Fields read by the kanban cards of the project boards
+BOARD_SPECIFICATION = {
+    'name': {},
+    'project_state': {},
+    'state_publication': {},
+    'type': {},
+    'professor_id': {'fields': {'display_name': {}}},
+    'program_ids': {'fields': {'display_name': {}}},
+    'tag_ids': {'fields': {'display_name': {}}},
+}
+# Fields read by the kanban cards of the supervision board
+SUPERVISION_SPECIFICATION = {
+    'state': {},
+    'name': {},
+    'name_ru': {},
+    'type': {},
+    'format': {},
+    'language': {},
+    'professor_id': {'fields': {'display_name': {}}},
+    'degree_ids': {'fields': {'display_name': {}}},
+    'color_supervision': {},
+    'create_date': {},
+}
+# Number of records of a board page
+BOARD_LIMIT = 80
+# Number of competing applications rejected when an application is accepted
+COMPETING_APPLICATIONS = 5
+# Number of announcements edited at once
+BULK_EDIT_SIZE = 1000
+
+
+# Register a benchmark flow; the function receives the runner and the role and returns the callable to measure
+def flow(name, roles=('admin',)):
+    def decorator(function):
+        FLOWS[name] = (function, roles)
+        return function
+    return decorator
+
+
+class BenchmarkRunner:
+
+    def __init__(self, env, repeat=3):
+        self.env = env
+        self.repeat = repeat
+
+    # Representative user of a role in the generated university: users with projects where it matters
+    def user(self, role):
+        Users = self.env['res.users'].with_context(active_test=False)
+        if role == 'student':
+            student = self.env['student.student'].search([('current_project', '!=', False)], limit=1)
+            return student.student_account
+        if role == 'professor':
+            project = self.env['student.project'].search([('student_account', '!=', False)], limit=1)
+            return project.professor_account
+        return Users.search([('login', '=', bench_login(role, 1))], limit=1)
+
+    # Environment of a user, without superuser rights
+    def as_user(self, user, records=None):
+        env = self.env(user=user.id, su=False, context={'lang': self.env.context.get('lang')})
+        return records.with_env(env) if records is not None else env
+
+    # Measure the flows and return their results, in the order of FLOWS
+    def run(self, names=None):
+        results = []
+        for name, (function, roles) in FLOWS.items():
+            if names and name not in names:
+                continue
+            for role in roles:
+                results.append(self.measure(name, role, function))
+        return results
+
+    # Run a flow several times; every run starts from empty caches and is rolled back
+    def measure(self, name, role, function):
+        cr = self.env.cr
+        durations = []
+        queries = 0
+        for _run in range(self.repeat):
+            call = function(self, role)
+            self.env.flush_all()
+            self.env.invalidate_all()
+
+            count = cr.sql_log_count
+            started = time.perf_counter()
+            call()
+            self.env.flush_all()
+            durations.append((time.perf_counter() - started) * 1000.0)
+            queries = max(queries, cr.sql_log_count - count)
+            cr.rollback()
+
+        return {
+            'flow': name,
+            'role': role,
+            'runs': self.repeat,
+            'queries': queries,
+            'min_ms': round(min(durations), 2),
+            'median_ms': round(statistics.median(durations), 2),
+        }
+
+    # Number of records of the main models, stored with the results to tell the datasets apart
+    def data_size(self):
+        models = ['student.faculty', 'student.program', 'student.professor', 'student.student', 'student.project',
+                  'student.availability', 'student.application', 'student.milestone', 'student.milestone.result',
+                  'student.commission', 'student.defense', 'student.announcement', 'poll.poll']
+        return {model: self.env[model].with_context(active_test=False).search_count([]) for model in models}
+
+
+# Compare benchmark results with a previous report; returns the lines to print and whether query counts grew
+def compare_results(previous, current):
+    previous_results = {(result['flow'], result['role']): result for result in previous.get('results', [])}
+    lines = []
+    regression = False
+    for result in current['results']:
+        before = previous_results.get((result['flow'], result['role']))
+        if not before:
+            lines.append(f"{result['flow']:<28} {result['role']:<11} {result['queries']:>6} queries  (new)")
+            continue
+        query_delta = result['queries'] - before['queries']
+        time_delta = result['median_ms'] - before['median_ms']
+        regression = regression or query_delta > 0
+        lines.append(f"{result['flow']:<28} {result['role']:<11} {result['queries']:>6} queries ({query_delta:+d})"
+                     f"  {result['median_ms']:>10.1f} ms ({time_delta:+.1f})")
+    return lines, regression
+
+
+# === BOARDS ===
+
+@flow('project_board', roles=('student', 'professor', 'manager', 'supervisor'))
+def project_board(bench, role):
+    Project = bench.as_user(bench.user(role))['student.project'].with_context(view_type='project_board')
+    return lambda: (Project.web_search_read([], BOARD_SPECIFICATION, limit=BOARD_LIMIT), Project.search_count([]))
+
+
+@flow('available_projects', roles=('student',))
+def available_projects(bench, role):
+    Project = bench.as_user(bench.user(role))['student.project'].with_context(view_type='available_projects')
+    return lambda: (Project.web_search_read([], BOARD_SPECIFICATION, limit=BOARD_LIMIT), Project.search_count([]))
+
+
+@flow('pending_submissions', roles=('supervisor',))
+def pending_submissions(bench, role):
+    Project = bench.as_user(bench.user(role))['student.project'].with_context(view_type='pending_submissions')
+    return lambda: (Project.web_search_read([], BOARD_SPECIFICATION, limit=BOARD_LIMIT), Project.search_count([]))
+
+
+# Submissions sent to the programs of a supervisor, as shown on the supervision board
+@flow('supervision_board', roles=('supervisor',))
+def supervision_board(bench, role):
+    user = bench.user(role)
+    Availability = bench.as_user(user)['student.availability'].with_context(view_type='project_board')
+    domain = [('state', '!=', 'waiting'), ('program_supervisor_account', '=', user.id)]
+    return lambda: (Availability.web_search_read(domain, SUPERVISION_SPECIFICATION, limit=BOARD_LIMIT, order='write_date desc'),
+                    Availability.search_count(domain))
+
+
+# Visibility of milestone results, evaluated for every list, count and pager
+@flow('milestone_result_search', roles=('student', 'professor', 'manager'))
+def milestone_result_search(bench, role):
+    Result = bench.as_user(bench.user(role))['student.milestone.result']
+    return lambda: (Result.search_fetch([], ['milestone_id', 'user_id', 'submit_date'], limit=BOARD_LIMIT),
+                    Result.search_count([]))
+
+
+# === WORKFLOWS ===
+
+# A manager creates a milestone for the programs of their faculty (tasks are created for the targeted projects)
+@flow('milestone_create', roles=('manager',))
+def milestone_create(bench, role):
+    user = bench.user(role)
+    programs = bench.env['student.program'].search([('manager.manager_account', '=', user.id)], limit=3)
+    Milestone = bench.as_user(user)['student.milestone']
+    return lambda: Milestone.create({
+        'name': 'Benchmark Milestone',
+        'deadline_date': fields.Datetime.now() + timedelta(days=30),
+        'program_ids': [Command.set(programs.ids)],
+    })
+
+
+# The manager postpones a milestone of their faculty (its tasks and calendar events follow)
+@flow('milestone_update', roles=('manager',))
+def milestone_update(bench, role):
+    user = bench.user(role)
+    milestone = bench.env['student.milestone'].search([('program_ids.manager.manager_account', '=', user.id)], limit=1)
+    deadline = milestone.deadline_date + timedelta(days=7)
+    milestone = bench.as_user(user, milestone)
+    return lambda: milestone.write({'deadline_date': deadline})
+
+
+@flow('announcement_create', roles=('manager',))
+def announcement_create(bench, role):
+    user = bench.user(role)
+    programs = bench.env['student.program'].search([('manager.manager_account', '=', user.id)])
+    groups = bench.env.ref('student.group_student') | bench.env.ref('student.group_professor')
+    Announcement = bench.as_user(user)['student.announcement']
+    return lambda: Announcement.create({
+        'name': 'Benchmark Announcement',
+        'content': '<p>Benchmark</p>',
+        'deadline_date': fields.Datetime.now() + timedelta(days=30),
+        'target_group_ids': [Command.set(groups.ids)],
+        'target_program_ids': [Command.set(programs.ids)],
+    })
+
+
+# Attach a file to many announcements at once, then rename them (which must not touch the attachments)
+@flow('announcement_bulk_edit')
+def announcement_bulk_edit(bench, role):
+    env = bench.as_user(bench.user(role))
+    announcements = env['student.announcement'].search([], limit=BULK_EDIT_SIZE)
+    attachment = env['ir.attachment'].create({'name': 'benchmark.txt', 'raw': b'benchmark'})
+
+    def call():
+        announcements.write({'attachment_ids': [Command.link(attachment.id)]})
+        announcements.write({'name': 'Benchmark Announcement'})
+    return call
+
+
+@flow('commission_lock', roles=('manager',))
+def commission_lock(bench, role):
+    user = bench.user(role)
+    commission = bench.env['student.commission'].search(
+        [('lock', '=', False), ('commission_faculty.manager_ids.manager_account', '=', user.id)], limit=1)
+    commission = bench.as_user(user, commission)
+    return lambda: commission.action_view_commission_lock()
+
+
+# Lock all commissions of a faculty from the list view
+@flow('commission_lock_bulk', roles=('manager',))
+def commission_lock_bulk(bench, role):
+    user = bench.user(role)
+    commissions = bench.env['student.commission'].search(
+        [('lock', '=', False), ('commission_faculty.manager_ids.manager_account', '=', user.id)])
+    commissions = bench.as_user(user, commissions)
+    return lambda: commissions.action_lock_commissions()
+
+
+@flow('review_table_generation', roles=('supervisor',))
+def review_table_generation(bench, role):
+    user = bench.user(role)
+    programs = bench.env['student.program'].search([('supervisor.supervisor_account', '=', user.id)])
+    ReviewTable = bench.as_user(user)['student.review.table']
+
+    def call():
+        table = ReviewTable.create({'name': 'Benchmark Review Table', 'type': 'fqw',
+                                    'program_ids': [Command.set(programs.ids)]})
+        table.action_generate_review_lines()
+    return call
+
+
+# Sent application of a project (by default the one with the most applicants), completed with applications of
+# students without a project or sent application so that it has the given number of competitors
+def application_with_competitors(env, competitors, project=None):
+    Application = env['student.application']
+    if not project:
+        groups = Application._read_group([('state', '=', 'sent')], ['project_id'], ['__count'], order='__count desc', limit=1)
+        project = groups[0][0]
+    sent = Application.search([('project_id', '=', project.id), ('state', '=', 'sent')])
+
+    missing = competitors + 1 - len(sent)
+    if missing > 0:
+        applicants = Application.search([('state', '=', 'sent')]).applicant
+        students = env['student.student'].search(
+            [('current_project', '=', False), ('id', 'not in', applicants.ids)], limit=missing)
+        sent |= Application.create([{
+            'applicant': student.id,
+            'project_id': project.id,
+            'message': 'Benchmark application',
+            'state': 'sent',
+            'sent_date': fields.Date.today(),
+            'application_professor': project.professor_account.id,
+        } for student in students])
+    return sent[0]
+
+
+# The professor accepts one of the applications received for a project; the others are rejected automatically
+@flow('application_accept', roles=('professor',))
+def application_accept(bench, role):
+    application = application_with_competitors(bench.env, COMPETING_APPLICATIONS)
+    application = bench.as_user(application.application_professor, application)
+    return lambda: application.action_view_application_accept()
+
+
+# Another application of the project is accepted, so this one is rejected automatically
+@flow('application_auto_reject', roles=('professor',))
+def application_auto_reject(bench, role):
+    application = bench.env['student.application'].search([('state', '=', 'sent')], limit=1)
+    application = bench.as_user(application.application_professor, application)
+    return lambda: application.action_view_application_auto_reject()
+
+
+# A student without a project or sent application applies for a published project of their program
+@flow('application_send', roles=('student',))
+def application_send(bench, role):
+    env = bench.env
+    applicants = env['student.application'].search([('state', '=', 'sent')]).applicant
+    student = env['student.student'].search([('current_project', '=', False), ('id', 'not in', applicants.ids)], limit=1)
+    Project = env['student.project']
+    project = (Project.search([('state_publication', '=', 'published'), ('program_ids', 'in', student.student_program.ids)], limit=1)
+               or Project.search([('state_publication', '=', 'published')], limit=1))
+    application = env['student.application'].create({
+        'applicant': student.id,
+        'project_id': project.id,
+        'message': 'Benchmark application',
+    })
+    application = bench.as_user(student.student_account, application)
+    return lambda: application.action_view_application_send()
+
+
+# The professor submits a draft project to the supervisors of its programs
+@flow('project_submit', roles=('professor',))
+def project_submit(bench, role):
+    project = bench.env['student.project'].search([('state_evaluation', '=', 'draft'), ('availability_ids', '!=', False)], limit=1)
+    project = bench.as_user(project.professor_account, project)
+    return lambda: project.action_view_project_submit()
+
+
+# The supervisor of a program approves a project submitted to it
+@flow('project_approve', roles=('supervisor',))
+def project_approve(bench, role):
+    availability = bench.env['student.availability'].search([('state', '=', 'pending')], limit=1)
+    availability = bench.as_user(availability.program_supervisor_account, availability)
+    return lambda: availability.action_view_availability_approve()
+
+
+# The supervisor approves all the submissions waiting in their programs at once, from the supervision list
+@flow('supervision_bulk_approve', roles=('supervisor',))
+def supervision_bulk_approve(bench, role):
+    user = bench.user(role)
+    availabilities = bench.env['student.availability'].search(
+        [('state', '=', 'pending'), ('program_supervisor_account', '=', user.id)])
+    availabilities = bench.as_user(user, availabilities)
+    return lambda: availabilities.action_approve_availabilities()
+
+
+# The creator of a poll replaces one participant and invites five more (votes are added and removed)
+@flow('poll_user_change')
+def poll_user_change(bench, role):
+    poll = bench.env['poll.poll'].search([], limit=1)
+    added = bench.env['student.professor'].search([('professor_account', 'not in', poll.user_ids.ids)], limit=5)
+    commands = [Command.unlink(poll.user_ids[0].id)] + [Command.link(user.id) for user in added.professor_account]
+    poll = bench.as_user(poll.created_by, poll)
+    return lambda: poll.write({'user_ids': commands})
+
+
+# === STORED COUNTERS ===
+
+# Recompute the counters of all students and programs, as after a bulk import
+@flow('counter_recompute')
+def counter_recompute(bench, role):
+    env = bench.env
+    students = env['student.student'].with_context(active_test=False).search([])
+    programs = env['student.program'].search([])
+
+    def call():
+        for records, field_names in [(students, ['application_number', 'proposal_number']),
+                                     (programs, ['student_number', 'project_number'])]:
+            for field_name in field_names:
+                env.add_to_compute(records._fields[field_name], records)
+    return call
@@ -0,0 +1,433 @@
+# This module builds a synthetic university in a PaLMS database, used to measure the system at realistic scale.
+# Campuses, faculties, programs, staff and students are created first, then projects in every state with their
+# applications, followed by milestones, commissions, polls and announcements. Records are inserted with batched
+# multi-creates and each stage is committed, so large universities can be generated in a few minutes.
+
+import base64
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from odoo import Command, fields
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Preset sizes of the generated university; every size can also be set on its own
+GENERATOR_SIZES = {
+    'small': {
+        'campuses': 1, 'faculties': 2, 'programs': 10, 'professors': 50, 'students': 500, 'projects': 500,
+        'milestones': 5, 'commissions': 5, 'polls': 5, 'announcements': 100,
+    },
+    'medium': {
+        'campuses': 1, 'faculties': 4, 'programs': 40, 'professors': 200, 'students': 2000, 'projects': 2000,
+        'milestones': 10, 'commissions': 20, 'polls': 10, 'announcements': 500,
+    },
+    'large': {
+        'campuses': 2, 'faculties': 10, 'programs': 500, 'professors': 1000, 'students': 5000, 'projects': 10000,
+        'milestones': 20, 'commissions': 60, 'polls': 20, 'announcements': 1000,
+    },
+}
+# Domain of the logins of the generated accounts, used to find them again
+LOGIN_DOMAIN = 'bench.palms.example'
+# Records created per multi-create call
+BATCH_SIZE = 1000
+# Share of the generated projects in each state
+PROJECT_STATES = [('draft', 15), ('pending', 15), ('published', 25), ('applied', 15), ('assigned', 20), ('completed', 10)]
+# Degree levels of the generated programs, with their length in years
+PROGRAM_DEGREES = [('ba', '4'), ('ba', '4'), ('ms', '2'), ('phd', '4')]
+# Text of the generated projects, long enough to be representative of real descriptions
+LOREM = ("Students will design, implement and evaluate a prototype, compare it with existing approaches and "
+         "document the results in a written report defended in front of the commission. ") * 8
+
+# Context of the generated records: no tracking, creation logs or invitations
+GENERATOR_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+    'no_reset_password': True,
+}
+
+
+# Login of a generated account
+def bench_login(role, number):
+    return f'{role}.{number}@{LOGIN_DOMAIN}'
+
+
+class UniversityGenerator:
+
+    def __init__(self, env, sizes, seed=0):
+        self.sizes = sizes
+        self.random = random.Random(seed)
+        self.base_env = env
+        self.env = None
+        # Time and number of created records per stage
+        self.stats = {}
+
+    # Generate the whole university and return the statistics of each stage
+    def generate(self):
+        self._stage('administrator', self._create_administrator)
+        self._stage('campuses', self._create_campuses)
+        self._stage('faculties', self._create_faculties)
+        self._stage('programs', self._create_programs)
+        self._stage('professors', self._create_professors)
+        self._stage('students', self._create_students)
+        self._stage('projects', self._create_projects)
+        self._stage('applications', self._create_applications)
+        self._stage('milestones', self._create_milestones)
+        self._stage('commissions', self._create_commissions)
+        self._stage('polls', self._create_polls)
+        self._stage('announcements', self._create_announcements)
+        return self.stats
+
+    # Run a stage, commit it and record its duration and number of created records.
+    # Stages are not committed when the university is generated as a test fixture.
+    def _stage(self, name, method):
+        started = time.perf_counter()
+        count = method()
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+        self.stats[name] = {'records': count, 'seconds': round(time.perf_counter() - started, 2)}
+        _logger.info("PaLMS generator: %s records created for %s in %.1fs", count, name, self.stats[name]['seconds'])
+
+    # Multi-create records in batches
+    def _create(self, model, vals_list):
+        records = self.env[model].browse()
+        for start in range(0, len(vals_list), BATCH_SIZE):
+            records |= self.env[model].create(vals_list[start:start + BATCH_SIZE])
+        return records
+
+    # Create the accounts of a role, with their partners and group membership
+    def _create_users(self, role, count, group_xmlid):
+        group = self.env.ref(group_xmlid)
+        return self._create('res.users', [{
+            'name': f'{role.capitalize()} {number}',
+            'login': bench_login(role, number),
+            'email': bench_login(role, number),
+            'groups_id': [Command.set(group.ids)],
+        } for number in range(1, count + 1)])
+
+    # === ACADEMIC STRUCTURE ===
+
+    # The records are generated by an administrator of PaLMS, so the role checks of the models pass
+    def _create_administrator(self):
+        Users = self.base_env['res.users'].sudo().with_context(active_test=False)
+        if Users.search_count([('login', '=like', f'%@{LOGIN_DOMAIN}')]):
+            raise UserError("This database already contains a generated university; generate it in a new database.")
+        admin = Users.with_context(**GENERATOR_CONTEXT).create({
+            'name': 'Benchmark Administrator',
+            'login': bench_login('admin', 1),
+            'email': bench_login('admin', 1),
+            'groups_id': [Command.set([self.base_env.ref('student.group_administrator').id,
+                                       self.base_env.ref('base.group_system').id])],
+        })
+        self.env = self.base_env(user=admin, su=True, context=dict(self.base_env.context, **GENERATOR_CONTEXT))
+        return 1
+
+    def _create_campuses(self):
+        self.campuses = self._create('student.campus', [{
+            'name': f'City {number}',
+            'university_name': 'PaLMS Benchmark University',
+            'legal_address': f'{number} University Street',
+        } for number in range(1, self.sizes['campuses'] + 1)])
+        return len(self.campuses)
+
+    # Each faculty has a supervisor (also its dean) and a manager
+    def _create_faculties(self):
+        count = self.sizes['faculties']
+        supervisor_users = self._create_users('supervisor', count, 'student.group_supervisor')
+        manager_users = self._create_users('manager', count, 'student.group_manager')
+
+        self.faculties = self._create('student.faculty', [{
+            'name': f'Faculty {number + 1}',
+            'dean': supervisor_users[number].id,
+            'address': f'{number + 1} Faculty Street',
+            'campus': self.campuses[number % len(self.campuses)].id,
+        } for number in range(count)])
+        self.supervisors = self._create('student.supervisor', [{
+            'supervisor_account': user.id,
+            'supervisor_faculty': faculty.id,
+        } for user, faculty in zip(supervisor_users, self.faculties)])
+        self.managers = self._create('student.manager', [{
+            'manager_account': user.id,
+            'manager_faculty': faculty.id,
+        } for user, faculty in zip(manager_users, self.faculties)])
+        return 3 * count
+
+    def _create_programs(self):
+        vals_list = []
+        for number in range(self.sizes['programs']):
+            index = number % len(self.faculties)
+            degree, length = PROGRAM_DEGREES[number % len(PROGRAM_DEGREES)]
+            vals_list.append({
+                'name': f'Program {number + 1}',
+                'degree': degree,
+                'length': length,
+                'language': self.random.choice(['en', 'ru']),
+                'program_faculty_id': self.faculties[index].id,
+                'supervisor': self.supervisors[index].id,
+                'manager': self.managers[index].id,
+            })
+        self.programs = self._create('student.program', vals_list)
+        self.programs_by_faculty = {faculty: self.programs.filtered(lambda p, f=faculty: p.program_faculty_id == f)
+                                    for faculty in self.faculties}
+        self.degrees = {level: self.env['student.degree'].search([('level', '=', level)])
+                        for level in ('ba', 'ms', 'phd')}
+        return len(self.programs)
+
+    # === PEOPLE ===
+
+    def _create_professors(self):
+        users = self._create_users('professor', self.sizes['professors'], 'student.group_professor')
+        self.professors = self._create('student.professor', [{
+            'professor_account': user.id,
+            'professor_faculty': self.faculties[number % len(self.faculties)].id,
+        } for number, user in enumerate(users)])
+        return 2 * len(users)
+
+    def _create_students(self):
+        users = self._create_users('student', self.sizes['students'], 'student.group_student')
+        vals_list = []
+        for number, user in enumerate(users):
+            program = self.programs[number % len(self.programs)]
+            vals_list.append({
+                'student_account': user.id,
+                'student_program': program.id,
+                'progress': str(self.random.randint(1, int(program.length))),
+                'enrolled': str(fields.Date.today().year - self.random.randint(0, int(program.length) - 1)),
+            })
+        self.students = self._create('student.student', vals_list)
+        self.students_by_program = {}
+        for student in self.students:
+            self.students_by_program.setdefault(student.student_program, []).append(student)
+        return 2 * len(users)
+
+    # === PROJECTS ===
+
+    # Projects are created directly in their final state, with their target programs and availabilities
+    def _create_projects(self):
+        states = [state for state, weight in PROJECT_STATES for _i in range(weight)]
+        # Students without a project, per program, to elect on assigned projects
+        free_students = {program: list(students) for program, students in self.students_by_program.items()}
+
+        plans = []
+        for number in range(self.sizes['projects']):
+            professor = self.professors[number % len(self.professors)]
+            faculty = professor.professor_faculty
+            faculty_programs = self.programs_by_faculty[faculty] or self.programs
+            targets = self.random.sample(list(faculty_programs), min(len(faculty_programs), self.random.randint(1, 3)))
+            state = self.random.choice(states)
+
+            student = None
+            if state in ('assigned', 'completed'):
+                candidates = [program for program in targets if free_students.get(program)]
+                if candidates:
+                    student = free_students[self.random.choice(candidates)].pop()
+                else:
+                    state = 'published'
+            plans.append({'number': number + 1, 'professor': professor, 'faculty': faculty,
+                          'targets': targets, 'state': state, 'student': student})
+
+        # Task management projects of the assigned projects
+        elected = [plan for plan in plans if plan['student']]
+        management_projects = self._create('project.project', [{
+            'name': f'Project {plan["number"]}',
+            'privacy_visibility': 'followers',
+        } for plan in elected])
+        for plan, management_project in zip(elected, management_projects):
+            plan['management_project'] = management_project
+
+        self.projects = self._create('student.project', [self._project_values(plan) for plan in plans])
+        self.project_plans = list(zip(self.projects, plans))
+
+        # Elected students work on their project; completed projects have their report files
+        for project, plan in self.project_plans:
+            if plan['student']:
+                plan['student'].current_project = project
+        completed = self.projects.filtered(lambda p: p.state_publication == 'completed')
+        report = base64.b64encode(LOREM.encode())
+        for start in range(0, len(completed), BATCH_SIZE):
+            completed[start:start + BATCH_SIZE].write({
+                'project_report_file': report,
+                'project_report_filename': 'report.txt',
+                'plagiarism_check_file': report,
+                'plagiarism_check_filename': 'plagiarism_check.txt',
+            })
+        return len(self.projects) + len(self.projects.availability_ids) + len(management_projects)
+
+    def _project_values(self, plan):
+        state = plan['state']
+        project_type = self.random.choice(['cw', 'fqw'])
+        targets = plan['targets']
+        availability_state = {'draft': 'waiting', 'pending': 'pending'}.get(state, 'approved')
+        vals = {
+            'name': f'Project {plan["number"]}',
+            'name_ru': f'Проект {plan["number"]}',
+            'type': project_type,
+            'format': self.random.choice(['research', 'project', 'startup']),
+            'language': self.random.choice(['en', 'ru']),
+            'description': LOREM,
+            'requirements': LOREM[:400],
+            'results': LOREM[:400],
+            'professor_id': plan['professor'].id,
+            'faculty_id': [Command.set(plan['faculty'].ids)],
+            'campus_id': [Command.set(plan['faculty'].campus.ids)],
+            'availability_ids': [Command.create({
+                'program_id': program.id,
+                'type': project_type,
+                'degree_ids': [Command.set(self.degrees[program.degree].ids)],
+                'state': availability_state,
+            }) for program in targets],
+        }
+        program_ids = [Command.set([program.id for program in targets])]
+        if state == 'pending':
+            vals.update({
+                'state_evaluation': 'progress',
+                'project_state': 'pending',
+                'program_ids': program_ids,
+                'pending_program_ids': program_ids,
+            })
+        elif state != 'draft':
+            vals.update({
+                'state_evaluation': 'approved',
+                'state_publication': state,
+                'project_state': state,
+                'program_ids': program_ids,
+                'approved_program_ids': program_ids,
+                'listed_program_ids': program_ids,
+            })
+        if plan['student']:
+            vals.update({
+                'assigned': True,
+                'student_elected': [Command.set(plan['student'].ids)],
+                'project_project_id': plan['management_project'].id,
+            })
+        if state == 'completed':
+            vals['student_feedback'] = LOREM[:400]
+        return vals
+
+    # Applied projects have sent applications; assigned and completed ones an accepted and rejected applications.
+    # Students have at most one sent application, as enforced when sending them.
+    def _create_applications(self):
+        today = fields.Date.today()
+        waiting_students = iter([student for student in self.students if not student.current_project])
+        vals_list = []
+        for project, plan in self.project_plans:
+            if plan['state'] == 'applied':
+                for _i in range(self.random.randint(1, 3)):
+                    applicant = next(waiting_students, None)
+                    if applicant:
+                        vals_list.append(self._application_values(
+                            project, applicant, 'sent', today - timedelta(days=self.random.randint(0, 6))))
+            elif plan['student']:
+                sent_date = today - timedelta(days=self.random.randint(10, 60))
+                vals_list.append(self._application_values(
+                    project, plan['student'], 'accepted', sent_date, sent_date + timedelta(days=self.random.randint(0, 5))))
+                applicants = self.students_by_program.get(plan['targets'][0], [])
+                for student in self.random.sample(applicants, min(2, len(applicants))):
+                    if student != plan['student']:
+                        vals_list.append(self._application_values(
+                            project, student, 'rejected', sent_date, sent_date + timedelta(days=self.random.randint(0, 5))))
+
+        applications = self._create('student.application', vals_list)
+        self.env['student.application.urgency']._refresh()
+        return len(applications)
+
+    def _application_values(self, project, student, state, sent_date, response_date=False):
+        return {
+            'applicant': student.id,
+            'project_id': project.id,
+            'message': LOREM[:200],
+            'state': state,
+            'sent_date': sent_date,
+            'response_date': response_date,
+            'application_professor': project.professor_account.id,
+        }
+
+    # === MILESTONES, COMMISSIONS, POLLS AND ANNOUNCEMENTS ===
+
+    # Milestones create the tasks of the targeted projects; half of the assigned projects submitted a result
+    def _create_milestones(self):
+        Milestone = self.env['student.milestone']
+        milestones = Milestone.browse()
+        for number in range(self.sizes['milestones']):
+            programs = self.programs_by_faculty[self.faculties[number % len(self.faculties)]]
+            milestones |= Milestone.create({
+                'name': f'Milestone {number + 1}',
+                'description': LOREM[:200],
+                'deadline_date': fields.Datetime.now() + timedelta(days=30 + number),
+                'program_ids': [Command.set(programs[:3].ids)],
+            })
+        # Large milestones are processed by the background job, run here until all tasks exist
+        while Milestone.search_count([('fanout_state', 'in', ['pending', 'running'])]):
+            Milestone._cron_process_fanout()
+
+        vals_list = []
+        for milestone in milestones:
+            projects = self.env['student.project'].search(
+                milestone._fanout_project_domain() + [('student_account', '!=', False)])
+            vals_list += [{
+                'milestone_id': milestone.id,
+                'user_id': project.student_account.id,
+                'student_project_id': project.id,
+                'comment': LOREM[:200],
+            } for project in projects[:len(projects) // 2]]
+        results = self._create('student.milestone.result', vals_list)
+        return len(milestones) + len(results)
+
+    # Unlocked commissions of five professors defending the completed projects of their faculty
+    def _create_commissions(self):
+        count = self.sizes['commissions']
+        vals_list = []
+        for number in range(count):
+            index = number % len(self.faculties)
+            faculty = self.faculties[index]
+            # Commissions of the same faculty share its completed projects and have different members
+            position = number // len(self.faculties)
+            faculty_commissions = len(range(index, count, len(self.faculties)))
+            members = self.professors.filtered(lambda p: p.professor_faculty == faculty)[position * 5:][:5]
+            if not members:
+                continue
+            projects = [project for project, plan in self.project_plans
+                        if plan['state'] == 'completed' and plan['faculty'] == faculty]
+            defended = projects[position::faculty_commissions]
+            vals_list.append({
+                'commission_faculty': faculty.id,
+                'commission_head': members[0].id,
+                'professor_ids': [Command.set(members.ids)],
+                'meeting_date': fields.Datetime.now() + timedelta(days=14 + number),
+                'defense_ids': [Command.create({'project_id': project.id, 'defense_time': 15.0})
+                                for project in defended],
+            })
+        commissions = self._create('student.commission', vals_list)
+        return len(commissions) + len(commissions.defense_ids)
+
+    def _create_polls(self):
+        professor_users = self.professors.professor_account
+        polls = self._create('poll.poll', [{
+            'name': f'Poll {number + 1}',
+            'description': LOREM[:200],
+            'option_ids': [Command.create({'name': f'Option {option}'}) for option in range(1, 4)],
+            'user_ids': [Command.set(self.random.sample(professor_users.ids, min(10, len(professor_users))))],
+        } for number in range(self.sizes['polls'])])
+        polls._reconcile_votes()
+        return len(polls)
+
+    # Announcements are addressed to the students and professors of the programs of a faculty
+    def _create_announcements(self):
+        Announcement = self.env['student.announcement']
+        groups = self.env.ref('student.group_student') | self.env.ref('student.group_professor')
+        announcements = Announcement.browse()
+        for number in range(self.sizes['announcements']):
+            programs = self.programs_by_faculty[self.faculties[number % len(self.faculties)]]
+            announcements |= Announcement.create({
+                'name': f'Announcement {number + 1}',
+                'content': f'<p>{LOREM[:400]}</p>',
+                'deadline_date': fields.Datetime.now() + timedelta(days=60),
+                'target_group_ids': [Command.set(groups.ids)],
+                'target_program_ids': [Command.set(programs.ids)],
+            })
+        return len(announcements)
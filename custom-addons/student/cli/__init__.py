@@ -0,0 +1,2 @@
+# This package registers the PaLMS command line tools with odoo-bin (see palms.py).
+from . import palms
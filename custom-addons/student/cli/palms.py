@@ -0,0 +1,95 @@
+# This module defines the PaLMS commands of odoo-bin, used to measure the system at realistic scale:
+#   odoo-bin palms_generate -c odoo.conf -d bench --size large --students 8000
+#   odoo-bin palms_bench -c odoo.conf -d bench --output bench.json --compare previous.json
+# The generator fills a new database with a synthetic university; the benchmark times the key workflows in it,
+# counts their SQL queries and writes machine-readable results that can be compared between releases.
+
+import argparse
+import json
+import logging
+import sys
+
+from odoo import SUPERUSER_ID, api, fields
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from ..benchmark import FLOWS, GENERATOR_SIZES, BenchmarkRunner, UniversityGenerator, compare_results
+
+_logger = logging.getLogger(__name__)
+
+
+# Parse the options of a command; the options it does not know are Odoo server options (config file, database...)
+def _parse_args(parser, args):
+    options, odoo_args = parser.parse_known_args(args)
+    config.parse_config(odoo_args, setup_logging=True)
+    if not config['db_name']:
+        parser.error("a database is required (-d)")
+    return options
+
+
+class PalmsGenerate(Command):
+    """Generate a synthetic PaLMS university in a database"""
+    name = 'palms_generate'
+
+    def run(self, args):
+        parser = argparse.ArgumentParser(prog=f'{sys.argv[0]} {self.name}', description=self.__doc__)
+        parser.add_argument('--size', choices=list(GENERATOR_SIZES), default='medium', help="preset sizes of the university")
+        for key in GENERATOR_SIZES['medium']:
+            parser.add_argument(f'--{key}', type=int, help=f"number of {key} (overrides the preset)")
+        parser.add_argument('--seed', type=int, default=0, help="seed of the random choices")
+        options = _parse_args(parser, args)
+
+        sizes = dict(GENERATOR_SIZES[options.size])
+        sizes.update({key: getattr(options, key) for key in sizes if getattr(options, key) is not None})
+        if sizes['programs'] < sizes['faculties']:
+            parser.error("each faculty needs at least one program")
+
+        with Registry(config['db_name']).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            stats = UniversityGenerator(env, sizes, seed=options.seed).generate()
+        print(json.dumps({'sizes': sizes, 'stages': stats}, indent=2))
+
+
+class PalmsBench(Command):
+    """Measure the PaLMS workflows in a generated university"""
+    name = 'palms_bench'
+
+    def run(self, args):
+        parser = argparse.ArgumentParser(prog=f'{sys.argv[0]} {self.name}', description=self.__doc__)
+        parser.add_argument('--flows', help=f"comma-separated flows to measure, among: {', '.join(FLOWS)}")
+        parser.add_argument('--repeat', type=int, default=3, help="number of runs of each flow")
+        parser.add_argument('--output', help="file the JSON results are written to (default: standard output)")
+        parser.add_argument('--compare', help="JSON results of a previous run; exits with status 1 when query counts grew")
+        options = _parse_args(parser, args)
+
+        names = options.flows.split(',') if options.flows else None
+        unknown = set(names or []) - set(FLOWS)
+        if unknown:
+            parser.error(f"unknown flows: {', '.join(sorted(unknown))}")
+
+        with Registry(config['db_name']).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            runner = BenchmarkRunner(env, repeat=options.repeat)
+            report = {
+                'database': config['db_name'],
+                'version': env['ir.module.module'].search([('name', '=', 'student')]).latest_version,
+                'date': fields.Datetime.to_string(fields.Datetime.now()),
+                'data': runner.data_size(),
+                'results': runner.run(names),
+            }
+            cr.rollback()
+
+        output = json.dumps(report, indent=2)
+        if options.output:
+            with open(options.output, 'w') as output_file:
+                output_file.write(output)
+        else:
+            print(output)
+
+        if options.compare:
+            with open(options.compare) as previous_file:
+                lines, regression = compare_results(json.load(previous_file), report)
+            print('\n'.join(lines), file=sys.stderr)
+            if regression:
+                sys.exit(1)
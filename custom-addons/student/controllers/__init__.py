@@ -0,0 +1,2 @@
+# This file imports all controller modules so that Odoo can register their HTTP routes.
+from . import student_report, student_calendar
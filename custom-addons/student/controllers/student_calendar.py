@@ -0,0 +1,51 @@
+# This module defines the personal iCalendar feeds of PaLMS.
+# Each user can subscribe to their calendar events from an external calendar application through a secret URL.
+# Feeds are generated as a stream and support conditional requests (ETag, If-Modified-Since);
+# clients passing the sync token of their last fetch only receive the events changed since then.
+
+from odoo import api, http, SUPERUSER_ID
+from odoo.http import request
+from odoo.modules.registry import Registry
+
+
+class StudentCalendarController(http.Controller):
+
+    @http.route('/student/calendar/<string:token>.ics', type='http', auth='public', methods=['GET'], csrf=False, save_session=False)
+    def calendar_feed(self, token, sync_token=None, **kwargs):
+        user = request.env['res.users'].sudo()._get_calendar_feed_user(token)
+        if not user:
+            raise request.not_found()
+
+        Event = request.env['student.calendar.event'].sudo()
+        etag, last_modified = Event._ical_feed_state(user)
+        since = Event._ical_parse_sync_token(sync_token)
+        headers = [
+            ('Content-Type', 'text/calendar; charset=utf-8'),
+            ('Cache-Control', 'private, no-cache'),
+            ('X-Sync-Token', Event._ical_sync_token(last_modified)),
+        ]
+
+        # Full feeds are not sent again when nothing changed since the client's copy
+        httprequest = request.httprequest
+        if not since:
+            unchanged = httprequest.if_none_match.contains(etag) if httprequest.if_none_match else (
+                last_modified and httprequest.if_modified_since and
+                last_modified.replace(microsecond=0) <= httprequest.if_modified_since.replace(tzinfo=None))
+            if unchanged:
+                response = request.make_response('', headers=headers, status=304)
+                response.set_etag(etag)
+                return response
+
+        # The feed is read with its own cursor, as the response is streamed after the request cursor is closed
+        dbname, user_id = request.env.cr.dbname, user.id
+
+        def generate():
+            with Registry(dbname).cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                yield from env['student.calendar.event']._ical_feed(user_id, since)
+
+        response = request.make_response(generate(), headers=headers)
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        return response
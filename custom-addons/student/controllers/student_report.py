@@ -0,0 +1,47 @@
+# This module defines the HTTP routes serving and receiving the project report files of PaLMS.
+# Downloads are streamed from the filestore and support range requests; uploads are sent in resumable chunks
+# (see student.report.upload), so large reports never have to be loaded in memory.
+
+from odoo import http
+from odoo.http import request
+
+from ..models.student_project import REPORT_FILE_FIELDS
+
+
+class StudentReportController(http.Controller):
+
+    # Stream a report file of a project; partial (range) requests are answered by the file response
+    @http.route('/student/project/<int:project_id>/file/<string:field_name>', type='http', auth='user', methods=['GET'])
+    def download_report_file(self, project_id, field_name, download=False):
+        project = request.env['student.project'].browse(project_id).exists()
+        if field_name not in REPORT_FILE_FIELDS or not project:
+            raise request.not_found()
+        project.check_access('read')
+
+        stream = request.env['ir.binary']._get_stream_from(
+            project, field_name, filename_field=REPORT_FILE_FIELDS[field_name][0])
+        return stream.get_response(as_attachment=bool(download))
+
+    # Start a chunked upload of a report file and return its token
+    @http.route('/student/project/<int:project_id>/file/<string:field_name>/upload', type='http', auth='user', methods=['POST'])
+    def start_report_upload(self, project_id, field_name, filename, total_size):
+        project = request.env['student.project'].browse(project_id).exists()
+        if not project:
+            raise request.not_found()
+
+        upload = request.env['student.report.upload'].start_upload(project, field_name, filename, int(total_size))
+        return request.make_json_response({'token': upload.token, 'offset': 0, 'done': False})
+
+    # GET returns the offset to resume the upload from; PUT appends the request body at the X-Upload-Offset header.
+    # The upload is stored as soon as the last chunk is received.
+    @http.route('/student/report/upload/<string:token>', type='http', auth='user', methods=['GET', 'PUT'])
+    def report_upload_chunk(self, token, **kwargs):
+        upload = request.env['student.report.upload'].get_upload(token)
+        if not upload:
+            raise request.not_found()
+
+        offset = upload.received_size
+        if request.httprequest.method == 'PUT':
+            offset = upload.write_chunk(int(request.httprequest.headers.get('X-Upload-Offset', 0)),
+                                        request.httprequest.stream)
+        return request.make_json_response({'token': token, 'offset': offset, 'done': not upload.exists()})
@@ -0,0 +1,77 @@
+# Backfill the Discuss channel registry from the channels created before it existed.
+# Channels were looked up by their generated names, so the source record is recovered from the name pattern.
+# When several channels share a name (duplicates created after renames), the oldest one is kept.
+
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# (source, model, table, regular expression extracting the record ID from the channel name)
+NAMED_CHANNELS = [
+    ('project', 'student.project', 'student_project', r'^Project №(\d+) \('),
+    ('application', 'student.application', 'student_application', r'^Applicaton №(\d+) for '),
+    ('proposal', 'student.proposal', 'student_proposal', r'^Project Proposal №(\d+) \('),
+    ('task', 'project.task', 'project_task', r'^Task №(\d+) \('),
+    ('announcement', 'student.announcement', 'student_announcement', r'^Announcement №(\d+) \('),
+    ('milestone', 'student.milestone', 'student_milestone', r'^Milestone №(\d+) \('),
+    ('poll', 'poll.poll', 'poll_poll', r'^Poll №(\d+) \('),
+    ('review_table', 'student.review.table', 'student_review_table', r'^Review Table №(\d+) \('),
+    ('calendar_event', 'student.calendar.event', 'student_calendar_event', r'^Calendar Event №(\d+) \('),
+]
+
+# Models that stored their channel before the registry (source, table)
+STORED_CHANNELS = [
+    ('announcement', 'student.announcement', 'student_announcement'),
+    ('milestone', 'student.milestone', 'student_milestone'),
+    ('calendar_event', 'student.calendar.event', 'student_calendar_event'),
+]
+
+
+def _column_exists(cr, table, column):
+    cr.execute("""
+        SELECT 1 FROM information_schema.columns
+         WHERE table_name = %s AND column_name = %s
+    """, (table, column))
+    return bool(cr.fetchone())
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    # Channels explicitly stored on records are the most reliable source
+    for source, model, table in STORED_CHANNELS:
+        if not _column_exists(cr, table, 'channel_id'):
+            continue
+        cr.execute(f"""
+            INSERT INTO student_channel_registry (source, res_model, res_id, channel_id, create_date, write_date)
+            SELECT %s, %s, rec.id, rec.channel_id, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM {table} rec
+              JOIN discuss_channel channel ON channel.id = rec.channel_id
+            ON CONFLICT (source, res_model, res_id) DO NOTHING
+        """, (source, model))
+        _logger.info("Channel registry: %s channels registered from %s.channel_id", cr.rowcount, table)
+
+    for source, model, table, pattern in NAMED_CHANNELS:
+        cr.execute(f"""
+            INSERT INTO student_channel_registry (source, res_model, res_id, channel_id, create_date, write_date)
+            SELECT DISTINCT ON (rec.id) %s, %s, rec.id, channel.id, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM discuss_channel channel
+              JOIN {table} rec ON rec.id = substring(channel.name FROM %s)::int
+             WHERE channel.name ~ %s
+             ORDER BY rec.id, channel.id
+            ON CONFLICT (source, res_model, res_id) DO NOTHING
+        """, (source, model, pattern, pattern))
+        _logger.info("Channel registry: %s %s channels registered from names", cr.rowcount, source)
+
+    # Review channels only carry the project name
+    cr.execute("""
+        INSERT INTO student_channel_registry (source, res_model, res_id, channel_id, create_date, write_date)
+        SELECT DISTINCT ON (project.id) 'review_line', 'student.project', project.id, channel.id,
+               NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+          FROM discuss_channel channel
+          JOIN student_project project ON channel.name = 'Project Review: ' || project.name
+         ORDER BY project.id, channel.id
+        ON CONFLICT (source, res_model, res_id) DO NOTHING
+    """)
+    _logger.info("Channel registry: %s review channels registered from names", cr.rowcount)
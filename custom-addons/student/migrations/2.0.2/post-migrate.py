@@ -0,0 +1,11 @@
+# Build the audience of the existing announcements, which was computed on the fly before.
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['student.announcement'].with_context(active_test=False).search([])._sync_audience()
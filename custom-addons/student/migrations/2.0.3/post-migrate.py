@@ -0,0 +1,20 @@
+# Backfill the response date of the processed applications, used by the application response time KPI.
+# The date of their last change is the closest known value.
+# Also bring the stale urgency buckets up to date and build the urgency counts per professor.
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE student_application
+           SET response_date = write_date::date
+         WHERE state IN ('accepted', 'rejected')
+           AND response_date IS NULL
+    """)
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['student.application']._cron_update_urgency()
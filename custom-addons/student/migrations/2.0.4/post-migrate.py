@@ -0,0 +1,29 @@
+# The project details of the availabilities are now read from their project instead of being copied on each of them.
+# Drop the copied texts, tags and attachment links, and bring the columns that are still stored (shown on and used
+# to group the supervision board) in line with the projects.
+
+# Columns and relation tables that held the copies
+DROPPED_COLUMNS = ('description', 'requirements', 'results', 'is_group_project', 'projects_group_id')
+DROPPED_TABLES = ('student_availability_additional_files_rel', 'student_availability_student_tag_rel')
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute("ALTER TABLE student_availability " +
+               ", ".join(f"DROP COLUMN IF EXISTS {column}" for column in DROPPED_COLUMNS))
+    for table in DROPPED_TABLES:
+        cr.execute(f"DROP TABLE IF EXISTS {table}")
+    cr.execute("DELETE FROM ir_model_relation WHERE name IN %s", (DROPPED_TABLES,))
+
+    cr.execute("""
+        UPDATE student_availability availability
+           SET name = project.name,
+               name_ru = project.name_ru,
+               format = project.format,
+               language = project.language,
+               professor_id = project.professor_id
+          FROM student_project project
+         WHERE project.id = availability.project_id
+    """)
@@ -22,6 +22,11 @@ class Poll(models.Model):
             # Clear the user list if no faculties selected
             self.user_ids = [(5, 0, 0)]
 
+    # Override unlink to cancel the calendar events deleted with the records in the iCalendar feeds
+    def unlink(self):
+        self.env['student.calendar.event']._log_cascade_removals('poll_id', self)
+        return super(Poll, self).unlink()
+
     # Send email and Discuss messages when the poll is created or updated
     def _send_poll_notification(self, update=False):
         if self.user_ids:
@@ -29,10 +34,8 @@ class Poll(models.Model):
                 # Email notification via predefined template and subtype
                 subtype_id = self.env.ref('student.student_message_subtype_email')
                 template = self.env.ref('student.email_template_poll_created')
-                template.send_mail(self.id,
-                                   email_values={'email_to': ','.join(self.user_ids.mapped('email')),
-                                                 'subtype_id': subtype_id.id},
-                                   force_send=True)
+                self.env['student.utils'].notify_users(template, self, self.user_ids, 'New poll',
+                                                       email_values={'subtype_id': subtype_id.id})
                 message_text = Markup(
                     f"A new poll <a href=\"/web#id={self.id}&model=poll.poll&view_type=form\">{self.name}</a> has been created for you. Please vote!")
             else:
@@ -49,6 +52,15 @@ class Poll(models.Model):
             )
 
 
+# Extend the Poll utilities so poll messages are delivered through the PaLMS notification outbox
+class PollUtils(models.AbstractModel):
+    _inherit = 'poll.utils'
+
+    @api.model
+    def send_message(context, source, message_text, recipients, author, data_tuple=-1):
+        context.env['student.utils'].send_message(source, message_text, recipients, author, data_tuple)
+
+
 # Extend PollOption to associate it with a student commission
 class PollOption(models.Model):
     _inherit = 'poll.option'
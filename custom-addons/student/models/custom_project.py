@@ -5,7 +5,9 @@ from markupsafe import Markup
 
 # Extends the base Project Task model with student milestone logic and custom notifications
 class ProjectTask(models.Model):
-    _inherit = 'project.task'
+    _inherit = ['project.task', 'student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('additional_files',)
 
     # Additional attachments for the task
     additional_files = fields.Many2many(
@@ -31,31 +33,25 @@ class ProjectTask(models.Model):
         readonly=True
     )
 
-    # Onchange: make all attached files public when changed
-    @api.onchange("additional_files")
-    def _update_additional_ownership(self):
-        # Makes the files public, may implement user-specific ownership in the future
-        for attachment in self.additional_files:
-            attachment.write({'public': True})
-
     # Compute the number of attached files
     @api.depends('additional_files')
     def _compute_file_count(self):
         self.file_count = len(self.additional_files)
 
     # Override create to also create a calendar event if no milestone is linked
+    @api.model_create_multi
     def create(self, vals_list):
         records = super().create(vals_list)
-        for record in records:
-            if not record.student_milestone_id:
-                record.env['student.calendar.event'].sudo().create({
-                    'name': f'Task: {record.name}',
-                    'event_type': 'task',
-                    'start_datetime': record.date_deadline,
-                    'end_datetime': record.date_deadline,
-                    'task_id': record.id,
-                    'user_ids': [(6, 0, record.user_ids.ids)] if record.user_ids else []
-                })
+        event_vals = [{
+            'name': f'Task: {record.name}',
+            'event_type': 'task',
+            'start_datetime': record.date_deadline,
+            'end_datetime': record.date_deadline,
+            'task_id': record.id,
+            'user_ids': [(6, 0, record.user_ids.ids)] if record.user_ids else []
+        } for record in records if not record.student_milestone_id]
+        if event_vals:
+            self.env['student.calendar.event'].sudo().create(event_vals)
         return records
 
     # Override write to detect stage changes and trigger notifications or enforce access
@@ -73,10 +69,9 @@ class ProjectTask(models.Model):
                         # Send email notification using template
                         subtype_id = self.env.ref('student.student_message_subtype_email')
                         template = self.env.ref('student.email_template_task_completed')
-                        template.send_mail(self.id,
-                                           email_values={'email_to': self.env['res.users'].search([('id', '=', professor.professor_account.id)]).email,
-                                                         'subtype_id': subtype_id.id},
-                                           force_send=True)
+                        self.env['student.utils'].queue_mail(template, self.id,
+                                                             email_values={'email_to': self.env['res.users'].search([('id', '=', professor.professor_account.id)]).email,
+                                                                           'subtype_id': subtype_id.id})
 
                         # Build URL and send internal message via Discuss
                         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
@@ -107,4 +102,9 @@ class ProjectTask(models.Model):
                     # Only professors can mark tasks as approved
                     if not self.env.user.has_group('student.group_professor'):
                         raise AccessError("Only a professor can change the task status to Approved.")
-        return super(ProjectTask, self).write(vals)
\ No newline at end of file
+        return super(ProjectTask, self).write(vals)
+
+    # Override unlink to cancel the calendar events deleted with the records in the iCalendar feeds
+    def unlink(self):
+        self.env['student.calendar.event']._log_cascade_removals('task_id', self)
+        return super(ProjectTask, self).unlink()
\ No newline at end of file
@@ -7,6 +7,9 @@ from markupsafe import Markup
 class Announcement(models.Model):
     _name = "student.announcement"
     _description = "PaLMS - Announcements"
+    _inherit = ['student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('attachment_ids',)
     _order = 'create_date desc'
 
     # Announcement title
@@ -48,6 +51,19 @@ class Announcement(models.Model):
         required=True
     )
 
+    # Users the announcement is addressed to: members of the target programs (students, managers, supervisors and
+    # professors of their faculties) belonging to one of the target groups.
+    # Kept up to date when the targets or the roles of users change, and used for notifications and visibility.
+    audience_user_ids = fields.Many2many(
+        comodel_name='res.users',
+        relation='student_announcement_audience_rel',
+        column1='announcement_id',
+        column2='user_id',
+        string='Audience',
+        readonly=True,
+        copy=False
+    )
+
     # Any file attachments added to the announcement
     attachment_ids = fields.Many2many(
         comodel_name='ir.attachment',
@@ -58,7 +74,13 @@ class Announcement(models.Model):
     )
 
     # Discussion channel linked to the announcement
-    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', readonly=True, copy=False)
+    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', compute='_compute_channel_id')
+
+    # Resolve the discussion channels of all records through the channel registry at once
+    def _compute_channel_id(self):
+        channels = self.env['student.channel.registry'].resolve_channels('announcement', self.ids)
+        for record in self:
+            record.channel_id = channels.get(record.id, False)
 
     # Replies linked to this announcement
     reply_ids = fields.One2many('student.announcement.reply', 'announcement_id', string='Replies')
@@ -73,64 +95,122 @@ class Announcement(models.Model):
             if record.deadline_date and record.deadline_date < fields.Datetime.now():
                 raise ValidationError("Deadline date must be in the future.")
 
-    # Override create to make attachments public and notify users
+    # Override create to notify users
     @api.model
     def create(self, vals):
         record = super().create(vals)
-        record._make_attachments_public()
+        record._sync_audience()
         record._notify_target_users(is_update=False)
         return record
 
-    # Override write to send update notifications if needed
+    # Override write to keep the audience up to date and send update notifications if needed
     def write(self, vals):
         res = super().write(vals)
-        self._make_attachments_public()
-        for rec in self:
-            if rec.creation_notification_sent:
-                self._notify_target_users(is_update=True)
+        if 'target_group_ids' in vals or 'target_program_ids' in vals:
+            self._sync_audience()
+        if set(vals) - {'audience_user_ids'}:
+            self.filtered('creation_notification_sent')._notify_target_users(is_update=True)
         return res
 
-    # Make all attachments public
-    def _make_attachments_public(self):
-        for announcement in self:
-            for attachment in announcement.attachment_ids:
-                attachment.write({'public': True})
+    # Override unlink to cancel the calendar events deleted with the records in the iCalendar feeds
+    def unlink(self):
+        self.env['student.calendar.event']._log_cascade_removals('announcement_id', self)
+        return super(Announcement, self).unlink()
+
+    # === AUDIENCE ===
+
+    # Find the users the announcement is addressed to
+    def _get_audience_users(self):
+        self.ensure_one()
+        programs = self.target_program_ids
+        if not programs or not self.target_group_ids:
+            return self.env['res.users']
+
+        students = self.env['student.student'].sudo().search([('student_program', 'in', programs.ids)])
+        managers = self.env['student.manager'].sudo().search([('program_ids', 'in', programs.ids)])
+        supervisors = self.env['student.supervisor'].sudo().search([('program_ids', 'in', programs.ids)])
+        professors = self.env['student.professor'].sudo().search(
+            [('professor_faculty', 'in', programs.program_faculty_id.ids)])
+
+        candidate_ids = set(
+            students.mapped('student_account.id') +
+            managers.mapped('manager_account.id') +
+            supervisors.mapped('supervisor_account.id') +
+            professors.mapped('professor_account.id'))
+
+        # Apply group filter
+        return self.env['res.users'].sudo().search([
+            ('id', 'in', list(candidate_ids)),
+            ('groups_id', 'in', self.target_group_ids.ids)
+        ])
+
+    # Recompute the whole audience of the announcements
+    def _sync_audience(self):
+        for announcement in self.sudo():
+            announcement.audience_user_ids = [(6, 0, announcement._get_audience_users().ids)]
+
+    # Recompute the announcements the given users belong to, leaving the other audience rows untouched.
+    # The audience of all the users is computed by one query joining their programs (as student, manager, supervisor
+    # or professor of the faculty), the targeted programs and groups, so multi-creates of role records stay flat.
+    @api.model
+    def _sync_user_audience(self, users):
+        if not users:
+            return
+        self.env.flush_all()
+        programs = self._fields['target_program_ids']
+        groups = self._fields['target_group_ids']
+        audience = f"""
+            WITH user_programs AS (
+                SELECT student.student_account AS user_id, student.student_program AS program_id
+                  FROM student_student student
+                 WHERE student.active AND student.student_account = ANY(%(user_ids)s)
+                 UNION
+                SELECT manager.manager_account, program.id
+                  FROM student_program program
+                  JOIN student_manager manager ON manager.id = program.manager
+                 WHERE manager.active AND manager.manager_account = ANY(%(user_ids)s)
+                 UNION
+                SELECT supervisor.supervisor_account, program.id
+                  FROM student_program program
+                  JOIN student_supervisor supervisor ON supervisor.id = program.supervisor
+                 WHERE supervisor.active AND supervisor.supervisor_account = ANY(%(user_ids)s)
+                 UNION
+                SELECT professor.professor_account, program.id
+                  FROM student_program program
+                  JOIN student_professor professor ON professor.professor_faculty = program.program_faculty_id
+                 WHERE professor.active AND professor.professor_account = ANY(%(user_ids)s)
+            )
+            SELECT DISTINCT target_program.{programs.column1} AS announcement_id, user_programs.user_id
+              FROM user_programs
+              JOIN res_users users ON users.id = user_programs.user_id AND users.active
+              JOIN {programs.relation} target_program ON target_program.{programs.column2} = user_programs.program_id
+              JOIN {groups.relation} target_group ON target_group.{groups.column1} = target_program.{programs.column1}
+              JOIN res_groups_users_rel membership ON membership.gid = target_group.{groups.column2}
+                                                  AND membership.uid = user_programs.user_id
+        """
+        params = {'user_ids': users.ids}
+
+        self.env.cr.execute(f"""
+            WITH audience AS ({audience})
+            DELETE FROM student_announcement_audience_rel rel
+             WHERE rel.user_id = ANY(%(user_ids)s)
+               AND NOT EXISTS (SELECT 1 FROM audience
+                                WHERE audience.announcement_id = rel.announcement_id
+                                  AND audience.user_id = rel.user_id)
+        """, params)
+        self.env.cr.execute(f"""
+            INSERT INTO student_announcement_audience_rel (announcement_id, user_id)
+            {audience}
+            ON CONFLICT DO NOTHING
+        """, params)
+        self.invalidate_model(['audience_user_ids'])
 
     # Notify users based on target group and program/faculty intersection
     def _notify_target_users(self, is_update=False):
         for announcement in self:
             if announcement.is_published:
-                # Collect users based on programs and faculties
-                students = self.env['student.student'].sudo().search(
-                    [('student_program', 'in', announcement.target_program_ids.ids)])
-                program_students_user_ids = students.mapped('student_account.id')
-
-                managers = self.env['student.manager'].sudo().search(
-                    [('program_ids', 'in', announcement.target_program_ids.ids)])
-                program_managers_user_ids = managers.mapped('manager_account.id')
-
-                supervisors = self.env['student.supervisor'].sudo().search(
-                    [('program_ids', 'in', announcement.target_program_ids.ids)])
-                program_supervisors_user_ids = supervisors.mapped('supervisor_account.id')
-
-                faculties = self.env['student.faculty'].sudo().search(
-                        [('program_ids', 'in', announcement.target_program_ids.ids)])
-                professors = self.env['student.professor'].sudo().search(
-                    [('professor_faculty', 'in', faculties.ids)])
-                faculty_professors_user_ids = professors.mapped('professor_account.id')
-
-                # Apply group filter
-                group_user_ids = self.env['res.users'].sudo().search([
-                    ('groups_id', 'in', announcement.target_group_ids.ids)
-                ]).ids
-
-                program_and_faculty_users = (
-                        set(program_students_user_ids) |
-                        set(program_managers_user_ids) |
-                        set(program_supervisors_user_ids) |
-                        set(faculty_professors_user_ids))
-                target_user_ids = list(program_and_faculty_users & set(group_user_ids))
-                users = self.env['res.users'].browse(target_user_ids)
+                # Recipients are read from the materialized audience
+                users = announcement.sudo().audience_user_ids
 
                 if users:
                     base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
@@ -144,20 +224,19 @@ class Announcement(models.Model):
 
                     if is_update:
                         # Post update to existing channel
-                        announcement.channel_id.sudo().message_post(
-                            body=message_text,
-                            author_id=announcement.author_id.partner_id.id,
-                            message_type="comment",
-                            subtype_xmlid='mail.mt_comment'
+                        self.env['student.utils'].send_message(
+                            'announcement',
+                            message_text,
+                            users,
+                            announcement.author_id,
+                            (str(announcement.id), str(announcement.name))
                         )
                     else:
                         # Email + Discuss + Calendar (on creation)
                         subtype_id = self.env.ref('student.student_message_subtype_email')
                         template = self.env.ref('student.email_template_announcement_created')
-                        template.send_mail(self.id,
-                                           email_values={'email_to': ','.join(users.mapped('email')),
-                                                         'subtype_id': subtype_id.id},
-                                           force_send=True)
+                        self.env['student.utils'].notify_users(template, announcement, users, 'New announcement',
+                                                               email_values={'subtype_id': subtype_id.id})
 
                         # Send message in Discuss
                         self.env['student.utils'].send_message(
@@ -168,11 +247,6 @@ class Announcement(models.Model):
                             (str(announcement.id), str(announcement.name))
                         )
 
-                        # Save or create the related channel
-                        channel = announcement.env['discuss.channel'].sudo().search([
-                            ('name', '=', f"Announcement №{announcement.id} ({announcement.name})")
-                        ], limit=1)
-                        announcement.channel_id = channel
                         announcement.creation_notification_sent = True
 
                         # Add deadline as a calendar event
@@ -234,48 +308,15 @@ class Announcement(models.Model):
             'target': 'current',
         }
 
-    # Extend search behavior with visibility filtering based on user group and role
+    # Extend search behavior with visibility filtering: non-privileged users only see published announcements
+    # they belong to the audience of
     def _search(self, domain, offset=0, limit=None, order=None):
-        user = self.sudo().env.user
-        if not (
-                user.has_group('student.group_manager') or
-                user.has_group('student.group_supervisor') or
-                user.has_group('student.group_administrator') or
-                user.has_group('base.group_system')
-        ):
-            group_ids = user.groups_id.ids
+        if not self.env.su and not self.env['student.role.context'].get().is_privileged:
             domain = expression.AND([
                 domain,
-                [('target_group_ids', 'in', group_ids)],
+                [('audience_user_ids', 'in', [self.env.uid])],
                 [('is_published', '=', True)]
             ])
-
-            if user.has_group('student.group_student'):
-                student = self.env['student.student'].sudo().search([('student_account', '=', user.id)], limit=1)
-                if student:
-                    domain = expression.AND([
-                        domain,
-                        [('target_program_ids', 'in', [student.student_program.id])]
-                    ])
-                else:
-                    domain = expression.AND([
-                        domain,
-                        [('id', '=', -1)]
-                    ])
-            elif user.has_group('student.group_professor'):
-                professor = self.env['student.professor'].sudo().search([('professor_account', '=', user.id)], limit=1)
-                faculty_programs = self.env['student.program'].sudo().search([('program_faculty_id', '=', professor.professor_faculty.id)])
-
-                if professor and faculty_programs:
-                    domain = expression.AND([
-                        domain,
-                        [('target_program_ids', 'in', faculty_programs.ids)]
-                    ])
-                else:
-                    domain = expression.AND([
-                        domain,
-                        [('id', '=', -1)]
-                    ])
         return super()._search(domain, offset=offset, limit=limit, order=order)
 
     # Scheduled job: unpublish expired announcements automatically
@@ -287,3 +328,25 @@ class Announcement(models.Model):
             ('deadline_date', '<=', now)
         ])
         expired_announcements.write({'is_published': False})
+
+
+# Keep announcement audiences in sync with group memberships
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(key == 'groups_id' or key.startswith(('in_group_', 'sel_groups_')) for key in vals):
+            self.env['student.announcement']._sync_user_audience(self)
+        return res
+
+
+class ResGroups(models.Model):
+    _inherit = 'res.groups'
+
+    def write(self, vals):
+        users = self.users if 'users' in vals else self.env['res.users']
+        res = super().write(vals)
+        if 'users' in vals:
+            self.env['student.announcement']._sync_user_audience(users | self.users)
+        return res
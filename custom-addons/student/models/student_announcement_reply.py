@@ -6,6 +6,9 @@ from odoo.osv import expression
 class AnnouncementReply(models.Model):
     _name = 'student.announcement.reply'
     _description = 'PaLMS - Replies to Announcements'
+    _inherit = ['student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('attachment_ids',)
 
     # Link to the related announcement
     announcement_id = fields.Many2one('student.announcement', string='Announcement', required=True, ondelete='cascade')
@@ -33,11 +36,10 @@ class AnnouncementReply(models.Model):
         ('unique_reply_per_user', 'unique(announcement_id, user_id)', 'You can only submit one reply per announcement.')
     ]
 
-    # Override create to validate announcement_id and set attachments as public
+    # Override create to validate announcement_id
     @api.model
     def create(self, vals):
         record = super().create(vals)
-        record._make_attachments_public()
 
         # Retrieve announcement_id either from values or context
         announcement_id = vals.get('announcement_id') or self.env.context.get('default_announcement_id')
@@ -48,26 +50,9 @@ class AnnouncementReply(models.Model):
 
         return record
 
-    # Override write to ensure attachments are public after update
-    def write(self, vals):
-        res = super().write(vals)
-        self._make_attachments_public()
-        return res
-
-    # Mark all attachments as public
-    def _make_attachments_public(self):
-        for reply in self:
-            for attachment in reply.attachment_ids:
-                attachment.sudo().write({'public': True})
-
     # Override search to restrict access to own replies unless privileged
     def _search(self, domain, offset=0, limit=None, order=None):
         user = self.sudo().env.user
-        if not (
-                user.has_group('student.group_manager') or
-                user.has_group('student.group_supervisor') or
-                user.has_group('student.group_administrator') or
-                user.has_group('base.group_system')
-        ):
+        if not self.env['student.role.context'].get().is_privileged:
             domain = expression.AND([domain, [('user_id', '=', user.id)]])
         return super()._search(domain, offset=offset, limit=limit, order=order)
@@ -5,13 +5,19 @@
 from markupsafe import Markup
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError, AccessError
+from odoo.tools.sql import create_index
 from dateutil.relativedelta import relativedelta
 
+# Number of days a professor has to answer a sent application before it is missed
+URGENCY_DAYS = 3
+
 class Application(models.Model):
 	_name = 'student.application'
 	_description = 'PaLMS - Applications for Projects'
 	_rec_name = 'applicant'
-	_inherit = ['mail.thread', 'student.utils']
+	_inherit = ['mail.thread', 'student.utils', 'student.attachment.mixin']
+	# Attachment fields whose files are made public
+	_public_attachment_fields = ('additional_files',)
 
 	# Compute and populate student-related details from the applicant record
 	@api.depends('applicant')
@@ -25,7 +31,7 @@ class Application(models.Model):
 
 	# Default method to assign the current user's linked student account as the applicant
 	def _default_applicant(self):
-		student = self.env['student.student'].sudo().search([('student_account.id', '=', self.env.uid)], limit=1)
+		student = self.env['student.role.context'].get().student
 		self._compute_student_details()
 		if student:
 			return student.id
@@ -65,6 +71,8 @@ class Application(models.Model):
 	state = fields.Selection([('draft', 'Draft'),('sent', 'Sent'),('accepted', 'Accepted'),('rejected', 'Rejected')], default='draft', readonly=True, string='Application State', store=True)
 	# Date when the application was sent to the professor
 	sent_date = fields.Date(string='Sent Date')
+	# Date when the application was accepted or rejected
+	response_date = fields.Date(string='Response Date', readonly=True)
 
 	# Computed field to categorize applications into urgency groups based on sent_date and state
 	urgency_category = fields.Selection([
@@ -74,19 +82,48 @@ class Application(models.Model):
 		('handled', 'Handled')
     ], string='Urgency', compute='_compute_urgency_category', store=True)
 
-	# Compute urgency category based on application state and date sent
+	# Compute urgency category based on application state and date sent.
+	# Sent applications are moved between the buckets as days pass by the nightly urgency job.
+	@api.depends('state', 'sent_date')
 	def _compute_urgency_category(self):
 		today = fields.Date.today()
 		for record in self:
 			if record.state == 'accepted' or record.state == 'rejected':
 				record.urgency_category = 'handled'
-			elif (record.sent_date + relativedelta(days=3)) > today:
+			elif not record.sent_date:
+				record.urgency_category = False
+			elif (record.sent_date + relativedelta(days=URGENCY_DAYS)) > today:
 				record.urgency_category = 'pending'
-			elif (record.sent_date + relativedelta(days=3)) == today:
+			elif (record.sent_date + relativedelta(days=URGENCY_DAYS)) == today:
 				record.urgency_category = 'urgent'
 			else:
 				record.urgency_category = 'missed'
 
+	# Index used by the nightly urgency job, which selects the sent applications by date
+	def _auto_init(self):
+		res = super()._auto_init()
+		create_index(self._cr, 'student_application_state_sent_date_index', self._table, ['state', 'sent_date'])
+		return res
+
+	# Scheduled job: move the sent applications between the urgency buckets, then refresh the counts per professor
+	@api.model
+	def _cron_update_urgency(self):
+		self.flush_model(['state', 'sent_date', 'urgency_category'])
+		limit_date = fields.Date.today() - relativedelta(days=URGENCY_DAYS)
+
+		# One set-based update per bucket; rows already in the right bucket are not rewritten
+		for urgency, operator in (('pending', '>'), ('urgent', '='), ('missed', '<')):
+			self.env.cr.execute(f"""
+				UPDATE student_application
+				   SET urgency_category = %s
+				 WHERE state = 'sent'
+				   AND sent_date {operator} %s
+				   AND urgency_category IS DISTINCT FROM %s
+			""", (urgency, limit_date, urgency))
+		self.invalidate_model(['urgency_category'])
+
+		self.env['student.application.urgency']._refresh()
+
 	# The project to which this application is submitted; must be published or applied state
 	project_id = fields.Many2one('student.project', string='Project', required=True, domain=[('state_publication','in',['published','applied'])])
 
@@ -117,7 +154,7 @@ class Application(models.Model):
 			self.color = 9
 
 	# The professor responsible for the applied project; defaulted from project
-	application_professor = fields.Many2one('res.users', string='Professor of the Applied Project', default=lambda self: self.project_id.professor_account)
+	application_professor = fields.Many2one('res.users', string='Professor of the Applied Project', default=lambda self: self.project_id.professor_account, index=True)
 
 	# Constraint to prevent students from editing feedback except in draft state
 	@api.constrains('feedback')
@@ -138,28 +175,30 @@ class Application(models.Model):
 			raise UserError("Please provide a more detailed feedback (at least 20 characters).")
 
 	# Override create to disable default tracking and customize creation message
-	@api.model
-	def create(self, vals):
-		application = super(Application, self.with_context(tracking_disable=True)).create(vals)
-
-		application._make_attachments_public()
-
-		# Log a customized message on creation
-		message = _("A new application has been created by %s.") % (self.env.user.name)
-		application.message_post(body=message)
-
-		return application
-
-	# Make all attachments public so other users can access them
-	def _make_attachments_public(self):
-		for application in self:
-			for attachment in application.additional_files:
-				attachment.write({'public': True})
+	@api.model_create_multi
+	def create(self, vals_list):
+		applications = super(Application, self.with_context(tracking_disable=True)).create(vals_list)
+
+		# Log a customized message on creation (skipped with mail_create_nolog, e.g. for generated data)
+		if not self.env.context.get('mail_create_nolog'):
+			message = _("A new application has been created by %s.") % (self.env.user.name)
+			for application in applications:
+				application.message_post(body=message)
+
+		return applications
+
+	# Keep the urgency counts of the professors in line when applications are sent, handled or reassigned
+	def write(self, vals):
+		professors = self.application_professor
+		res = super().write(vals)
+		if {'state', 'sent_date', 'application_professor'} & set(vals):
+			self.env['student.application.urgency']._refresh(professors | self.application_professor)
+		return res
 
 	# Check that the current user is authorized to modify the application
 	@api.onchange('email', 'message', 'project_id', 'additional_email', 'additional_phone', 'telegram')
 	def _check_user_identity(self):
-		if not self.env.user.has_group('student.group_supervisor'):
+		if not self.env['student.role.context'].get().is_supervisor:
 			if self.applicant_account != self.env.user:
 				raise AccessError("You can only modify applications that you created. If you require assistance, contact the supervisor.")
 
@@ -199,7 +238,7 @@ class Application(models.Model):
 			# Send notification email to professor
 			subtype_id = self.env.ref('student.student_message_subtype_email')
 			template = self.env.ref('student.email_template_application_send')
-			template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+			self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
 			# -----------------------------------
 
 			# Construct and send a chat message notifying the professor
@@ -235,13 +274,13 @@ class Application(models.Model):
 			other_apps = self.env['student.application'].search([
 				('project_id', '=', self.project_id.id),
 				('id', '!=', self.id),
+				('state', '=', 'sent'),
 			])
-			for app in other_apps:
-				app.action_view_application_auto_reject()
+			other_apps._auto_reject()
 
 	# Security check to ensure only the professor of the project can respond to applications
 	def _check_professor_identity(self):
-		if not self.env.user.has_group('student.group_supervisor'):
+		if not self.env['student.role.context'].get().is_supervisor:
 			if self.project_id.professor_account != self.env.user:
 				raise AccessError("You can only respond to the applications sent to your projects.")
 
@@ -250,7 +289,7 @@ class Application(models.Model):
 		self._check_professor_identity()
 
 		if self.state == 'sent':
-			self.write({'state': 'accepted'})
+			self.write({'state': 'accepted', 'response_date': fields.Date.today()})
 
 			# Update project state and assign the student
 			self.project_id.sudo().write({
@@ -274,7 +313,7 @@ class Application(models.Model):
 			# Send email notification of acceptance
 			subtype_id = self.env.ref('student.student_message_subtype_email')
 			template = self.env.ref('student.email_template_application_accept')
-			template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+			self.env['student.utils'].notify_users(template, self, self.applicant_account, 'Application accepted', email_values={'subtype_id': subtype_id.id}, urgent=True)
 			# -----------------------------------
 
 			# Construct and send chat message notifying applicant of acceptance
@@ -296,7 +335,7 @@ class Application(models.Model):
 		if self.state == 'sent':
 			self._check_feedback()
 
-			self.write({'state': 'rejected'})
+			self.write({'state': 'rejected', 'response_date': fields.Date.today()})
 
 			# Log rejection in chatter
 			body = _('This application is rejected by the professor.')
@@ -308,7 +347,7 @@ class Application(models.Model):
 			# Send email notification of rejection
 			subtype_id = self.env.ref('student.student_message_subtype_email')
 			template = self.env.ref('student.email_template_application_reject')
-			template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+			self.env['student.utils'].notify_users(template, self, self.applicant_account, 'Application rejected', email_values={'subtype_id': subtype_id.id}, urgent=True)
 			# -----------------------------------
 
 			# Construct and send chat message notifying applicant of rejection with feedback
@@ -322,20 +361,29 @@ class Application(models.Model):
 
 	# Automatically reject an application when another is accepted for the same project
 	def action_view_application_auto_reject(self):
-		if self.state == 'sent':
-			self.write({'state': 'rejected'})
+		self.filtered(lambda application: application.state == 'sent')._auto_reject()
 
-			# Log automatic rejection in chatter
-			body = _('This application is rejected as another one is accepted by the professor.')
-			self.message_post(body=body)
+	# Reject applications as a set: the states are changed with one write, the chatter entries are logged in one
+	# batch and the applicant messages are queued in the notification outbox with one multi-create, so accepting an
+	# application costs the same whatever the number of competing applicants
+	def _auto_reject(self):
+		if not self:
+			return
+		self.write({'state': 'rejected', 'response_date': fields.Date.today()})
 
-			# Use Odoo Bot as sender for the notification message
-			odoobot = self.env.ref('base.user_root')
+		# Log automatic rejection in chatter
+		body = _('This application is rejected as another one is accepted by the professor.')
+		self._message_log_batch(bodies={application.id: body for application in self})
 
-			# Construct and send chat message notifying applicant of automatic rejection
-			message_text = f'<strong>Application Rejected</strong><p> This application submitted for <i>' + self.project_id.name + '</i> is automatically rejected since another one is chosen by the professor.</p>'
+		# Use Odoo Bot as sender for the notification messages
+		odoobot = self.env.ref('base.user_root')
 
-			self.env['student.utils'].send_message('application', Markup(message_text), self.applicant_account, odoobot, (str(self.id),str(self.project_id.name)))
+		# Construct the chat messages notifying the applicants of the automatic rejection
+		messages = []
+		for application in self:
+			message_text = f'<strong>Application Rejected</strong><p> This application submitted for <i>' + application.project_id.name + '</i> is automatically rejected since another one is chosen by the professor.</p>'
+			messages.append(('application', Markup(message_text), application.applicant_account, odoobot, (str(application.id), str(application.project_id.name)), None))
+		self.env['student.notification.outbox'].enqueue_messages(messages)
 
 	# Field indicating if chat messages should be invisible to the current user
 	chat_invisible = fields.Boolean("Chat Invisible", compute="_compute_chat_invisible", store=False)
@@ -353,3 +401,48 @@ class Application(models.Model):
 			project.chat_invisible = not (
 					(user.id in accepted_ids) or
 					self.env.user.has_group('student.group_administrator'))
+
+
+# Number of sent applications per professor and urgency bucket, rebuilt by the nightly urgency job
+# and updated when applications change, so escalation views do not have to group the applications
+class ApplicationUrgency(models.Model):
+	_name = 'student.application.urgency'
+	_description = 'PaLMS - Application Urgency per Professor'
+	_order = 'professor_id, urgency_category'
+
+	# Professor of the applied projects
+	professor_id = fields.Many2one('res.users', string='Professor', required=True, readonly=True, index=True, ondelete='cascade')
+	urgency_category = fields.Selection([
+		('pending', 'Pending'),
+		('urgent', 'Urgent'),
+		('missed', 'Missed')
+	], string='Urgency', required=True, readonly=True)
+	application_count = fields.Integer('Number of Applications', readonly=True)
+
+	# Recount the sent applications of the given professors (of all professors when none are given)
+	@api.model
+	def _refresh(self, professors=None):
+		if professors is not None and not professors:
+			return
+		self.env['student.application'].flush_model(['state', 'urgency_category', 'application_professor'])
+		self.flush_model()
+
+		if professors is None:
+			self.env.cr.execute("DELETE FROM student_application_urgency")
+			professor_filter = ""
+		else:
+			self.env.cr.execute("DELETE FROM student_application_urgency WHERE professor_id IN %s", (tuple(professors.ids),))
+			professor_filter = "AND application_professor IN %(professor_ids)s"
+		params = {'professor_ids': tuple(professors.ids) if professors is not None else (), 'uid': self.env.uid}
+		self.env.cr.execute(f"""
+			INSERT INTO student_application_urgency (professor_id, urgency_category, application_count,
+			                                         create_uid, create_date, write_uid, write_date)
+			SELECT application_professor, urgency_category, COUNT(*), %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+			  FROM student_application
+			 WHERE state = 'sent'
+			   AND application_professor IS NOT NULL
+			   AND urgency_category IN ('pending', 'urgent', 'missed')
+			   {professor_filter}
+			 GROUP BY application_professor, urgency_category
+		""", params)
+		self.invalidate_model()
@@ -0,0 +1,35 @@
+# This module defines the attachment publishing mixin of PaLMS.
+# Files attached to projects, applications, announcements and other records are made public so every user
+# allowed to see the record can download them. The mixin publishes the attachments of a whole recordset
+# with a single write, and only when one of the attachment fields was created or changed.
+
+from odoo import api, models
+
+
+class AttachmentPublishingMixin(models.AbstractModel):
+    _name = 'student.attachment.mixin'
+    _description = 'PaLMS - Public Attachments'
+
+    # Many2many fields to ir.attachment whose files are made public
+    _public_attachment_fields = ()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if any(set(vals) & set(self._public_attachment_fields) for vals in vals_list):
+            records._make_attachments_public()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if set(vals) & set(self._public_attachment_fields):
+            self._make_attachments_public()
+        return res
+
+    # Make the attachments of all records public; attachments that already are public are not written
+    def _make_attachments_public(self):
+        records = self.sudo()
+        attachments = self.env['ir.attachment'].sudo()
+        for field_name in self._public_attachment_fields:
+            attachments |= records.mapped(field_name)
+        attachments.filtered(lambda attachment: not attachment.public).write({'public': True})
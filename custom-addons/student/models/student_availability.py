@@ -38,62 +38,28 @@ class ProjectAvailability(models.Model):
     def _set_default_project(self):
         return self._context.get('project_id', False)
 
-    project_id = fields.Many2one('student.project', string='Project', default=_set_default_project)
-
-    # Compute all project-related fields from the selected project
-    @api.depends('project_id')
-    def _set_default_project_values(self):
-        for record in self:
-            project_source = record.env['student.project'].sudo().search([
-                ('id', '=', record._context.get('project_id', False))
-            ], limit=1) if record._context.get('project_id', False) else record.project_id
-
-            if project_source:
-                record.name = project_source.name
-                record.name_ru = project_source.name_ru
-                record.format = project_source.format
-                record.is_group_project = project_source.is_group_project
-                record.projects_group_id = project_source.projects_group_id
-                record.language = project_source.language
-                record.description = project_source.description
-                record.requirements = project_source.requirements
-                record.results = project_source.results
-                record.additional_files = project_source.additional_files
-                record.tag_ids = project_source.tag_ids
-                record.professor_id = project_source.professor_id
-            else:
-                raise ValidationError("Error! Cannot find the source project.")
-
-    # Project details (copied from project_id for display)
-    name = fields.Char('Project Name (English)', compute=_set_default_project_values, store=True)
-    name_ru = fields.Char('Project Name (Russian)', compute=_set_default_project_values, store=True)
-    format = fields.Selection([('research', 'Research'), ('project', 'Project'), ('startup', 'Start-up')],
-                              string="Format", compute=_set_default_project_values, store=True)
-    is_group_project = fields.Boolean(string='Is Group Project?', compute=_set_default_project_values, store=True)
-    projects_group_id = fields.Many2one('student.projects.group', string='Projects Group',
-                                        compute=_set_default_project_values, store=True)
-    language = fields.Selection([('en', 'English'), ('ru', 'Russian')], string="Language",
-                                compute=_set_default_project_values, store=True)
-    professor_id = fields.Many2one('student.professor', string='Professor',
-                                   compute=_set_default_project_values, store=True)
-
-    description = fields.Text('Detailed Description', compute=_set_default_project_values, store=True)
-    requirements = fields.Text('Application Requirements', compute=_set_default_project_values, store=True)
-    results = fields.Text('Expected Results', compute=_set_default_project_values, store=True)
+    project_id = fields.Many2one('student.project', string='Project', default=_set_default_project, index=True)
+
+    # Project details, read from project_id. The long texts, tags and attachments are not stored on the
+    # availabilities; the names are stored for the supervision board cards and searches, and professor, format
+    # and language so the board can group by them.
+    name = fields.Char('Project Name (English)', related='project_id.name', store=True)
+    name_ru = fields.Char('Project Name (Russian)', related='project_id.name_ru', store=True)
+    format = fields.Selection(string="Format", related='project_id.format', store=True)
+    is_group_project = fields.Boolean(string='Is Group Project?', related='project_id.is_group_project')
+    projects_group_id = fields.Many2one(string='Projects Group', related='project_id.projects_group_id')
+    language = fields.Selection(string="Language", related='project_id.language', store=True)
+    professor_id = fields.Many2one(string='Professor', related='project_id.professor_id', store=True)
+
+    description = fields.Text('Detailed Description', related='project_id.description')
+    requirements = fields.Text('Application Requirements', related='project_id.requirements')
+    results = fields.Text('Expected Results', related='project_id.results')
 
     # Explanation for rejection or return of a submission
     reason = fields.Text(string='Return/Rejection Reason')
 
-    additional_files = fields.Many2many(
-        comodel_name='ir.attachment',
-        relation='student_availability_additional_files_rel',
-        column1='availability_id',
-        column2='attachment_id',
-        string='Attachments',
-        compute=_set_default_project_values, store=True
-    )
-
-    tag_ids = fields.Many2many('student.tag', string='Tags', compute=_set_default_project_values, store=True)
+    additional_files = fields.Many2many(string='Attachments', related='project_id.additional_files')
+    tag_ids = fields.Many2many(string='Tags', related='project_id.tag_ids')
 
     # Dynamic domain for program filtering by faculty
     def _set_default_program_domain(self):
@@ -141,18 +107,6 @@ class ProjectAvailability(models.Model):
                 case _:
                     ValidationError("This project has an invalid supervision state. Please contact the system administrator.")
 
-    # Make file attachments public on create
-    @api.model
-    def create(self, vals):
-        record = super().create(vals)
-        record._make_attachments_public()
-        return record
-
-    def _make_attachments_public(self):
-        for availability in self:
-            for attachment in availability.additional_files:
-                attachment.write({'public': True})
-
     # Remove "waiting" from grouped Kanban column options
     @api.model
     def _expand_state_groups(self, states, domain, order=None):
@@ -160,7 +114,7 @@ class ProjectAvailability(models.Model):
 
     # Check user is authorized to supervise this program
     def _check_supervisor_identity(self, check=False):
-        if check and not self.env.user.has_group('student.group_administrator'):
+        if check and not self.env['student.role.context'].get().is_administrator:
             if self.env.user != self.program_supervisor_account:
                 raise AccessError("You can only react to projects sent to the program that you are supervising.")
 
@@ -211,6 +165,64 @@ class ProjectAvailability(models.Model):
         self.state = "returned"
         self.project_id.action_view_project_return(self)
 
+    # === BULK SUPERVISION ===
+
+    # Check once that all the selected submissions can be processed by the current user
+    def _check_bulk_supervision(self):
+        if not self:
+            raise UserError("Select the project submissions to process.")
+        if any(availability.state != 'pending' for availability in self):
+            raise UserError("You can only process project submissions in 'Pending' status.")
+        if any(project.state_evaluation != 'progress' for project in self.project_id):
+            raise UserError("Some of the selected projects are not waiting for an evaluation.")
+        if not self.env['student.role.context'].get().is_administrator:
+            if any(availability.program_supervisor_account != self.env.user for availability in self):
+                raise AccessError("You can only react to projects sent to the programs that you are supervising.")
+
+    # Approve the selected submissions at once; approvals are created with a single multi-create
+    def action_approve_availabilities(self):
+        self._check_bulk_supervision()
+
+        approval_values = []
+        for availability in self:
+            for degree in availability.degree_ids:
+                approval_values.append((availability.project_id, {
+                    'type': availability.type,
+                    'program_id': availability.program_id.id,
+                    'degree_id': degree.id
+                }))
+        approvals = self.env['student.approval'].sudo().create([values for _project, values in approval_values])
+        approvals_by_project = {}
+        for (project, _values), approval in zip(approval_values, approvals):
+            approvals_by_project.setdefault(project, []).append(approval.id)
+        for project, approval_ids in approvals_by_project.items():
+            project.approval_ids = [(4, approval_id) for approval_id in approval_ids]
+
+        self.write({'state': 'approved'})
+        self.project_id._apply_supervision_decisions(self, 'approved')
+        return self.env['student.utils'].message_display('Approval', f'{len(self)} project submission(s) approved.', False)
+
+    # Reject or return the selected submissions at once; the reason is asked for in a popup
+    def action_reject_availabilities(self):
+        return self._open_decision_wizard('rejected')
+
+    def action_return_availabilities(self):
+        return self._open_decision_wizard('returned')
+
+    def _open_decision_wizard(self, decision):
+        self._check_bulk_supervision()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Reject Submissions' if decision == 'rejected' else 'Return Submissions',
+            'res_model': 'student.availability.decision',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_decision': decision,
+                'default_availability_ids': [(6, 0, self.ids)]
+            }
+        }
+
     # Allow professors to create a branched version of the project
     def action_view_availability_branch(self):
         if self.env.user.has_group('student.group_professor'):
@@ -276,4 +288,31 @@ class ProjectAvailability(models.Model):
     # Ensure no duplicate entries per program/project combination
     _sql_constraints = [
         ('check_uniqueness', 'UNIQUE(program_id, project_id)', 'You have specified duplicate target programs.')
-    ]
\ No newline at end of file
+    ]
+
+
+# Popup asking for the reason shared by the submissions rejected or returned together
+class AvailabilityDecision(models.TransientModel):
+    _name = 'student.availability.decision'
+    _description = 'PaLMS - Bulk Supervision Decisions'
+
+    # Decision applied to the submissions
+    decision = fields.Selection([
+        ('rejected', 'Reject'),
+        ('returned', 'Return')
+    ], string='Decision', required=True, readonly=True)
+    # Submissions the decision is applied to
+    availability_ids = fields.Many2many('student.availability', string='Submissions', readonly=True)
+    # Reason registered on every submission and in the log of every project
+    reason = fields.Text(string='Return/Rejection Reason', required=True)
+
+    def action_confirm(self):
+        availabilities = self.availability_ids
+        availabilities._check_bulk_supervision()
+        if len(self.reason) < 20:
+            raise UserError("Please provide a more detailed reason (at least 20 characters).")
+
+        availabilities.write({'reason': self.reason, 'state': self.decision})
+        availabilities.project_id._apply_supervision_decisions(availabilities, self.decision)
+        message = 'rejected' if self.decision == 'rejected' else 'returned'
+        return self.env['student.utils'].message_display('Supervision', f'{len(availabilities)} project submission(s) {message}.', False)
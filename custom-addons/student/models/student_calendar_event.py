@@ -1,12 +1,54 @@
 # This model defines calendar events in PaLMS for scheduling and notifying users about project-related activities.
 # Events may relate to tasks, commissions, announcements, polls, or milestones and support access control and notifications.
 
+import secrets
+from datetime import datetime, timedelta
 from email.policy import default
 
-from markupsafe import Markup
+from markupsafe import Markup, escape
 from odoo import models, fields, api
 from odoo.exceptions import AccessError
 
+# Number of events read at once while streaming an iCalendar feed
+ICAL_BATCH_SIZE = 500
+# Days removals are kept for incremental feeds; older sync tokens get the full feed
+ICAL_SYNC_RETENTION_DAYS = 30
+# Format of the sync tokens (date of the last change seen by the client, in UTC)
+ICAL_SYNC_TOKEN_FORMAT = '%Y%m%dT%H%M%S%f'
+# Minutes subtracted from sync tokens: write dates are transaction start times, so changes committed after the client
+# synced can carry an older date (the events are sent again, clients replace them by UID)
+ICAL_SYNC_MARGIN_MINUTES = 5
+# Fields whose changes are announced to the participants
+NOTIFIED_FIELDS = ('name', 'event_type', 'description', 'start_datetime', 'end_datetime', 'user_ids')
+# Default number of minutes update notifications of an event are merged over
+DEFAULT_UPDATE_WINDOW = 10
+
+
+# Escape a text value of an iCalendar property; line breaks typed in the web client (CRLF or CR) become \n
+def _ical_escape(value):
+    value = (value or '').replace('\r\n', '\n').replace('\r', '\n')
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+# Format a UTC datetime as an iCalendar date-time
+def _ical_datetime(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+# Fold an iCalendar content line to 75 octets and terminate it
+def _ical_line(line):
+    encoded = line.encode()
+    chunks = []
+    while len(encoded) > 75:
+        cut = 75 if not chunks else 74
+        # Do not split multi-byte characters
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut])
+        encoded = encoded[cut:]
+    chunks.append(encoded)
+    return b'\r\n '.join(chunks) + b'\r\n'
+
 
 class StudentCalendarEvent(models.Model):
     _name = 'student.calendar.event'
@@ -78,48 +120,65 @@ class StudentCalendarEvent(models.Model):
     can_edit = fields.Boolean(string="Can Edit", compute="_compute_can_edit", store=False, depends=['creator_id'])
 
     # Optional discussion channel attached to the event
-    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', readonly=True, copy=False)
+    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', compute='_compute_channel_id')
+
+    # Resolve the discussion channels of all records through the channel registry at once
+    def _compute_channel_id(self):
+        channels = self.env['student.channel.registry'].resolve_channels('calendar_event', self.ids)
+        for record in self:
+            record.channel_id = channels.get(record.id, False)
 
     # Prevent duplicate notifications
     creation_notification_sent = fields.Boolean(string='Creation Notification Sent', readonly=True, default=False)
 
+    # Changes waiting to be announced: fields changed since the last notification and date of the last change
+    pending_update_fields = fields.Char('Pending Update Fields', readonly=True)
+    pending_update_date = fields.Datetime('Last Pending Update', readonly=True, index='btree_not_null')
+
     # Determine edit rights for the current user
     def _compute_can_edit(self):
+        roles = self.env['student.role.context'].get()
         for record in self:
             record.can_edit = (
                 record.creator_id == self.env.user or
-                self.env.user.has_group('student.group_manager') or
-                self.env.user.has_group('student.group_administrator')
+                roles.is_manager or
+                roles.is_administrator
             )
 
-    # Override create to notify users when the event is created
-    @api.model
-    def create(self, vals):
-        record = super().create(vals)
-        record._notify_target_users(is_update=False)
-        return record
+    # Override create to notify users when the events are created
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._notify_target_users(is_update=False)
+        return records
 
-    # Override write to restrict editing to creator/admins and send update notifications
+    # Override write to restrict editing to creator/admins and queue update notifications
     def write(self, vals):
+        roles = self.env['student.role.context'].get()
         for rec in self:
-            if rec.creator_id != self.env.user and not (
-                self.env.user.has_group('student.group_manager') or
-                self.env.user.has_group('student.group_administrator')
-            ):
+            if rec.creator_id != self.env.user and not (roles.is_manager or roles.is_administrator):
                 raise AccessError("You can only edit your own events or have manager rights.")
 
-            if rec.creation_notification_sent:
-                rec._notify_target_users(is_update=True)
-        return super().write(vals)
+        # Values of the announced fields before the write, to detect the actual changes
+        notified_fields = [name for name in NOTIFIED_FIELDS if name in vals]
+        previous = {rec.id: rec._notified_values(notified_fields) for rec in self} if notified_fields else {}
+
+        previous_users = {rec.id: rec.user_ids for rec in self} if 'user_ids' in vals else None
+        res = super().write(vals)
+        if previous_users is not None:
+            self._log_feed_removals({rec: previous_users[rec.id] - rec.user_ids for rec in self})
+
+        if notified_fields:
+            self._queue_update_notifications(previous, notified_fields)
+        return res
 
     # Override unlink to enforce deletion rights
     def unlink(self):
+        roles = self.env['student.role.context'].get()
         for rec in self:
-            if rec.creator_id != self.env.user and not (
-                self.env.user.has_group('student.group_manager') or
-                self.env.user.has_group('student.group_administrator')
-            ):
+            if rec.creator_id != self.env.user and not (roles.is_manager or roles.is_administrator):
                 raise AccessError("You can only delete your own events or have manager rights.")
+        self._log_feed_removals({rec: rec.user_ids for rec in self})
         return super().unlink()
 
     # Notify users via email and discuss messages
@@ -138,16 +197,20 @@ class StudentCalendarEvent(models.Model):
                 )
 
                 if is_update:
-                    # Post update message to existing channel
-                    channel = event.channel_id
+                    # Post update message to existing channel, with the final values of the changed fields
+                    event.env['student.utils'].send_message(
+                        'calendar_event',
+                        message_text + event._update_summary(),
+                        users,
+                        event.creator_id,
+                        (str(event.id), str(event.name))
+                    )
                 else:
                     # Send email to users using email template
                     subtype_id = self.env.ref('student.student_message_subtype_email')
                     template = self.env.ref('student.email_template_calendar_event_created')
-                    template.send_mail(self.id,
-                                       email_values={'email_to': ','.join(users.mapped('email')),
-                                                     'subtype_id': subtype_id.id},
-                                       force_send=True)
+                    self.env['student.utils'].notify_users(template, event, users, 'New calendar event',
+                                                           email_values={'subtype_id': subtype_id.id})
 
                     # Send internal discuss message
                     event.env['student.utils'].send_message(
@@ -158,18 +221,234 @@ class StudentCalendarEvent(models.Model):
                         (str(event.id), str(event.name))
                     )
 
-                    # Link or create discuss channel
-                    channel = event.env['discuss.channel'].sudo().search([
-                        ('name', '=', f"Calendar Event №{event.id} ({event.name})")
-                    ], limit=1)
-                    event.channel_id = channel
-
                     event.creation_notification_sent = True
 
-                if is_update:
-                    channel.sudo().message_post(
-                        body=message_text,
-                        author_id=event.creator_id.partner_id.id,
-                        message_type="comment",
-                        subtype_xmlid='mail.mt_comment'
-                    )
+    # === UPDATE NOTIFICATIONS ===
+    # Updates are not announced on every write: the changed fields are collected on the event, and a scheduled job
+    # posts one message per event once it has not changed for the update window (so only committed changes are sent).
+
+    # Comparable values of the given announced fields
+    def _notified_values(self, field_names):
+        self.ensure_one()
+        return {name: set(self[name].ids) if name == 'user_ids' else self[name] for name in field_names}
+
+    # Record the fields that really changed on the events whose creation was announced, and schedule the notifications
+    def _queue_update_notifications(self, previous, field_names):
+        now = fields.Datetime.now()
+        pending = {}
+        for rec in self.filtered('creation_notification_sent'):
+            current = rec._notified_values(field_names)
+            changed = {name for name in field_names if current[name] != previous[rec.id][name]}
+            if changed:
+                changed |= set((rec.pending_update_fields or '').split(',')) - {''}
+                pending.setdefault(','.join(sorted(changed)), []).append(rec.id)
+        if not pending:
+            return
+
+        for changed, ids in pending.items():
+            super(StudentCalendarEvent, self.browse(ids)).write({
+                'pending_update_fields': changed,
+                'pending_update_date': now,
+            })
+        window = self._update_window()
+        self.env.ref('student.ir_cron_send_calendar_updates')._trigger(at=now + timedelta(minutes=window))
+
+    @api.model
+    def _update_window(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('student.calendar_update_window', DEFAULT_UPDATE_WINDOW))
+
+    # Describe the final values of the changed fields
+    def _update_summary(self):
+        self.ensure_one()
+        items = []
+        for name in (self.pending_update_fields or '').split(','):
+            if name not in self._fields:
+                continue
+            field = self._fields[name]
+            if name == 'user_ids':
+                value = ', '.join(self.user_ids.mapped('name'))
+            elif field.type == 'datetime' and self[name]:
+                value = fields.Datetime.context_timestamp(self.with_context(tz=self.creator_id.tz), self[name]).strftime('%Y-%m-%d %H:%M')
+            elif field.type == 'selection':
+                value = dict(field._description_selection(self.env)).get(self[name], '')
+            else:
+                value = self[name] or ''
+            items.append(f'<li>{escape(field.string)}: {escape(value)}</li>')
+        return Markup(f'<ul>{"".join(items)}</ul>') if items else Markup()
+
+    # Scheduled job: announce the updates of the events that have not changed for the update window
+    @api.model
+    def _cron_send_update_notifications(self):
+        limit_date = fields.Datetime.now() - timedelta(minutes=self._update_window())
+        events = self.sudo().search([('pending_update_date', '!=', False), ('pending_update_date', '<=', limit_date)])
+        for event in events:
+            event._notify_target_users(is_update=True)
+        super(StudentCalendarEvent, events).write({'pending_update_fields': False, 'pending_update_date': False})
+
+    # === ICALENDAR FEED ===
+
+    # Record the participants who lost the events, so incremental feeds can cancel them: {event: users}
+    def _log_feed_removals(self, removed_users):
+        self.env['student.calendar.event.removal'].sudo().create([{
+            'event_id': event.id,
+            'user_id': user.id,
+            'start_datetime': event.start_datetime,
+        } for event, users in removed_users.items() for user in users])
+
+    # Record the removals of the events deleted with their related records (the foreign keys cascade in the database,
+    # bypassing unlink), called by the related models before their deletion
+    @api.model
+    def _log_cascade_removals(self, field_name, records):
+        events = self.sudo().search([(field_name, 'in', records.ids)])
+        events._log_feed_removals({event: event.user_ids for event in events})
+
+    # Return the ETag and last modification date of the feed of a user, from aggregates over the user's events
+    @api.model
+    def _ical_feed_state(self, user):
+        self.flush_model()
+        self.env['student.calendar.event.removal'].flush_model()
+        self.env.cr.execute("""
+            SELECT COUNT(event.id), MAX(event.write_date)
+              FROM student_calendar_event event
+              JOIN student_calendar_event_user_rel rel ON rel.event_id = event.id
+             WHERE rel.user_id = %s
+        """, (user.id,))
+        event_count, last_event = self.env.cr.fetchone()
+        self.env.cr.execute("""
+            SELECT COUNT(*), MAX(create_date)
+              FROM student_calendar_event_removal
+             WHERE user_id = %s
+        """, (user.id,))
+        removal_count, last_removal = self.env.cr.fetchone()
+
+        last_modified = max(filter(None, [last_event, last_removal]), default=None)
+        etag = f'{user.id}-{event_count}-{removal_count}-{self._ical_sync_token(last_modified)}'
+        return etag, last_modified
+
+    # Sync tokens hold the last change seen by the client
+    @api.model
+    def _ical_sync_token(self, last_modified):
+        return last_modified.strftime(ICAL_SYNC_TOKEN_FORMAT) if last_modified else '0'
+
+    # Return the date of a sync token, or None when the full feed has to be sent
+    @api.model
+    def _ical_parse_sync_token(self, sync_token):
+        try:
+            since = datetime.strptime(sync_token or '', ICAL_SYNC_TOKEN_FORMAT)
+        except ValueError:
+            return None
+        if since < fields.Datetime.now() - timedelta(days=ICAL_SYNC_RETENTION_DAYS):
+            return None
+        return since
+
+    # Yield the encoded lines of the iCalendar feed of a user, reading the events in batches.
+    # With a date, only the events changed since then are included, and the events the user lost are cancelled.
+    @api.model
+    def _ical_feed(self, user_id, since=None):
+        for line in ('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//PaLMS//Calendar Feed//EN',
+                     'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', 'X-WR-CALNAME:PaLMS'):
+            yield _ical_line(line)
+
+        domain = [('user_ids', 'in', [user_id])]
+        if since:
+            since -= timedelta(minutes=ICAL_SYNC_MARGIN_MINUTES)
+            domain.append(('write_date', '>', since))
+        labels = dict(self._fields['event_type']._description_selection(self.env))
+
+        last_id = 0
+        while True:
+            events = self.search_fetch(domain + [('id', '>', last_id)],
+                                       ['name', 'event_type', 'description', 'start_datetime', 'end_datetime', 'write_date'],
+                                       order='id', limit=ICAL_BATCH_SIZE)
+            if not events:
+                break
+            for event in events:
+                for line in event._ical_event_lines(labels):
+                    yield _ical_line(line)
+            last_id = events[-1].id
+            # Keep the memory bounded on large feeds
+            self.env.invalidate_all()
+
+        if since:
+            removals = self.env['student.calendar.event.removal'].search_fetch(
+                [('user_id', '=', user_id), ('create_date', '>', since)], ['event_id', 'start_datetime', 'create_date'])
+            # Events the user got back since then were sent above
+            current_ids = set(self.search([('id', 'in', removals.mapped('event_id')), ('user_ids', 'in', [user_id])]).ids)
+            for removal in removals.filtered(lambda r: r.event_id not in current_ids):
+                for line in ('BEGIN:VEVENT',
+                             f'UID:palms-calendar-event-{removal.event_id}',
+                             f'DTSTAMP:{_ical_datetime(removal.create_date)}',
+                             f'DTSTART:{_ical_datetime(removal.start_datetime or removal.create_date)}',
+                             'STATUS:CANCELLED',
+                             'END:VEVENT'):
+                    yield _ical_line(line)
+
+        yield _ical_line('END:VCALENDAR')
+
+    def _ical_event_lines(self, labels):
+        self.ensure_one()
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:palms-calendar-event-{self.id}',
+            f'DTSTAMP:{_ical_datetime(self.write_date)}',
+            f'LAST-MODIFIED:{_ical_datetime(self.write_date)}',
+            f'DTSTART:{_ical_datetime(self.start_datetime)}',
+            f'DTEND:{_ical_datetime(self.end_datetime or self.start_datetime)}',
+            f'SUMMARY:{_ical_escape(self.name)}',
+            f'CATEGORIES:{_ical_escape(labels.get(self.event_type))}',
+        ]
+        if self.description:
+            lines.append(f'DESCRIPTION:{_ical_escape(self.description)}')
+        lines.append('END:VEVENT')
+        return lines
+
+    # Scheduled job: remove the removals older than the sync token retention
+    @api.model
+    def _cron_clean_feed_removals(self):
+        limit_date = fields.Datetime.now() - timedelta(days=ICAL_SYNC_RETENTION_DAYS)
+        self.env['student.calendar.event.removal'].sudo().search([('create_date', '<', limit_date)]).unlink()
+
+
+class StudentCalendarEventRemoval(models.Model):
+    _name = 'student.calendar.event.removal'
+    _description = 'PaLMS - Calendar Event Removals'
+    _order = 'create_date, id'
+
+    # Removed event (kept as an ID since the event may be deleted) and the participant who lost it
+    event_id = fields.Integer('Event ID', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Participant', required=True, readonly=True, index=True, ondelete='cascade')
+    start_datetime = fields.Datetime('Start Time', readonly=True)
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # Secret token of the personal iCalendar feed of the user
+    calendar_feed_token = fields.Char('Calendar Feed Token', copy=False, index='btree_not_null', groups='base.group_system')
+    # Address of the feed, only shown to the user
+    calendar_feed_url = fields.Char('Calendar Feed', compute='_compute_calendar_feed_url')
+
+    def _compute_calendar_feed_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        for user in self:
+            token = user.sudo().calendar_feed_token
+            visible = user == self.env.user or self.env.is_system()
+            user.calendar_feed_url = f'{base_url}/student/calendar/{token}.ics' if token and visible else False
+
+    @property
+    def SELF_READABLE_FIELDS(self):
+        return super().SELF_READABLE_FIELDS + ['calendar_feed_url']
+
+    # Button action to create (or replace a leaked) calendar feed address
+    def action_reset_calendar_feed_token(self):
+        for user in self:
+            if user != self.env.user and not self.env.is_system():
+                raise AccessError("You can only reset your own calendar feed.")
+            user.sudo().calendar_feed_token = secrets.token_urlsafe(32)
+
+    # Return the active user owning a calendar feed token (empty recordset if none)
+    @api.model
+    def _get_calendar_feed_user(self, token):
+        if not token:
+            return self.browse()
+        return self.sudo().search([('calendar_feed_token', '=', token)], limit=1)
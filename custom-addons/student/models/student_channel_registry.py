@@ -0,0 +1,50 @@
+# This module defines the Discuss channel registry of PaLMS.
+# Each notification source record (project, application, milestone, ...) is mapped to its Discuss channel
+# through a unique (source, res_model, res_id) key, so channels are resolved without searching them by name.
+
+from odoo import api, fields, models
+
+from .student_utils import CHANNEL_SOURCES
+
+
+class ChannelRegistry(models.Model):
+    _name = 'student.channel.registry'
+    _description = 'PaLMS - Discuss Channel Registry'
+
+    # Notification source type (see CHANNEL_SOURCES in student_utils)
+    source = fields.Char('Source', required=True, readonly=True)
+    # Model and ID of the record the channel belongs to
+    res_model = fields.Char('Related Model', required=True, readonly=True)
+    res_id = fields.Integer('Related Record ID', required=True, readonly=True)
+    # Channel used for the notifications of the record
+    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', required=True, readonly=True, ondelete='cascade')
+
+    # The unique constraint also provides the lookup index
+    _sql_constraints = [
+        ('unique_key', 'UNIQUE(source, res_model, res_id)', 'A record can only be linked to one channel per source.')
+    ]
+
+    # Return the channel registered for a single record (empty recordset if none)
+    @api.model
+    def get_channel(self, source, res_id):
+        return self.resolve_channels(source, [res_id]).get(res_id, self.env['discuss.channel'])
+
+    # Return a {res_id: channel} dictionary for many records of the same source with a single query
+    @api.model
+    def resolve_channels(self, source, res_ids):
+        entries = self.sudo().search_fetch([
+            ('source', '=', source),
+            ('res_model', '=', CHANNEL_SOURCES[source][0]),
+            ('res_id', 'in', list(res_ids))
+        ], ['res_id', 'channel_id'])
+        return {entry.res_id: entry.channel_id for entry in entries}
+
+    # Register the channel of a record
+    @api.model
+    def register_channel(self, source, res_id, channel):
+        return self.sudo().create({
+            'source': source,
+            'res_model': CHANNEL_SOURCES[source][0],
+            'res_id': res_id,
+            'channel_id': channel.id,
+        })
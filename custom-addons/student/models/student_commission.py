@@ -8,7 +8,9 @@ from odoo.exceptions import ValidationError, UserError
 class Commission(models.Model):
     _name = "student.commission"
     _description = "PaLMS - Commissions"
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('additional_files',)
 
     viewer_member = fields.Boolean(string="The viewing user is a commission member (TECHNICAL)", compute="_compute_viewer_member")
     def _compute_viewer_member(self):
@@ -20,7 +22,7 @@ class Commission(models.Model):
 
 	# Assigns the faculty of the manager creating this commission
     def _default_faculty(self):
-        manager = self.env['student.manager'].sudo().search([('manager_account.id', '=', self.env.uid)], limit=1)
+        manager = self.env['student.role.context'].get().manager
         if manager:
             return manager.manager_faculty
         else:
@@ -30,74 +32,100 @@ class Commission(models.Model):
 
     def action_view_commission_lock(self):
         if not self.lock:
-            self.lock = True
-
-            for professor in self.professor_ids:
-                professor.compute_number_of_commissions()
-
-            for defense in self.defense_ids:
-                # Set defense project commissions
-                defense.project_id.commission_id = self.id
-                defense.show_grades = True
-
-                # Create grading entries
-                for professor in self.professor_ids:
-                    if not self.env['student.grade'].sudo().search([('project_id', '=', defense.project_id.id), ('grading_professor', '=', professor.id)]):
-                        member_grade = self.env['student.grade'].sudo().create({
-                            'project_id': defense.project_id.id,
-                            'grading_professor': professor.id
-                        }).id
-
-                        defense.member_grades = [(4, member_grade)]
-
-            poll_option_model = self.env['poll.option'].sudo()
-            poll_model = self.env['poll.poll'].sudo()
-
-            poll_options = poll_option_model.search([('commission_id', '=', self.id)])
-            poll_ids_to_delete = poll_options.mapped('poll_id').ids
-
-            if poll_ids_to_delete:
-                polls_to_delete = poll_model.browse(poll_ids_to_delete)
-                polls_to_delete.unlink()
-
-            # Create calendar event for the commission
-            self.env['student.calendar.event'].sudo().create({
-                'name': f'Commission: {self.name}',
-                'event_type': 'commission',
-                'start_datetime': self.meeting_date,
-                'end_datetime': self.meeting_date,
-                'commission_id': self.id,
-                'user_ids': [(6, 0, list(
-                    set(self.professor_ids.mapped('professor_account.id')) |
-                    set(self.defense_ids.mapped('project_student.student_account.id'))
-                ))],
-                'creator_id': self.env.user.id
-            })
+            self._lock_commissions()
+        else:
+            self._unlock_commissions()
+
+    # List view action: set all selected commissions at once
+    def action_lock_commissions(self):
+        self.filtered(lambda c: not c.lock)._lock_commissions()
 
+    # Set the commissions in bulk: grading entries are created with one multi-create for all defenses
+    # and membership counters are recomputed with one grouped query
+    def _lock_commissions(self):
+        if not self:
+            return
+        self.write({'lock': True})
+        self.professor_ids.compute_number_of_commissions()
+
+        # Set defense project commissions
+        for commission in self:
+            commission.defense_ids.project_id.write({'commission_id': commission.id})
+        self.defense_ids.write({'show_grades': True})
+
+        # Find the grading entries that already exist for the defended projects with a single query
+        Grade = self.env['student.grade'].sudo()
+        existing_grades = Grade.search_fetch([
+            ('project_id', 'in', self.defense_ids.project_id.ids),
+            ('grading_professor', 'in', self.professor_ids.ids)
+        ], ['project_id', 'grading_professor'])
+        existing_pairs = {(grade.project_id.id, grade.grading_professor.id) for grade in existing_grades}
+
+        # Create the missing grading entries
+        missing = []
+        for commission in self:
+            for defense in commission.defense_ids:
+                for professor in commission.professor_ids:
+                    if (defense.project_id.id, professor.id) not in existing_pairs:
+                        missing.append((commission, defense, professor))
+                        existing_pairs.add((defense.project_id.id, professor.id))
+        grades = Grade.create([{
+            'project_id': defense.project_id.id,
+            'grading_professor': professor.id
+        } for _commission, defense, professor in missing])
+
+        # Link the new entries to their defenses with one write per commission
+        grades_by_defense = {}
+        for (commission, defense, _professor), grade in zip(missing, grades):
+            grades_by_defense.setdefault(commission, {}).setdefault(defense.id, []).append(grade.id)
+        for commission, defenses in grades_by_defense.items():
+            commission.write({'defense_ids': [
+                (1, defense_id, {'member_grades': [(4, grade_id) for grade_id in grade_ids]})
+                for defense_id, grade_ids in defenses.items()
+            ]})
+
+        # Remove the scheduling polls of the commissions
+        poll_options = self.env['poll.option'].sudo().search([('commission_id', 'in', self.ids)])
+        poll_options.poll_id.unlink()
+
+        # Create calendar events for the commissions
+        self.env['student.calendar.event'].sudo().create([{
+            'name': f'Commission: {commission.name}',
+            'event_type': 'commission',
+            'start_datetime': commission.meeting_date,
+            'end_datetime': commission.meeting_date,
+            'commission_id': commission.id,
+            'user_ids': [(6, 0, list(
+                set(commission.professor_ids.mapped('professor_account.id')) |
+                set(commission.defense_ids.mapped('project_student.student_account.id'))
+            ))],
+            'creator_id': self.env.user.id
+        } for commission in self])
+
+        subtype_id = self.env.ref('student.student_message_subtype_email')
+        template = self.env.ref('student.email_template_commission_set')
+        for commission in self:
             # Log the action --------------------
-            body = _('The commission №' + str(self.commission_number) + ' is set. Commission members are free to grade projects after the defense presentations.')
-            self.message_post(body=body)
+            body = _('The commission №' + str(commission.commission_number) + ' is set. Commission members are free to grade projects after the defense presentations.')
+            commission.message_post(body=body)
 
             # Send the email --------------------
-            subtype_id = self.env.ref('student.student_message_subtype_email')
-            template = self.env.ref('student.email_template_commission_set')
-            template.send_mail(self.id,
-                               email_values={'email_to': ','.join([professor.professor_account.email for professor in self.professor_ids]),
-                                             'subtype_id': subtype_id.id},
-                               force_send=True)
-        else:
-            self.lock = False
-            for defense in self.defense_ids:
-                defense.project_id.commission_id = False
+            self.env['student.utils'].queue_mail(template, commission.id,
+                                                 email_values={'email_to': ','.join([professor.professor_account.email for professor in commission.professor_ids]),
+                                                               'subtype_id': subtype_id.id})
+
+    def _unlock_commissions(self):
+        self.write({'lock': False})
+        self.defense_ids.project_id.write({'commission_id': False})
 
-            # Delete related calendar event
-            event = self.env['student.calendar.event'].sudo().search([('commission_id', '=', self.id)], limit=1)
-            if event:
-                event.unlink()
+        # Delete related calendar events
+        events = self.env['student.calendar.event'].sudo().search([('commission_id', 'in', self.ids)])
+        events.unlink()
 
+        for commission in self:
             # Log the action --------------------
-            body = _('The commission №' + str(self.commission_number) + ' is unset.')
-            self.message_post(body=body)
+            body = _('The commission №' + str(commission.commission_number) + ' is unset.')
+            commission.message_post(body=body)
 
     commission_number = fields.Integer(string='Commission Number', default=lambda self: len(self.env['student.commission'].sudo().search([]))+1, readonly=True)
     commission_faculty = fields.Many2one('student.faculty', default=_default_faculty, string='Faculty', required=True)
@@ -107,12 +135,6 @@ class Commission(models.Model):
     professor_ids = fields.Many2many('student.professor', string='Commission Members', required=True)
     additional_files = fields.Many2many(comodel_name="ir.attachment", string="Additional Files")
 
-    @api.onchange("additional_files")
-    def _update_additional_ownership(self):
-        # Makes the files public, may implement user-specific ownership in the future
-        for attachment in self.additional_files:
-            attachment.write({'public': True})
-
     @api.depends('commission_faculty')
     def _compute_commission_name(self):
         self.name = self.commission_faculty.name + " - Commission №" + str(self.commission_number)
@@ -123,17 +145,6 @@ class Commission(models.Model):
     meeting_date = fields.Datetime('Date & Time', required=True)
     meeting_other_details = fields.Text('Other Details')
 
-    @api.model
-    def create(self, vals):
-        record = super().create(vals)
-        record._make_attachments_public()
-        return record
-
-    def _make_attachments_public(self):
-        for commission in self:
-            for attachment in commission.additional_files:
-                attachment.write({'public': True})
-
     def unlink(self):
         for record in self:
             if not record.env.user.has_group('student.group_administrator'):
@@ -144,6 +155,7 @@ class Commission(models.Model):
 
             record.defense_ids.unlink()
 
+        self.env['student.calendar.event']._log_cascade_removals('commission_id', self)
         return super(Commission, self).unlink()
 
     @api.onchange("commission_head")
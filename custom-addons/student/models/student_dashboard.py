@@ -1,11 +1,25 @@
 # This model provides a user interface for dynamically generating grouped graph views for administrative dashboards in PaLMS.
+# By default the dashboards read the pre-aggregated KPI snapshots (see student_kpi); live graphs over the models remain available.
 
 from odoo import fields, models, api
+from odoo.exceptions import UserError
+
+from .student_kpi import KPI_PARTITIONS
 
 class Dashboard(models.TransientModel):
     _name = 'student.dashboard'
     _description = 'PaLMS - Dashboards'
 
+    # Source of the dashboard: materialized KPI snapshots or live data of a model
+    mode = fields.Selection([
+        ('snapshot', 'KPI Snapshots'),
+        ('live', 'Live Data')
+    ], string='Source', default='snapshot', required=True)
+
+    # KPI displayed in snapshot mode, with the date its snapshots were computed
+    kpi_id = fields.Many2one('student.kpi', string='KPI')
+    kpi_last_refresh = fields.Datetime(related='kpi_id.last_refresh', string='Last Refresh')
+
     # Selectable model from which to pull data for graphing
     model_name = fields.Selection([
         ('student.announcement', 'Announcements'),
@@ -39,7 +53,7 @@ class Dashboard(models.TransientModel):
         ('poll.poll', 'Poll'),
         ('poll.option', 'Poll Options'),
         ('poll.vote', 'Poll Votes'),
-    ], string='Model', required=True)
+    ], string='Model')
 
     # Field used to group data in the graph view
     group_by_field_id = fields.Many2one(
@@ -50,6 +64,8 @@ class Dashboard(models.TransientModel):
 
     # Opens a graph view of the selected model grouped by the chosen field
     def action_open_graph(self):
+        if not self.model_name:
+            raise UserError("Please select a model.")
         context = {}
         if self.group_by_field_id:
             context['graph_groupbys'] = [self.group_by_field_id.name]
@@ -62,6 +78,26 @@ class Dashboard(models.TransientModel):
             'context': context,
         }
 
+    # Opens the snapshots of the selected KPI, grouped by their partition and category
+    def action_open_kpi(self):
+        kpi = self.kpi_id
+        if not kpi:
+            raise UserError("Please select a KPI.")
+        refresh_date = fields.Datetime.to_string(fields.Datetime.context_timestamp(self, kpi.last_refresh)) if kpi.last_refresh else 'never'
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'{kpi.name} (refreshed: {refresh_date})',
+            'res_model': 'student.kpi.snapshot',
+            'view_mode': 'graph,pivot,list',
+            'domain': [('kpi_id', '=', kpi.id)],
+            'context': {'graph_groupbys': [KPI_PARTITIONS[kpi.code], 'label']},
+        }
+
+    # Refreshes the changed partitions of the selected KPI and opens it
+    def action_refresh_kpi(self):
+        self.kpi_id._refresh()
+        return self.action_open_kpi()
+
     # When the model name is changed, reset the group_by field and update the domain
     @api.onchange('model_name')
     def _onchange_model_name(self):
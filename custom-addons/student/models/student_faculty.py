@@ -28,9 +28,10 @@ class Faculty(models.Model):
     program_ids = fields.One2many('student.program', 'program_faculty_id', string='Programs', readonly=True)
 
     @api.depends('program_ids')
-    @api.model
     def _compute_program_count(self):
-        self.program_number = len(self.program_ids)
+        counts = self.env['student.utils'].count_by('student.program', 'program_faculty_id', self._origin.ids)
+        for faculty in self:
+            faculty.program_number = counts.get(faculty._origin.id, 0)
 
     # Number of professors in the faculty (computed)
     professor_number = fields.Integer(string='Number of Professors', compute='_compute_professor_count', store=True, readonly=True)
@@ -39,9 +40,10 @@ class Faculty(models.Model):
     professor_ids = fields.One2many('student.professor', 'professor_faculty', string='Professors', readonly=True)
 
     @api.depends('professor_ids')
-    @api.model
     def _compute_professor_count(self):
-        self.professor_number = len(self.professor_ids)
+        counts = self.env['student.utils'].count_by('student.professor', 'professor_faculty', self._origin.ids)
+        for faculty in self:
+            faculty.professor_number = counts.get(faculty._origin.id, 0)
 
     # Number of managers in the faculty (computed)
     manager_number = fields.Integer(string='Number of Managers', compute='_compute_manager_count', store=True, readonly=True)
@@ -50,9 +52,10 @@ class Faculty(models.Model):
     manager_ids = fields.One2many('student.manager', "manager_faculty", string='Program Managers', readonly=True)
 
     @api.depends('manager_ids')
-    @api.model
     def _compute_manager_count(self):
-        self.manager_number = len(self.manager_ids)
+        counts = self.env['student.utils'].count_by('student.manager', 'manager_faculty', self._origin.ids)
+        for faculty in self:
+            faculty.manager_number = counts.get(faculty._origin.id, 0)
 
     # Number of supervisors in the faculty (computed)
     supervisor_number = fields.Integer(string='Number of Supervisors', compute='_compute_supervisor_count', store=True, readonly=True)
@@ -61,9 +64,10 @@ class Faculty(models.Model):
     supervisor_ids = fields.One2many('student.supervisor', 'supervisor_faculty', string='Supervisors', readonly=True)
 
     @api.depends('supervisor_ids')
-    @api.model
     def _compute_supervisor_count(self):
-        self.supervisor_number = len(self.supervisor_ids)
+        counts = self.env['student.utils'].count_by('student.supervisor', 'supervisor_faculty', self._origin.ids)
+        for faculty in self:
+            faculty.supervisor_number = counts.get(faculty._origin.id, 0)
 
     # Number of students in the faculty (computed)
     student_number = fields.Integer(string='Number of Students', compute='_compute_student_count', store=True, readonly=True)
@@ -72,9 +76,10 @@ class Faculty(models.Model):
     student_ids = fields.One2many('student.student', 'student_faculty', string='Students', readonly=True)
 
     @api.depends('student_ids')
-    @api.model
     def _compute_student_count(self):
-        self.student_number = len(self.student_ids)
+        counts = self.env['student.utils'].count_by('student.student', 'student_faculty', self._origin.ids)
+        for faculty in self:
+            faculty.student_number = counts.get(faculty._origin.id, 0)
 
     # Number of published projects associated with this faculty (computed)
     project_number = fields.Integer(string='Number of Projects', compute='_compute_project_count', store=True, readonly=True)
@@ -83,7 +88,9 @@ class Faculty(models.Model):
     project_ids = fields.Many2many('student.project', string='Faculty Projects', readonly=True,
                                    domain=[('state_publication','!=','ineligible')])
 
-    @api.depends('project_ids')
-    @api.model
+    @api.depends('project_ids', 'project_ids.state_publication')
     def _compute_project_count(self):
-        self.project_number = len(self.project_ids)
\ No newline at end of file
+        counts = self.env['student.utils'].count_by('student.project', 'faculty_id', self._origin.ids,
+                                                    [('state_publication', '!=', 'ineligible')])
+        for faculty in self:
+            faculty.project_number = counts.get(faculty._origin.id, 0)
@@ -0,0 +1,231 @@
+# This module defines the action instrumentation of PaLMS.
+# Every button action (action_*) and scheduled job (_cron_*) defined by the student and poll addons is wrapped
+# when the registry is loaded. Each call records its SQL queries and time, its Python time, and the emails and
+# Discuss channels it notified. Calls are kept for a rolling week and aggregated hourly into per-action
+# statistics (p50/p95), and calls slower than a configurable threshold are kept in a slow-call log.
+
+import functools
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Addons whose entry points are instrumented
+INSTRUMENTED_MODULES = ('student', 'poll')
+# Prefixes of the instrumented methods: button actions and scheduled jobs
+INSTRUMENTED_PREFIXES = ('action_', '_cron_')
+# Days of calls the statistics are computed on, and days the slow calls are kept
+ACTION_STATS_DAYS = 7
+SLOW_CALL_DAYS = 30
+# Default duration (ms) above which a call is logged as slow
+DEFAULT_SLOW_THRESHOLD = 2000
+
+# Counters of the entry point running in the current thread; nested entry points are counted in the outer one
+_running = threading.local()
+
+
+# Count emails queued by the running entry point
+def count_mails(count=1):
+    call = getattr(_running, 'call', None)
+    if call is not None:
+        call['mails'] += count
+
+
+# Count a Discuss channel (identified by its notification source and record) notified by the running entry point
+def touch_channel(source, res_id):
+    call = getattr(_running, 'call', None)
+    if call is not None:
+        call['channels'].add((source, str(res_id)))
+
+
+# Wrap an entry point so its calls are measured and recorded
+def _instrument(method_name, origin):
+    @functools.wraps(origin)
+    def instrumented(self, *args, **kwargs):
+        if getattr(_running, 'call', None) is not None:
+            return origin(self, *args, **kwargs)
+
+        # The database layer counts the queries and their time on the thread
+        thread = threading.current_thread()
+        if not hasattr(thread, 'query_count'):
+            thread.query_count = 0
+            thread.query_time = 0
+        query_count, query_time = thread.query_count, thread.query_time
+        call = _running.call = {'mails': 0, 'channels': set()}
+        started = time.perf_counter()
+        try:
+            result = origin(self, *args, **kwargs)
+            # Pending writes belong to the call
+            self.env.flush_all()
+        finally:
+            _running.call = None
+
+        duration = (time.perf_counter() - started) * 1000.0
+        sql_time = (thread.query_time - query_time) * 1000.0
+        self.env['student.action.call']._record(self, method_name, {
+            'duration_ms': duration,
+            'sql_ms': sql_time,
+            'python_ms': max(duration - sql_time, 0.0),
+            'query_count': thread.query_count - query_count,
+            'mail_count': call['mails'],
+            'channel_count': len(call['channels']),
+        })
+        return result
+
+    instrumented._student_instrumented = True
+    return instrumented
+
+
+class ActionCall(models.Model):
+    _name = 'student.action.call'
+    _description = 'PaLMS - Action Calls'
+    _order = 'id desc'
+
+    # Instrumented entry point: model and method
+    model_name = fields.Char('Model', required=True, readonly=True, index=True)
+    method = fields.Char('Method', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True, ondelete='set null')
+
+    # Measures of the call
+    duration_ms = fields.Float('Duration (ms)', readonly=True)
+    sql_ms = fields.Float('SQL Time (ms)', readonly=True)
+    python_ms = fields.Float('Python Time (ms)', readonly=True)
+    query_count = fields.Integer('Queries', readonly=True)
+    mail_count = fields.Integer('Emails Queued', readonly=True)
+    channel_count = fields.Integer('Channels Notified', readonly=True)
+
+    # === REGISTRATION OF THE ENTRY POINTS ===
+
+    def _register_hook(self):
+        super()._register_hook()
+        count = 0
+        for ModelClass in self.env.registry.models.values():
+            for cls in ModelClass.__mro__:
+                if cls.__dict__.get('_module') not in INSTRUMENTED_MODULES:
+                    continue
+                for name, value in list(cls.__dict__.items()):
+                    if not name.startswith(INSTRUMENTED_PREFIXES) or not callable(value):
+                        continue
+                    method = getattr(ModelClass, name)
+                    if not getattr(method, '_student_instrumented', False):
+                        setattr(ModelClass, name, _instrument(name, method))
+                        count += 1
+        _logger.info("PaLMS instrumentation: %s entry points instrumented", count)
+
+    def _unregister_hook(self):
+        for ModelClass in self.env.registry.models.values():
+            for name, value in list(ModelClass.__dict__.items()):
+                if getattr(value, '_student_instrumented', False):
+                    delattr(ModelClass, name)
+        super()._unregister_hook()
+
+    # === RECORDING ===
+
+    # Record a call of an entry point, and log it as slow above the configured threshold.
+    # Instrumentation can be turned off with the student.action_instrumentation parameter.
+    @api.model
+    def _record(self, records, method, values):
+        if self.env.cr.readonly:
+            return
+        params = self.env['ir.config_parameter'].sudo()
+        if params.get_param('student.action_instrumentation', '1') in ('0', 'False'):
+            return
+
+        values.update({'model_name': records._name, 'method': method, 'user_id': self.env.uid})
+        self.sudo().create(values)
+        threshold = float(params.get_param('student.slow_action_threshold', DEFAULT_SLOW_THRESHOLD))
+        if values['duration_ms'] >= threshold:
+            self.env['student.action.slow'].sudo().create(dict(values, record_ids=','.join(map(str, records.ids))))
+            _logger.warning("PaLMS slow action: %s.%s took %.0f ms (%s queries)",
+                            records._name, method, values['duration_ms'], values['query_count'])
+
+    # Scheduled job: drop the calls outside the rolling window and aggregate the remaining ones per action
+    @api.model
+    def _cron_refresh_action_stats(self):
+        now = fields.Datetime.now()
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM student_action_call WHERE create_date < %s",
+                            (now - timedelta(days=ACTION_STATS_DAYS),))
+        self.env.cr.execute("DELETE FROM student_action_slow WHERE create_date < %s",
+                            (now - timedelta(days=SLOW_CALL_DAYS),))
+        self.env.cr.execute("DELETE FROM student_action_stat")
+        self.env.cr.execute("""
+            INSERT INTO student_action_stat (model_name, method, call_count, p50_ms, p95_ms, max_ms,
+                                             p50_query_count, p95_query_count, avg_sql_ms, avg_python_ms,
+                                             avg_mail_count, avg_channel_count, last_call,
+                                             create_uid, create_date, write_uid, write_date)
+                 SELECT model_name, method, COUNT(*),
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms),
+                        percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms),
+                        MAX(duration_ms),
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY query_count),
+                        percentile_cont(0.95) WITHIN GROUP (ORDER BY query_count),
+                        AVG(sql_ms), AVG(python_ms), AVG(mail_count), AVG(channel_count), MAX(create_date),
+                        %(uid)s, %(now)s, %(uid)s, %(now)s
+                   FROM student_action_call
+               GROUP BY model_name, method
+        """, {'uid': self.env.uid, 'now': now})
+        self.invalidate_model()
+        self.env['student.action.slow'].invalidate_model()
+        self.env['student.action.stat'].invalidate_model()
+
+
+class ActionStat(models.Model):
+    _name = 'student.action.stat'
+    _description = 'PaLMS - Action Statistics'
+    _order = 'p95_ms desc'
+
+    # Instrumented entry point: model and method
+    model_name = fields.Char('Model', readonly=True)
+    method = fields.Char('Method', readonly=True)
+
+    # Statistics of the calls of the rolling window (see ACTION_STATS_DAYS)
+    call_count = fields.Integer('Calls', readonly=True)
+    p50_ms = fields.Float('p50 (ms)', readonly=True, aggregator='max')
+    p95_ms = fields.Float('p95 (ms)', readonly=True, aggregator='max')
+    max_ms = fields.Float('Max (ms)', readonly=True, aggregator='max')
+    p50_query_count = fields.Float('p50 Queries', readonly=True, aggregator='max')
+    p95_query_count = fields.Float('p95 Queries', readonly=True, aggregator='max')
+    avg_sql_ms = fields.Float('Average SQL Time (ms)', readonly=True, aggregator='avg')
+    avg_python_ms = fields.Float('Average Python Time (ms)', readonly=True, aggregator='avg')
+    avg_mail_count = fields.Float('Average Emails Queued', readonly=True, aggregator='avg')
+    avg_channel_count = fields.Float('Average Channels Notified', readonly=True, aggregator='avg')
+    last_call = fields.Datetime('Last Call', readonly=True)
+
+    # Button action to recompute the statistics now
+    def action_refresh(self):
+        self.env['student.action.call']._cron_refresh_action_stats()
+
+
+class ActionSlowCall(models.Model):
+    _name = 'student.action.slow'
+    _description = 'PaLMS - Slow Action Calls'
+    _order = 'id desc'
+
+    # Instrumented entry point, records it was called on and user who called it
+    model_name = fields.Char('Model', readonly=True, index=True)
+    method = fields.Char('Method', readonly=True)
+    record_ids = fields.Char('Record IDs', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True, ondelete='set null')
+
+    # Measures of the call
+    duration_ms = fields.Float('Duration (ms)', readonly=True)
+    sql_ms = fields.Float('SQL Time (ms)', readonly=True)
+    python_ms = fields.Float('Python Time (ms)', readonly=True)
+    query_count = fields.Integer('Queries', readonly=True)
+    mail_count = fields.Integer('Emails Queued', readonly=True)
+    channel_count = fields.Integer('Channels Notified', readonly=True)
+
+
+class MailMail(models.Model):
+    _inherit = 'mail.mail'
+
+    # Emails created directly (not through the outbox) count for the running entry point
+    @api.model_create_multi
+    def create(self, vals_list):
+        count_mails(len(vals_list))
+        return super().create(vals_list)
@@ -0,0 +1,230 @@
+# This module defines the KPI snapshot engine of PaLMS.
+# Key indicators (projects per state, application response times, milestone submission rates and commission grades)
+# are materialized into snapshot rows by a scheduled job, so the dashboards read small pre-aggregated tables
+# instead of grouping the production tables on every click. Refreshes are incremental: only the programs,
+# milestones or faculties whose source records changed since the last refresh are recomputed.
+
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+# KPIs materialized by the engine: {code: field of the snapshot rows recomputed together on incremental refreshes}
+KPI_PARTITIONS = {
+    'project_state': 'program_id',
+    'application_response': 'program_id',
+    'milestone_submission': 'milestone_id',
+    'commission_grade': 'faculty_id',
+}
+# Hours after which the scheduled job rebuilds a KPI entirely (catches deleted source records)
+FULL_REFRESH_HOURS = 24
+
+
+class StudentKpi(models.Model):
+    _name = 'student.kpi'
+    _description = 'PaLMS - KPIs'
+    _order = 'sequence, id'
+
+    name = fields.Char('KPI', required=True, translate=True)
+    sequence = fields.Integer('Sequence', default=10)
+    # Indicator computed by the KPI (see KPI_PARTITIONS)
+    code = fields.Selection([
+        ('project_state', 'Projects per State'),
+        ('application_response', 'Application Response Times'),
+        ('milestone_submission', 'Milestone Submission Rates'),
+        ('commission_grade', 'Commission Grade Distribution')
+    ], string='Indicator', required=True, readonly=True)
+
+    # Refresh tracking
+    last_refresh = fields.Datetime('Last Refresh', readonly=True)
+    last_full_refresh = fields.Datetime('Last Full Refresh', readonly=True)
+    refresh_duration = fields.Float('Refresh Duration (ms)', readonly=True)
+
+    # Materialized rows of the KPI
+    snapshot_ids = fields.One2many('student.kpi.snapshot', 'kpi_id', string='Snapshots', readonly=True)
+    snapshot_count = fields.Integer('Number of Rows', compute='_compute_snapshot_count')
+
+    _sql_constraints = [
+        ('unique_code', 'UNIQUE(code)', 'Each indicator can only be defined once.')
+    ]
+
+    def _compute_snapshot_count(self):
+        counts = self.env['student.utils'].count_by('student.kpi.snapshot', 'kpi_id', self.ids)
+        for kpi in self:
+            kpi.snapshot_count = counts.get(kpi.id, 0)
+
+    # === REFRESH ===
+
+    # Button actions to refresh the KPIs from the dashboard or the KPI list
+    def action_refresh(self):
+        self._refresh()
+
+    def action_full_refresh(self):
+        self._refresh(full=True)
+
+    # Scheduled job: refresh all KPIs incrementally, and rebuild those not fully refreshed for a day
+    @api.model
+    def _cron_refresh_kpis(self):
+        limit_date = fields.Datetime.now() - timedelta(hours=FULL_REFRESH_HOURS)
+        kpis = self.sudo().search([])
+        stale = kpis.filtered(lambda kpi: not kpi.last_full_refresh or kpi.last_full_refresh < limit_date)
+        stale._refresh(full=True)
+        (kpis - stale)._refresh()
+
+    # Recompute the snapshot rows of the KPIs; incremental refreshes only replace the rows of the changed partitions
+    def _refresh(self, full=False):
+        Snapshot = self.env['student.kpi.snapshot'].sudo()
+        for kpi in self.sudo():
+            started = time.perf_counter()
+            # Source records written from now on are picked up by the next refresh
+            refresh_date = self.env.cr.now()
+            partition_field = KPI_PARTITIONS[kpi.code]
+
+            full_refresh = full or not kpi.last_refresh
+            partitions = None if full_refresh else getattr(kpi, f'_changed_{kpi.code}')(kpi.last_refresh)
+            if partitions is None or partitions:
+                rows = getattr(kpi, f'_compute_{kpi.code}')(partitions)
+                domain = [('kpi_id', '=', kpi.id)]
+                if partitions is not None:
+                    domain.append((partition_field, 'in', list(partitions)))
+                Snapshot.search(domain).unlink()
+                Snapshot.create([dict(row, kpi_id=kpi.id, refresh_date=refresh_date) for row in rows])
+
+            values = {
+                'last_refresh': refresh_date,
+                'refresh_duration': (time.perf_counter() - started) * 1000.0,
+            }
+            if full_refresh:
+                values['last_full_refresh'] = refresh_date
+            kpi.write(values)
+
+    # === PROJECTS PER STATE (per faculty and program) ===
+
+    def _changed_project_state(self, since):
+        projects = self.env['student.project'].sudo().search_fetch([('write_date', '>', since)], ['program_ids'])
+        return set(projects.program_ids.ids)
+
+    def _compute_project_state(self, program_ids):
+        Project = self.env['student.project'].sudo()
+        domain = [('program_ids', 'in', list(program_ids))] if program_ids is not None else []
+        labels = dict(Project._fields['state_publication']._description_selection(self.env))
+
+        rows = []
+        for program, state, count in Project._read_group(domain, ['program_ids', 'state_publication'], ['__count']):
+            if not program or (program_ids is not None and program.id not in program_ids):
+                continue
+            rows.append({
+                'faculty_id': program.program_faculty_id.id,
+                'program_id': program.id,
+                'label': labels.get(state, state),
+                'count': count,
+                'value': count,
+            })
+        return rows
+
+    # === APPLICATION RESPONSE TIMES (per program, in days) ===
+
+    def _changed_application_response(self, since):
+        applications = self.env['student.application'].sudo().search_fetch([('write_date', '>', since)], ['applicant'])
+        return set(applications.applicant.student_program.ids)
+
+    def _compute_application_response(self, program_ids):
+        domain = [('state', 'in', ('sent', 'accepted', 'rejected')), ('sent_date', '!=', False)]
+        if program_ids is not None:
+            domain.append(('applicant.student_program', 'in', list(program_ids)))
+        applications = self.env['student.application'].sudo().search_fetch(
+            domain, ['state', 'sent_date', 'response_date', 'applicant'])
+
+        # Answered applications: days until the response; waiting applications: days since they were sent
+        today = fields.Date.today()
+        buckets = {}
+        for application in applications:
+            program = application.applicant.student_program
+            if not program:
+                continue
+            answered = application.state != 'sent'
+            end_date = (application.response_date or today) if answered else today
+            days = buckets.setdefault((program, answered), [])
+            days.append((end_date - application.sent_date).days)
+
+        return [{
+            'faculty_id': program.program_faculty_id.id,
+            'program_id': program.id,
+            'label': 'Answered' if answered else 'Waiting',
+            'count': len(days),
+            'value': sum(days) / len(days),
+        } for (program, answered), days in buckets.items()]
+
+    # === MILESTONE SUBMISSION RATES (per milestone, in percent of the targeted projects) ===
+
+    def _changed_milestone_submission(self, since):
+        milestones = self.env['student.milestone'].sudo().search([('write_date', '>', since)])
+        results = self.env['student.milestone.result'].sudo().search_fetch([('write_date', '>', since)], ['milestone_id'])
+        return set(milestones.ids) | set(results.milestone_id.ids)
+
+    def _compute_milestone_submission(self, milestone_ids):
+        Milestone = self.env['student.milestone'].sudo()
+        milestones = Milestone.browse(list(milestone_ids)).exists() if milestone_ids is not None else Milestone.search([])
+        submitted = dict(self.env['student.milestone.result'].sudo()._read_group(
+            [('milestone_id', 'in', milestones.ids)], ['milestone_id'], ['student_project_id:count_distinct']))
+
+        rows = []
+        for milestone in milestones:
+            targeted = self.env['student.project'].sudo().search_count(milestone._fanout_project_domain())
+            count = submitted.get(milestone, 0)
+            rows.append({
+                'milestone_id': milestone.id,
+                'label': milestone.name,
+                'count': count,
+                'value': 100.0 * count / targeted if targeted else 0.0,
+            })
+        return rows
+
+    # === COMMISSION GRADE DISTRIBUTION (per faculty, in percent of the graded defenses) ===
+
+    def _changed_commission_grade(self, since):
+        defenses = self.env['student.defense'].sudo().search_fetch([('write_date', '>', since)], ['commission_id'])
+        return set(defenses.commission_id.commission_faculty.ids)
+
+    def _compute_commission_grade(self, faculty_ids):
+        domain = [('final_grade', '!=', False)]
+        if faculty_ids is not None:
+            domain.append(('commission_id.commission_faculty', 'in', list(faculty_ids)))
+        groups = self.env['student.defense'].sudo()._read_group(domain, ['commission_id', 'final_grade'], ['__count'])
+
+        # Merge the commissions of each faculty
+        counts = {}
+        for commission, grade, count in groups:
+            key = (commission.commission_faculty.id, grade)
+            counts[key] = counts.get(key, 0) + count
+        totals = {}
+        for (faculty_id, _grade), count in counts.items():
+            totals[faculty_id] = totals.get(faculty_id, 0) + count
+
+        return [{
+            'faculty_id': faculty_id,
+            'label': grade,
+            'count': count,
+            'value': 100.0 * count / totals[faculty_id],
+        } for (faculty_id, grade), count in counts.items()]
+
+
+class StudentKpiSnapshot(models.Model):
+    _name = 'student.kpi.snapshot'
+    _description = 'PaLMS - KPI Snapshots'
+    _order = 'kpi_id, faculty_id, program_id, milestone_id, label'
+
+    # KPI the row belongs to
+    kpi_id = fields.Many2one('student.kpi', string='KPI', required=True, readonly=True, index=True, ondelete='cascade')
+    # Dimensions of the row (only those relevant to the KPI are set)
+    faculty_id = fields.Many2one('student.faculty', string='Faculty', readonly=True, index=True, ondelete='cascade')
+    program_id = fields.Many2one('student.program', string='Program', readonly=True, index=True, ondelete='cascade')
+    milestone_id = fields.Many2one('student.milestone', string='Milestone', readonly=True, index=True, ondelete='cascade')
+    # Category of the row: project state, answered/waiting applications, milestone name or grade
+    label = fields.Char('Category', readonly=True)
+
+    # Number of source records in the row and the measured value (count, days or percent depending on the KPI)
+    count = fields.Integer('Records', readonly=True, aggregator='sum')
+    value = fields.Float('Value', readonly=True, aggregator='avg')
+    # Refresh the row was computed by
+    refresh_date = fields.Datetime('Refreshed On', readonly=True)
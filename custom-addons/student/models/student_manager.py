@@ -6,6 +6,13 @@ from odoo import api, fields, models
 class Manager(models.Model):
     _name = "student.manager"
     _description = "PaLMS - Managers"
+    _inherit = ['student.role.context.mixin']
+    # Fields invalidating the cached role context of users
+    _role_context_fields = ('active', 'manager_account', 'manager_faculty')
+
+    # Users whose cached roles depend on the records
+    def _role_context_users(self):
+        return self.sudo().with_context(active_test=False).mapped('manager_account')
 
     # Display name of the manager (computed from user account)
     name = fields.Char('Manager Name', required=True, default=lambda self: self.env.user.name, compute="_compute_name", store=True, readonly=True)
@@ -23,9 +30,10 @@ class Manager(models.Model):
     manager_faculty = fields.Many2one('student.faculty', string='Faculty', required=True)
 
     # Compute the name of the manager based on the linked user account
-    @api.depends("manager_account")
+    @api.depends("manager_account", "manager_account.name")
     def _compute_name(self):
-        self.name = self.manager_account.name
+        for manager in self:
+            manager.name = manager.manager_account.name
 
     # Ensure that changing the manager account also updates the faculty (if relevant logic is defined)
     @api.onchange("manager_account")
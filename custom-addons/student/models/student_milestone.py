@@ -1,15 +1,25 @@
 # This model defines project milestones in PaLMS.
 # Milestones have a deadline, attachments, and are linked to academic programs.
-# When created, tasks and calendar events are generated for all relevant student projects.
+# When created, tasks and calendar events are generated for all relevant student projects,
+# in chunks by a background job for milestones targeting many projects.
 # Notifications are sent to professors, managers, supervisors, and students.
 
+from collections import Counter
+
 from odoo import models, fields, api
 from markupsafe import Markup
 
+# Number of targeted projects above which tasks are generated by a background job
+DEFAULT_FANOUT_THRESHOLD = 200
+# Number of projects processed by a single run of the background job
+DEFAULT_FANOUT_CHUNK_SIZE = 500
+
 class StudentMilestone(models.Model):
     _name = 'student.milestone'
     _description = 'PaLMS - Milestones'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('attachment_ids',)
 
     # Title of the milestone
     name = fields.Char(string="Name", required=True, translate=True, tracking=True)
@@ -42,79 +52,164 @@ class StudentMilestone(models.Model):
     )
 
     # Linked discussion channel
-    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', readonly=True, copy=False)
+    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', compute='_compute_channel_id')
+
+    # Resolve the discussion channels of all records through the channel registry at once
+    def _compute_channel_id(self):
+        channels = self.env['student.channel.registry'].resolve_channels('milestone', self.ids)
+        for record in self:
+            record.channel_id = channels.get(record.id, False)
 
     # Flag to track if notification was sent at creation
     creation_notification_sent = fields.Boolean(string='Creation Notification Sent', readonly=True, default=False)
 
+    # === TASK GENERATION PROGRESS ===
+
+    # State of the generation of tasks for the targeted projects
+    fanout_state = fields.Selection([
+        ('pending', 'Queued'),
+        ('running', 'In Progress'),
+        ('done', 'Done')
+    ], string='Task Generation', readonly=True, copy=False)
+    # Number of targeted projects and number of projects already processed
+    fanout_total = fields.Integer('Targeted Projects', readonly=True, copy=False)
+    fanout_done = fields.Integer('Processed Projects', readonly=True, copy=False)
+    fanout_progress = fields.Float('Task Generation Progress', compute='_compute_fanout_progress')
+    # Projects are processed in ID order, this is the last processed one
+    fanout_last_project_id = fields.Integer('Last Processed Project', readonly=True, copy=False)
+    # Number of created tasks per targeted program
+    fanout_stat_ids = fields.One2many('student.milestone.fanout.stat', 'milestone_id', string='Tasks per Program', readonly=True)
+
+    @api.depends('fanout_total', 'fanout_done')
+    def _compute_fanout_progress(self):
+        for milestone in self:
+            milestone.fanout_progress = 100.0 * milestone.fanout_done / milestone.fanout_total if milestone.fanout_total else 0.0
+
     @api.model
     def create(self, vals):
-        # Override create to make attachments public, create related tasks/events, and send notifications
+        # Override create to create related tasks/events and send notifications
         record = super().create(vals)
-        record._make_attachments_public()
         record.create_tasks_and_calendar_events_for_projects()
         record._send_milestone_notification(is_update=False)
         return record
 
-    def _make_attachments_public(self):
-        # Set all attachments linked to this milestone as public
-        for announcement in self:
-            for attachment in announcement.attachment_ids:
-                attachment.write({'public': True})
+    # Find the student projects targeted by the milestone
+    def _fanout_project_domain(self):
+        self.ensure_one()
+        return [('program_ids', 'in', self.program_ids.ids)]
 
     def create_tasks_and_calendar_events_for_projects(self):
-        # For each milestone, create tasks for related student projects and a calendar event
-        task = self.env['project.task']
-        student_project = self.env['student.project']
-        for milestone in self:
-            # Find projects linked to the milestone's programs
-            projects = student_project.search([('program_ids', 'in', milestone.program_ids.ids)])
+        # Create tasks for related student projects and a calendar event for each milestone.
+        # Small milestones are processed immediately, large ones in chunks by a background job.
+        threshold = int(self.env['ir.config_parameter'].sudo().get_param(
+            'student.milestone_fanout_threshold', DEFAULT_FANOUT_THRESHOLD))
+        background = False
+        for milestone in self.sudo():
+            total = self.env['student.project'].sudo().search_count(milestone._fanout_project_domain())
+            milestone.write({
+                'fanout_state': 'pending' if total > threshold else 'running',
+                'fanout_total': total,
+                'fanout_done': 0,
+                'fanout_last_project_id': 0,
+                'fanout_stat_ids': [(5, 0, 0)] + [(0, 0, {'program_id': program.id}) for program in milestone.program_ids]
+            })
+            if total > threshold:
+                background = True
+            else:
+                milestone._fanout_next_chunk()
 
-            milestone_professors = []
+        if background:
+            self.env.ref('student.ir_cron_milestone_fanout')._trigger()
 
-            for project in projects:
-                # Create a task in the related project for this milestone
-                task.sudo().create({
-                    'name': milestone.name,
-                    'project_id': project.project_project_id.id,
-                    'student_milestone_id': milestone.id,
-                    'description': milestone.description,
-                    'date_deadline': milestone.deadline_date,
-                    'additional_files': [(6, 0, milestone.attachment_ids.ids)],
-                    'partner_id': milestone.author_id.partner_id.id,
-                    'user_ids': [(6, 0, list(filter(None, [
-                        project.student_account.id,
-                        project.professor_account.id
-                    ])))]
-                })
-                milestone_professors.append(project.professor_account.id)
+    # Create the tasks of the next projects (all remaining ones without a limit), in project ID order.
+    # Once every project is processed, the deadline calendar event is created.
+    def _fanout_next_chunk(self, limit=None):
+        self.ensure_one()
+        projects = self.env['student.project'].sudo().search(
+            self._fanout_project_domain() + [('id', '>', self.fanout_last_project_id)], order='id', limit=limit)
 
-            # Find managers and supervisors linked to the milestone's programs
-            milestone_managers = self.env['student.manager'].search([
-                ('program_ids', 'in', milestone.program_ids.ids)
-            ])
-            milestone_supervisors = self.env['student.supervisor'].search([
-                ('program_ids', 'in', milestone.program_ids.ids)
-            ])
-            administrative_stuff_ids = list(filter(
-                None, milestone_managers.mapped('manager_account.id') +
-                      milestone_supervisors.mapped('supervisor_account.id') +
-                      milestone_professors
-            ))
+        if projects:
+            self._create_project_tasks(projects)
 
-            # Create a calendar event for the milestone deadline
-            self.env['student.calendar.event'].sudo().create({
-                'name': f'Milestone deadline: {milestone.name}',
-                'event_type': 'milestone_deadline',
-                'start_datetime': milestone.deadline_date,
-                'end_datetime': milestone.deadline_date,
-                'milestone_id': milestone.id,
-                'user_ids': [(6, 0, list(set(
-                    projects.mapped('student_account.id')
-                    + administrative_stuff_ids
-                )))],
-                'creator_id': self.env.user.id
-            })
+        vals = {
+            'fanout_done': self.fanout_done + len(projects),
+            'fanout_last_project_id': projects[-1].id if projects else self.fanout_last_project_id,
+        }
+        if not limit or len(projects) < limit:
+            self._create_deadline_event()
+            vals['fanout_state'] = 'done'
+        self.write(vals)
+        return vals.get('fanout_state') == 'done'
+
+    # Create the tasks of the given projects with a single multi-create
+    def _create_project_tasks(self, projects):
+        self.ensure_one()
+        self.env['project.task'].sudo().create([{
+            'name': self.name,
+            'project_id': project.project_project_id.id,
+            'student_milestone_id': self.id,
+            'description': self.description,
+            'date_deadline': self.deadline_date,
+            'additional_files': [(6, 0, self.attachment_ids.ids)],
+            'partner_id': self.author_id.partner_id.id,
+            'user_ids': [(6, 0, list(filter(None, [
+                project.student_account.id,
+                project.professor_account.id
+            ])))]
+        } for project in projects])
+
+        # Count the created tasks per targeted program
+        counts = Counter()
+        for project in projects:
+            counts.update((project.program_ids & self.program_ids).ids)
+        for stat in self.fanout_stat_ids:
+            if counts[stat.program_id.id]:
+                stat.task_count += counts[stat.program_id.id]
+
+    # Create the calendar event of the milestone deadline for all involved users
+    def _create_deadline_event(self):
+        self.ensure_one()
+        projects = self.env['student.project'].sudo().search(self._fanout_project_domain())
+
+        # Find managers and supervisors linked to the milestone's programs
+        milestone_managers = self.env['student.manager'].sudo().search([
+            ('program_ids', 'in', self.program_ids.ids)
+        ])
+        milestone_supervisors = self.env['student.supervisor'].sudo().search([
+            ('program_ids', 'in', self.program_ids.ids)
+        ])
+        user_ids = set(filter(
+            None, milestone_managers.mapped('manager_account.id') +
+                  milestone_supervisors.mapped('supervisor_account.id') +
+                  projects.mapped('professor_account.id') +
+                  projects.mapped('student_account.id')
+        ))
+
+        self.env['student.calendar.event'].sudo().create({
+            'name': f'Milestone deadline: {self.name}',
+            'event_type': 'milestone_deadline',
+            'start_datetime': self.deadline_date,
+            'end_datetime': self.deadline_date,
+            'milestone_id': self.id,
+            'user_ids': [(6, 0, list(user_ids))],
+            'creator_id': self.author_id.id
+        })
+
+    # Scheduled job: process one chunk of every milestone waiting for its tasks
+    @api.model
+    def _cron_process_fanout(self):
+        chunk_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'student.milestone_fanout_chunk_size', DEFAULT_FANOUT_CHUNK_SIZE))
+        milestones = self.sudo().search([('fanout_state', 'in', ['pending', 'running'])], order='id')
+        remaining = False
+        for milestone in milestones:
+            milestone.fanout_state = 'running'
+            if not milestone._fanout_next_chunk(limit=chunk_size):
+                remaining = True
+
+        # Keep going without waiting for the next scheduled run
+        if remaining:
+            self.env.ref('student.ir_cron_milestone_fanout')._trigger()
 
     def write(self, vals):
         # Override write to update related tasks, calendar events, and send notifications on milestone update
@@ -143,6 +238,11 @@ class StudentMilestone(models.Model):
                 self._send_milestone_notification(is_update=True)
         return res
 
+    # Override unlink to cancel the calendar events deleted with the records in the iCalendar feeds
+    def unlink(self):
+        self.env['student.calendar.event']._log_cascade_removals('milestone_id', self)
+        return super(StudentMilestone, self).unlink()
+
     def _send_milestone_notification(self, is_update=False):
         # Send notification about milestone creation or update to relevant users
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
@@ -173,15 +273,19 @@ class StudentMilestone(models.Model):
 
             if is_update:
                 # For updates, post a message in the existing discussion channel
-                channel = milestone.channel_id
+                milestone.env['student.utils'].send_message(
+                    'milestone',
+                    message_text,
+                    users,
+                    milestone.author_id,
+                    (str(milestone.id), str(milestone.name))
+                )
             else:
                 # For creation, send an email notification
                 subtype_id = self.env.ref('student.student_message_subtype_email')
                 template = self.env.ref('student.email_template_milestone_created')
-                template.send_mail(self.id,
-                                   email_values={'email_to': ','.join(users.mapped('email')),
-                                                 'subtype_id': subtype_id.id},
-                                   force_send=True)
+                self.env['student.utils'].notify_users(template, milestone, users, 'New milestone',
+                                                       email_values={'subtype_id': subtype_id.id})
 
                 # Send an internal message to users
                 milestone.env['student.utils'].send_message(
@@ -191,24 +295,9 @@ class StudentMilestone(models.Model):
                     milestone.author_id,
                     (str(milestone.id), str(milestone.name))
                 )
-                # Find or create the discussion channel for this milestone
-                channel = milestone.env['discuss.channel'].sudo().search([
-                    ('name', '=', f"Milestone №{milestone.id} ({milestone.name})")
-                ], limit=1)
-                milestone.channel_id = channel
-
                 # Mark notification as sent
                 milestone.creation_notification_sent = True
 
-            if is_update:
-                # Post update message on the discussion channel
-                channel.sudo().message_post(
-                    body=message_text,
-                    author_id=milestone.author_id.partner_id.id,
-                    message_type="comment",
-                    subtype_xmlid='mail.mt_comment'
-                )
-
     def action_upload_result(self):
         # Open a form to upload milestone results by the current student user
         self.ensure_one()
@@ -245,3 +334,14 @@ class StudentMilestone(models.Model):
             'domain': [('milestone_id', '=', self.id)],
             'context': {'default_milestone_id': self.id}
         }
+
+
+class StudentMilestoneFanoutStat(models.Model):
+    _name = 'student.milestone.fanout.stat'
+    _description = 'PaLMS - Milestone Tasks per Program'
+
+    # Milestone and targeted program
+    milestone_id = fields.Many2one('student.milestone', string='Milestone', required=True, ondelete='cascade')
+    program_id = fields.Many2one('student.program', string='Program', required=True, ondelete='cascade')
+    # Number of tasks created for the projects of the program
+    task_count = fields.Integer('Created Tasks', default=0)
@@ -9,6 +9,9 @@ from odoo.osv import expression
 class MilestoneResult(models.Model):
     _name = 'student.milestone.result'
     _description = 'PaLMS - Milestones Results'
+    _inherit = ['student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('attachment_ids',)
 
     # Related milestone for which the result is submitted.
     milestone_id = fields.Many2one(
@@ -62,41 +65,25 @@ class MilestoneResult(models.Model):
         )
     ]
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         # Ensure milestone_id is provided
-        milestone_id = vals.get('milestone_id') or self.env.context.get('default_milestone_id')
-        if isinstance(milestone_id, (list, tuple)):
-            milestone_id = milestone_id[0] if milestone_id else False
-        if not milestone_id:
-            raise ValidationError("Milestone ID is missing.")
-        # Create record and set attachment visibility
-        record = super().create(vals)
-        record._make_attachments_public()
-        return record
-
-    def write(self, vals):
-        # Update attachment visibility on write
-        self._make_attachments_public()
-        return super().write(vals)
-
-    def _make_attachments_public(self):
-        # Ensure all attached files are public
-        for milestone in self:
-            for attachment in milestone.attachment_ids:
-                attachment.write({'public': True})
+        for vals in vals_list:
+            milestone_id = vals.get('milestone_id') or self.env.context.get('default_milestone_id')
+            if isinstance(milestone_id, (list, tuple)):
+                milestone_id = milestone_id[0] if milestone_id else False
+            if not milestone_id:
+                raise ValidationError("Milestone ID is missing.")
+        return super().create(vals_list)
 
     def _search(self, domain, offset=0, limit=None, order=None):
         # Apply role-based visibility filtering
-        user = self.sudo().env.user
-        if not (
-                user.has_group('student.group_manager') or
-                user.has_group('student.group_supervisor') or
-                user.has_group('student.group_administrator') or
-                user.has_group('base.group_system')
-        ):
-            # Limit to projects where the user is a student or professor
-            projects = self.env['student.project'].search([])
-            permitted_user_ids = projects.mapped('student_account.id') + projects.mapped('professor_account.id')
-            domain = expression.AND([domain, [('user_id', 'in', permitted_user_ids)]])
+        if not self.env['student.role.context'].get().is_privileged:
+            # Limit to results submitted by students or professors of projects, evaluated by PostgreSQL
+            # as indexed EXISTS subqueries on the project accounts
+            domain = expression.AND([domain, [
+                '|',
+                ('user_id.student_project_ids', '!=', False),
+                ('user_id.professor_project_ids', '!=', False)
+            ]])
         return super()._search(domain, offset=offset, limit=limit, order=order)
@@ -0,0 +1,147 @@
+# This module defines the notification digests of PaLMS.
+# Users who opt into a digest receive one summary email per interval instead of one email per event:
+# notifications addressed to them are stored as digest items and rendered together by a scheduled job.
+
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+# Length of every digest interval, in hours
+DIGEST_INTERVALS = {
+    'hourly': 1,
+    'daily': 24,
+    'weekly': 168,
+}
+
+
+class NotificationDigest(models.Model):
+    _name = 'student.notification.digest'
+    _description = 'PaLMS - Notification Digests'
+    _order = 'create_date desc, id desc'
+
+    # Recipient of the digest
+    user_id = fields.Many2one('res.users', string='Recipient', required=True, readonly=True, ondelete='cascade')
+    # Notifications summarized by the digest
+    item_ids = fields.One2many('student.notification.digest.item', 'digest_id', string='Notifications', readonly=True)
+    item_count = fields.Integer('Number of Notifications', readonly=True)
+
+    # Scheduled job: send one summary email to every user whose digest interval has elapsed
+    @api.model
+    def _cron_send_digests(self):
+        now = fields.Datetime.now()
+        Item = self.env['student.notification.digest.item'].sudo()
+
+        # Find the recipients with pending notifications with a single grouped query
+        groups = Item._read_group([('digest_id', '=', False)], ['user_id'], ['__count'])
+        template = self.env.ref('student.email_template_notification_digest')
+        subtype_id = self.env.ref('student.student_message_subtype_email')
+
+        for user, count in groups:
+            # Users switched back to instant notifications get their pending items in a last digest
+            hours = DIGEST_INTERVALS.get(user.notification_digest, 0)
+            if user.notification_digest_last and user.notification_digest_last + timedelta(hours=hours) > now:
+                continue
+
+            items = Item.search([('user_id', '=', user.id), ('digest_id', '=', False)])
+            digest = self.sudo().create({
+                'user_id': user.id,
+                'item_count': len(items),
+            })
+            items.write({'digest_id': digest.id})
+            user.sudo().notification_digest_last = now
+
+            self.env['student.utils'].queue_mail(template, digest.id,
+                                                 email_values={'email_to': user.email,
+                                                               'subtype_id': subtype_id.id})
+
+    # Send notifications right away as one summary email per recipient, whatever their digest preference.
+    # Used by bulk actions so users get a single email instead of one per record; notifications are given as
+    # {user: [(record, summary), ...]}.
+    @api.model
+    def send_grouped(self, notifications):
+        template = self.env.ref('student.email_template_notification_digest')
+        subtype_id = self.env.ref('student.student_message_subtype_email')
+        Item = self.env['student.notification.digest.item'].sudo()
+
+        for user, entries in notifications.items():
+            digest = self.sudo().create({
+                'user_id': user.id,
+                'item_count': len(entries),
+            })
+            Item.create([{
+                'user_id': user.id,
+                'digest_id': digest.id,
+                'summary': summary,
+                'res_model': record._name,
+                'res_id': record.id,
+                'record_name': record.display_name,
+            } for record, summary in entries])
+
+            self.env['student.utils'].queue_mail(template, digest.id,
+                                                 email_values={'email_to': user.email,
+                                                               'subtype_id': subtype_id.id})
+
+    # Scheduled job: remove digests sent more than a month ago
+    @api.model
+    def _cron_clean_digests(self):
+        limit_date = fields.Datetime.now() - timedelta(days=30)
+        self.sudo().search([('create_date', '<', limit_date)]).unlink()
+
+
+class NotificationDigestItem(models.Model):
+    _name = 'student.notification.digest.item'
+    _description = 'PaLMS - Notification Digest Items'
+    _order = 'create_date, id'
+
+    # Recipient of the notification
+    user_id = fields.Many2one('res.users', string='Recipient', required=True, readonly=True, index=True, ondelete='cascade')
+    # Digest the notification was sent with (empty while pending)
+    digest_id = fields.Many2one('student.notification.digest', string='Digest', readonly=True, index=True, ondelete='cascade')
+
+    # Short description of the event, e.g. "New milestone"
+    summary = fields.Char('Summary', required=True, readonly=True)
+    # Record the notification is about
+    res_model = fields.Char('Related Model', required=True, readonly=True)
+    res_id = fields.Integer('Related Record ID', required=True, readonly=True)
+    record_name = fields.Char('Related Record Name', readonly=True)
+    # Link to the record in the backend
+    url = fields.Char('Link', compute='_compute_url')
+
+    def _compute_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        for item in self:
+            item.url = f'{base_url}/web#id={item.res_id}&model={item.res_model}&view_type=form'
+
+    # Store one pending item per recipient for the given records
+    @api.model
+    def enqueue(self, users, records, summary):
+        return self.sudo().create([{
+            'user_id': user.id,
+            'summary': summary,
+            'res_model': record._name,
+            'res_id': record.id,
+            'record_name': record.display_name,
+        } for record in records for user in users])
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # How PaLMS notification emails are delivered to the user
+    notification_digest = fields.Selection([
+        ('instant', 'Immediately'),
+        ('hourly', 'Hourly Digest'),
+        ('daily', 'Daily Digest'),
+        ('weekly', 'Weekly Digest')
+    ], string='PaLMS Notifications', default='instant', required=True)
+    # Date of the last digest sent to the user
+    notification_digest_last = fields.Datetime('Last Digest Sent On', readonly=True)
+
+    # Let users change their digest preference from their own preferences form
+    @property
+    def SELF_READABLE_FIELDS(self):
+        return super().SELF_READABLE_FIELDS + ['notification_digest', 'notification_digest_last']
+
+    @property
+    def SELF_WRITEABLE_FIELDS(self):
+        return super().SELF_WRITEABLE_FIELDS + ['notification_digest']
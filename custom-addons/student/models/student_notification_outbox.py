@@ -0,0 +1,252 @@
+# This module defines the notification outbox of PaLMS.
+# Workflow actions only enqueue their emails and Discuss messages here; a scheduled job drains the outbox in batches,
+# coalesces duplicated notifications, retries failed deliveries and records the latency of every processed batch.
+
+import json
+import logging
+import time
+from datetime import timedelta
+
+from markupsafe import Markup
+from odoo import api, fields, models
+
+from .student_instrumentation import count_mails, touch_channel
+
+_logger = logging.getLogger(__name__)
+
+# Default number of outbox rows processed by a single worker run
+DEFAULT_BATCH_SIZE = 200
+# Number of delivery attempts before an outbox row is marked as failed
+MAX_ATTEMPTS = 5
+
+
+class NotificationOutbox(models.Model):
+    _name = 'student.notification.outbox'
+    _description = 'PaLMS - Notification Outbox'
+    _order = 'id'
+
+    # Kind of notification to deliver
+    notification_type = fields.Selection([
+        ('mail', 'Email'),
+        ('message', 'Discuss Message')
+    ], string='Type', required=True, readonly=True)
+
+    # Delivery state of the notification
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed')
+    ], string='State', default='pending', required=True, readonly=True, index=True)
+
+    # === EMAIL DATA ===
+
+    # Template rendered for the email and the record it is rendered for
+    template_id = fields.Many2one('mail.template', string='Email Template', readonly=True, ondelete='cascade')
+    res_id = fields.Integer('Related Record ID', readonly=True)
+    # Additional email values passed to the template (JSON-encoded)
+    email_values = fields.Text('Email Values', readonly=True)
+    # Mail generated from the template, kept to resend it on retries without rendering again
+    mail_id = fields.Many2one('mail.mail', string='Generated Mail', readonly=True, ondelete='set null')
+
+    # === DISCUSS MESSAGE DATA ===
+
+    # Notification source and record data used to resolve the Discuss channel
+    source = fields.Char('Source', readonly=True)
+    record_ref = fields.Char('Source Record ID', readonly=True)
+    record_name = fields.Char('Source Record Name', readonly=True)
+    # Known channel to post into (skips the channel resolution)
+    channel_id = fields.Many2one('discuss.channel', string='Discuss Channel', readonly=True, ondelete='cascade')
+    body = fields.Html('Message', readonly=True, sanitize=False)
+    recipient_ids = fields.Many2many('res.users', string='Recipients', readonly=True)
+    author_id = fields.Many2one('res.users', string='Author', readonly=True)
+
+    # === DELIVERY TRACKING ===
+
+    attempts = fields.Integer('Attempts', default=0, readonly=True)
+    next_attempt = fields.Datetime('Next Attempt', default=fields.Datetime.now, readonly=True, index=True)
+    last_error = fields.Text('Last Error', readonly=True)
+    sent_date = fields.Datetime('Sent On', readonly=True)
+    batch_id = fields.Many2one('student.notification.batch', string='Batch', readonly=True, ondelete='set null')
+
+    # === ENQUEUEING ===
+
+    @api.model
+    def enqueue_mail(self, template, res_id, email_values=None):
+        count_mails()
+        return self.sudo().create({
+            'notification_type': 'mail',
+            'template_id': template.id,
+            'res_id': res_id,
+            'email_values': json.dumps(email_values or {}, sort_keys=True),
+        })
+
+    @api.model
+    def enqueue_message(self, source, message_text, recipients, author, data_tuple, channel=None):
+        return self.enqueue_messages([(source, message_text, recipients, author, data_tuple, channel)])
+
+    # Queue several messages with a single multi-create, given as (source, text, recipients, author, data_tuple, channel)
+    @api.model
+    def enqueue_messages(self, messages):
+        vals_list = []
+        for source, message_text, recipients, author, data_tuple, channel in messages:
+            tuple_id, tuple_name = data_tuple
+            touch_channel(source, tuple_id)
+            vals_list.append({
+                'notification_type': 'message',
+                'source': source,
+                'record_ref': tuple_id,
+                'record_name': tuple_name,
+                'channel_id': channel.id if channel else False,
+                'body': str(message_text),
+                'recipient_ids': [(6, 0, [recipient.id for recipient in recipients])],
+                'author_id': author.id,
+            })
+        return self.sudo().create(vals_list)
+
+    # === WORKER ===
+
+    @api.model
+    def _cron_process_outbox(self, batch_size=None):
+        if not batch_size:
+            batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+                'student.notification_outbox_batch_size', DEFAULT_BATCH_SIZE))
+
+        rows = self.sudo().search([
+            ('state', '=', 'pending'),
+            ('next_attempt', '<=', fields.Datetime.now())
+        ], limit=batch_size)
+        if not rows:
+            return
+
+        started = time.perf_counter()
+        batch = self.env['student.notification.batch'].sudo().create({
+            'start_datetime': fields.Datetime.now(),
+            'item_count': len(rows),
+        })
+        rows.write({'batch_id': batch.id})
+
+        # Coalesce identical notifications so each of them is rendered and delivered once
+        groups = {}
+        for row in rows:
+            key = row._coalesce_key()
+            groups[key] = groups.get(key, self.browse()) | row
+
+        # Resolve the channels of all messages with one registry query per source
+        channels = {}
+        res_ids_by_source = {}
+        for key, group in groups.items():
+            if key[0] == 'message' and not group[0].channel_id:
+                res_ids_by_source.setdefault(group[0].source, set()).add(int(group[0].record_ref))
+        for source, res_ids in res_ids_by_source.items():
+            for res_id, channel in self.env['student.channel.registry'].resolve_channels(source, res_ids).items():
+                channels[(source, res_id)] = channel
+
+        mail_groups = []
+        for key, group in groups.items():
+            try:
+                with self.env.cr.savepoint():
+                    if key[0] == 'mail':
+                        group._prepare_mail()
+                        mail_groups.append(group)
+                    else:
+                        group._deliver_message(channels.get((group[0].source, int(group[0].record_ref))))
+                        group._mark_sent()
+            except Exception as error:
+                _logger.exception("PaLMS outbox: delivery of %s failed", group.ids)
+                group._mark_failed(error)
+
+        # Send all generated mails at once so SMTP connections are shared across the batch
+        if mail_groups:
+            mails = self.env['mail.mail'].sudo().browse([group[0].mail_id.id for group in mail_groups])
+            mails.send(raise_exception=False)
+            for group in mail_groups:
+                if group[0].mail_id.state == 'exception':
+                    group._mark_failed(group[0].mail_id.failure_reason or "SMTP delivery failed.")
+                else:
+                    group._mark_sent()
+
+        batch.write({
+            'duration': (time.perf_counter() - started) * 1000.0,
+            'coalesced_count': len(rows) - len(groups),
+            'delivered_count': len(rows.filtered(lambda r: r.state == 'sent')),
+            'failed_count': len(rows.filtered(lambda r: r.state != 'sent')),
+        })
+
+        # Keep draining without waiting for the next scheduled run
+        if len(rows) == batch_size:
+            self.env.ref('student.ir_cron_process_notification_outbox')._trigger()
+
+    def _coalesce_key(self):
+        self.ensure_one()
+        if self.notification_type == 'mail':
+            return ('mail', self.template_id.id, self.res_id, self.email_values, self.create_uid.id)
+        return ('message', self.source, self.record_ref, self.channel_id.id, self.author_id.id, self.body)
+
+    # Render the email as the user who triggered it, so templates relying on "user" stay correct
+    def _prepare_mail(self):
+        leader = self[0]
+        mail = leader.mail_id.filtered(lambda m: m.state == 'exception')
+        if not mail:
+            email_values = json.loads(leader.email_values or '{}')
+            mail_id = leader.template_id.with_user(leader.create_uid).send_mail(
+                leader.res_id, email_values=email_values, force_send=False)
+            mail = self.env['mail.mail'].sudo().browse(mail_id)
+        else:
+            mail.mark_outgoing()
+        self.write({'mail_id': mail.id})
+
+    def _deliver_message(self, channel=None):
+        leader = self[0]
+        recipients = self.mapped('recipient_ids')
+        self.env['student.utils']._deliver_message(
+            leader.source,
+            Markup(leader.body),
+            recipients,
+            leader.author_id,
+            (leader.record_ref, leader.record_name),
+            channel=leader.channel_id or channel
+        )
+
+    def _mark_sent(self):
+        self.write({'state': 'sent', 'sent_date': fields.Datetime.now(), 'last_error': False})
+
+    def _mark_failed(self, error):
+        for row in self:
+            attempts = row.attempts + 1
+            row.write({
+                'attempts': attempts,
+                'last_error': str(error),
+                'state': 'failed' if attempts >= MAX_ATTEMPTS else 'pending',
+                'next_attempt': fields.Datetime.now() + timedelta(minutes=2 ** attempts),
+            })
+
+    # Button action to put failed notifications back in the queue
+    def action_retry(self):
+        self.filtered(lambda r: r.state == 'failed').write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt': fields.Datetime.now(),
+        })
+        self.env.ref('student.ir_cron_process_notification_outbox')._trigger()
+
+    # Scheduled job: remove delivered notifications older than a month
+    @api.model
+    def _cron_clean_outbox(self):
+        limit_date = fields.Datetime.now() - timedelta(days=30)
+        self.sudo().search([('state', '=', 'sent'), ('sent_date', '<', limit_date)]).unlink()
+        self.env['student.notification.batch'].sudo().search([('start_datetime', '<', limit_date)]).unlink()
+
+
+class NotificationBatch(models.Model):
+    _name = 'student.notification.batch'
+    _description = 'PaLMS - Notification Outbox Batches'
+    _order = 'start_datetime desc, id desc'
+
+    start_datetime = fields.Datetime('Started On', readonly=True)
+    # Wall-clock time spent processing the batch, in milliseconds
+    duration = fields.Float('Latency (ms)', readonly=True)
+    item_count = fields.Integer('Processed Notifications', readonly=True)
+    coalesced_count = fields.Integer('Coalesced Notifications', readonly=True)
+    delivered_count = fields.Integer('Delivered Notifications', readonly=True)
+    failed_count = fields.Integer('Failed Notifications', readonly=True)
+    outbox_ids = fields.One2many('student.notification.outbox', 'batch_id', string='Notifications', readonly=True)
@@ -8,6 +8,13 @@ from odoo import api, fields, models
 class Professor(models.Model):
     _name = "student.professor"
     _description = "PaLMS - Professors"
+    _inherit = ['student.role.context.mixin']
+    # Fields invalidating the cached role context of users
+    _role_context_fields = ('active', 'professor_account', 'professor_faculty')
+
+    # Users whose cached roles depend on the records
+    def _role_context_users(self):
+        return self.sudo().with_context(active_test=False).mapped('professor_account')
 
     # Name of the professor, computed from linked user account
     name = fields.Char(
@@ -64,13 +71,13 @@ class Professor(models.Model):
         readonly=True
     )
 
-    # Compute number of commissions
+    # Compute number of commissions of all professors with a single grouped query
     def compute_number_of_commissions(self):
+        groups = self.env['student.commission'].sudo()._read_group(
+            [('professor_ids', 'in', self.ids)], ['professor_ids'], ['__count'])
+        counts = {professor.id: count for professor, count in groups}
         for professor in self:
-            count = self.env['student.commission'].search_count([
-                ('professor_ids', 'in', professor.id)
-            ])
-            professor.number_of_commissions = count
+            professor.number_of_commissions = counts.get(professor.id, 0)
 
     # Compute name from user account
     @api.depends("professor_account")
@@ -7,6 +7,17 @@ from odoo import fields, models, api
 class Program(models.Model):
     _name = "student.program"
     _description = "PaLMS - Programs"
+    _inherit = ['student.role.context.mixin']
+    # Fields invalidating the cached role context of users
+    _role_context_fields = ('program_faculty_id', 'supervisor', 'manager')
+
+    # Users whose cached roles depend on the programs
+    def _role_context_users(self):
+        return self.sudo().mapped('supervisor.supervisor_account') | self.sudo().mapped('manager.manager_account')
+
+    # Announcements targeting the programs
+    def _role_context_announcements(self):
+        return self.env['student.announcement'].sudo().search([('target_program_ids', 'in', self.ids)])
 
     # Program title
     name = fields.Char('Program Name', required=True, translate=True)
@@ -69,9 +80,10 @@ class Program(models.Model):
 
     # Compute student count based on linked records
     @api.depends('student_ids')
-    @api.model
     def _compute_student_count(self):
-        self.student_number = len(self.student_ids)
+        counts = self.env['student.utils'].count_by('student.student', 'student_program', self._origin.ids)
+        for program in self:
+            program.student_number = counts.get(program._origin.id, 0)
 
     # Number of linked projects (computed)
     project_number = fields.Integer(
@@ -86,6 +98,7 @@ class Program(models.Model):
 
     # Compute number of projects
     @api.depends('project_ids')
-    @api.model
     def _compute_project_count(self):
-        self.project_number = len(self.project_ids)
\ No newline at end of file
+        counts = self.env['student.utils'].count_by('student.project', 'listed_program_ids', self._origin.ids)
+        for program in self:
+            program.project_number = counts.get(program._origin.id, 0)
@@ -9,13 +9,29 @@
 # =============================================================================
 
 from markupsafe import Markup
-from odoo import fields, models, api, _
+from odoo import fields, models, api, tools, _
 from odoo.exceptions import UserError, AccessError, ValidationError
 
+# Report files of a project: {binary field: (filename field, size field, checksum field, field of the user uploading it)}
+REPORT_FILE_FIELDS = {
+    'project_report_file': ('project_report_filename', 'project_report_size', 'project_report_checksum', 'student_account'),
+    'plagiarism_check_file': ('plagiarism_check_filename', 'plagiarism_check_size', 'plagiarism_check_checksum', 'student_account'),
+    'professor_review_file': ('professor_review_filename', 'professor_review_size', 'professor_review_checksum', 'professor_account'),
+}
+
+# Board views filtered by the role of the user, with the error raised when the user cannot be resolved
+BOARD_VIEW_ERRORS = {
+    'project_board': "The user is not correctly registered in any of the faculties. Contact the administrator for the fix.",
+    'available_projects': "Student account or program is not registered. Contact the administrator for the fix.",
+    'pending_submissions': "This supervisor account is not registered or not supervising any programs. Contact the administrator for the fix.",
+}
+
 class Project(models.Model):
     _name = "student.project"
     _description = "PaLMS - Projects"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'student.utils']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'student.utils', 'student.attachment.mixin']
+    # Attachment fields whose files are made public
+    _public_attachment_fields = ('additional_files',)
 
     # === FIELD DEFINITIONS ===
 
@@ -64,14 +80,15 @@ class Project(models.Model):
     commission_head = fields.Many2one('student.professor', string='Head of the Commission')
 
     def _compute_name_readonly(self):
+        user = self.env.user
+        roles = self.env['student.role.context'].get()
         for rec in self:
-            user = self.env.user
             rec.name_readonly = not (
-                    ((user.has_group('student.group_student') or user.has_group('student.group_professor'))
+                    ((roles.is_student or roles.is_professor)
                      and rec.state_evaluation == 'draft') or
-                    user.has_group('student.group_administrator') or
-                    user.has_group('student.group_supervisor') or
-                    (user.has_group('student.group_professor')
+                    roles.is_administrator or
+                    roles.is_supervisor or
+                    (roles.is_professor
                      and user.id == self.commission_head.professor_account.id))
 
     format = fields.Selection([('research', 'Research'), ('project', 'Project'), ('startup', 'Start-up')], string="Format", default="research", required=True)
@@ -109,14 +126,14 @@ class Project(models.Model):
     # Assigns the professor's faculty
     @api.model
     def _default_campus(self):
-        professor = self.env['student.professor'].sudo().search([('professor_account.id', '=', self.env.uid)], limit=1)
+        professor = self.env['student.role.context'].get().professor
         return professor.professor_faculty.campus if professor else False
     campus_id = fields.Many2many('student.campus', string='Campus', default=_default_campus, required=True)
 
     # Assigns the professor's faculty
     @api.model
     def _default_faculty(self):
-        professor = self.env['student.professor'].sudo().search([('professor_account.id', '=', self.env.uid)], limit=1)
+        professor = self.env['student.role.context'].get().professor
         return professor.professor_faculty if professor else False
     faculty_id = fields.Many2many('student.faculty', string='Faculty', default=_default_faculty, required=True)
 
@@ -150,14 +167,22 @@ class Project(models.Model):
                                             string='Applicable Programs',
                                             readonly=True)
     approved_program_ids_count = fields.Integer('Number of Approved Submissions', compute="_compute_program_counts", store=False, readonly=True)
+    # Programs listing the project (inverse of the projects of the program, used to count them per program)
+    listed_program_ids = fields.Many2many(comodel_name='student.program',
+                                          relation='student_program_student_project_rel',
+                                          column1='student_project_id',
+                                          column2='student_program_id',
+                                          string='Listed in Programs (TECHNICAL)',
+                                          readonly=True)
 
     # --- Computed counts for program relations ---
     @api.depends('program_ids','pending_program_ids','approved_program_ids')
     def _compute_program_counts(self):
-        self.program_ids_count = len(self.program_ids)
-        self.pending_program_ids_count = len(self.pending_program_ids)
-        self.returned_program_ids_count = len(self.returned_program_ids)
-        self.approved_program_ids_count = len(self.approved_program_ids)
+        for project in self:
+            project.program_ids_count = len(project.program_ids)
+            project.pending_program_ids_count = len(project.pending_program_ids)
+            project.returned_program_ids_count = len(project.returned_program_ids)
+            project.approved_program_ids_count = len(project.approved_program_ids)
 
     availability_ids = fields.One2many('student.availability', 'project_id', string='Target Programs')
 
@@ -184,7 +209,7 @@ class Project(models.Model):
         string='Elected Student',
         readonly=True)
     student_elected_name = fields.Char(related='student_elected.name', string="Student Name", store=True)
-    student_account = fields.Many2one('res.users', string="Student Account", compute='_compute_student_account', store=True)
+    student_account = fields.Many2one('res.users', string="Student Account", compute='_compute_student_account', store=True, index='btree_not_null')
 
     @api.depends('student_elected')
     def _compute_student_account(self):
@@ -219,13 +244,40 @@ class Project(models.Model):
 
     professor_review_file = fields.Binary(string='Professor Review')
     professor_review_filename = fields.Char()
-    professor_feedback = fields.Text(string='Professor Feedback')
 
-    @api.onchange("additional_files")
-    def _update_additional_ownership(self):
-        # Makes the files public, may implement user-specific ownership in the future
-        for attachment in self.additional_files:
-            attachment.write({'public': True})
+    # Size and content hash of the report files, read by lists, kanbans and exports instead of the files themselves
+    project_report_size = fields.Integer('Project Report Size', compute='_compute_report_file_metadata', store=True, readonly=True)
+    project_report_checksum = fields.Char('Project Report Checksum', compute='_compute_report_file_metadata', store=True, readonly=True)
+    plagiarism_check_size = fields.Integer('Plagiarism Check Size', compute='_compute_report_file_metadata', store=True, readonly=True)
+    plagiarism_check_checksum = fields.Char('Plagiarism Check Checksum', compute='_compute_report_file_metadata', store=True, readonly=True)
+    professor_review_size = fields.Integer('Professor Review Size', compute='_compute_report_file_metadata', store=True, readonly=True)
+    professor_review_checksum = fields.Char('Professor Review Checksum', compute='_compute_report_file_metadata', store=True, readonly=True)
+
+    # Read the metadata of the report attachments of all projects with a single query, without loading their content
+    @api.depends('project_report_file', 'plagiarism_check_file', 'professor_review_file')
+    def _compute_report_file_metadata(self):
+        attachments = self.env['ir.attachment'].sudo().search_fetch([
+            ('res_model', '=', self._name),
+            ('res_field', 'in', list(REPORT_FILE_FIELDS)),
+            ('res_id', 'in', self._origin.ids),
+        ], ['res_field', 'res_id', 'file_size', 'checksum'])
+        metadata = {(attachment.res_id, attachment.res_field): attachment for attachment in attachments}
+
+        for project in self:
+            for field_name, (_filename, size_field, checksum_field, _owner) in REPORT_FILE_FIELDS.items():
+                attachment = metadata.get((project._origin.id, field_name))
+                project[size_field] = attachment.file_size if attachment else 0
+                project[checksum_field] = attachment.checksum if attachment else False
+
+    # Check that the current user can replace a report file, as the project form allows it
+    def _check_report_file_upload(self, field_name):
+        self.ensure_one()
+        if field_name not in REPORT_FILE_FIELDS:
+            raise UserError(f"{field_name} is not a report file of the project.")
+        owner = self[REPORT_FILE_FIELDS[field_name][3]]
+        if self.state_publication != 'assigned' or owner != self.env.user:
+            raise AccessError("Only the assigned student and the project professor can upload the report files of an assigned project.")
+    professor_feedback = fields.Text(string='Professor Feedback')
 
     @api.depends('additional_files')
     def _compute_file_count(self):
@@ -280,14 +332,14 @@ class Project(models.Model):
     # Assigns the professor account created for this user
     @api.model
     def _default_professor(self):
-        professor = self.env['student.professor'].sudo().search([('professor_account.id', '=', self.env.uid)], limit=1)
+        professor = self.env['student.role.context'].get().professor
         if professor:
             return professor.id
         else:
             raise ValidationError("The user is not registered as a professor. Contact the administrator for the fix.")
 
     professor_id = fields.Many2one('student.professor', default=_default_professor, string='Professor', readonly=True, required=True)
-    professor_account = fields.Many2one('res.users', string="Professor Account", compute='_compute_professor_account', store=True)
+    professor_account = fields.Many2one('res.users', string="Professor Account", compute='_compute_professor_account', store=True, index=True)
 
     @api.depends('professor_id')
     def _compute_professor_account(self):
@@ -307,67 +359,71 @@ class Project(models.Model):
                 project.project_state = 'applied'
 
     # === SEARCH FILTERS (Board Views) ===
-    # Custom search override to filter projects for board/kanban views based on user faculty, program, or supervisor role.
-    # This implements business access logic for different roles and views.
+    # Board/kanban views restrict projects by the faculty, program, or supervisor role of the user.
+    # The filter is applied in _search, so counts, grouping and pagination of these views use the same domain.
     @api.model
-    def search(self, args, offset=0, limit=None, order=None):
+    def _search(self, domain, offset=0, limit=None, order=None):
         active_view_type = self.env.context.get('view_type', False)
+        if active_view_type in BOARD_VIEW_ERRORS and not self.env.su:
+            domain = list(domain) + self._board_domain(active_view_type)
+        return super()._search(domain, offset=offset, limit=limit, order=order)
+
+    # Return the domain of a board view for the current user
+    @api.model
+    def _board_domain(self, view_type):
+        board_domain = self._get_board_domain(self.env.uid, view_type)
+        if board_domain is None:
+            raise AccessError(BOARD_VIEW_ERRORS[view_type])
+        return list(board_domain)
+
+    # Compute the board domain of a user once; it is cached per user and view, and cleared with the role context.
+    # Returns None when the user has no faculty or program for the view.
+    @api.model
+    @tools.ormcache('uid', 'view_type')
+    def _get_board_domain(self, uid, view_type):
+        roles = self.env['student.role.context'].get(uid)
+        if roles.is_administrator:
+            return ()
 
         # ♥♥ REVISE THIS SECTION FOR THE NEW BOARD SYSTEM
         # FACULTY FILTER in 'Project Board'
-        if active_view_type == 'project_board':
+        if view_type == 'project_board':
             user_faculty = False
             viewing_professor = False
 
-            # Get the current user's faculty_id
-            if self.env.user.has_group('student.group_manager'):
-                user_faculty = self.env['student.manager'].sudo().search([('manager_account', '=', self.env.user.id)], limit=1).manager_faculty
-            if self.env.user.has_group('student.group_supervisor'):
-                user_faculty = self.env['student.supervisor'].sudo().search([('supervisor_account', '=', self.env.user.id)], limit=1).supervisor_faculty
-            elif self.env.user.has_group('student.group_professor'):
-                viewing_professor = self.env['student.professor'].sudo().search([('professor_account', '=', self.env.user.id)], limit=1)
+            # Get the user's faculty
+            if roles.is_manager:
+                user_faculty = roles.manager.manager_faculty
+            if roles.is_supervisor:
+                user_faculty = roles.supervisor.supervisor_faculty
+            elif roles.is_professor:
+                viewing_professor = roles.professor
                 user_faculty = viewing_professor.professor_faculty
-            elif self.env.user.has_group('student.group_student'):
-                user_faculty = self.env['student.student'].sudo().search([('student_account', '=', self.env.user.id)], limit=1).student_faculty
-
-            # If the user has a faculty, add a domain to filter projects
-            if not self.env.user.has_group('student.group_administrator'):
-                if user_faculty:
-                    # ♥ Currently disabled functionality: Professor can see their projects if they sent it to another faculty
-                    if viewing_professor:
-                        args.append('|')
-                        args.append(('faculty_id', 'in', [user_faculty.id]))
-                        args.append(('professor_id', '=', viewing_professor.id))
-                    else:
-                        args.append(('faculty_id', 'in', [user_faculty.id]))
-                else:
-                    raise AccessError("The user is not correctly registered in any of the faculties. Contact the administrator for the fix.")
+            elif roles.is_student:
+                user_faculty = roles.student.student_faculty
+
+            if not user_faculty:
+                return None
+            # ♥ Currently disabled functionality: Professor can see their projects if they sent it to another faculty
+            if viewing_professor:
+                return ('|', ('faculty_id', 'in', (user_faculty.id,)), ('professor_id', '=', viewing_professor.id))
+            return (('faculty_id', 'in', (user_faculty.id,)),)
 
         # AVAILABILITY FILTER for students in 'Available Projects'
-        if active_view_type == 'available_projects':
-            if self.env.user.has_group('student.group_student'):
-                student_program = self.env['student.student'].sudo().search([('student_account', '=', self.env.user.id)], limit=1).student_program
-
-            # Students can view projects only if they are applied for their programs
-            if not self.env.user.has_group('student.group_administrator'):
-                if student_program:
-                    args.append(('approved_program_ids', 'in', [student_program.id]))
-                else:
-                    raise AccessError("Student account or program is not registered. Contact the administrator for the fix.")
+        # Students can view projects only if they are applied for their programs
+        if view_type == 'available_projects':
+            if not (roles.is_student and roles.student_program):
+                return None
+            return (('approved_program_ids', 'in', (roles.student_program.id,)),)
 
         # ACTION FILTER for supervisors in 'Pending Project Submissions'
-        if active_view_type == 'pending_submissions':
-            if self.env.user.has_group('student.group_supervisor'):
-                supervisor_program = self.env['student.supervisor'].sudo().search([('supervisor_account', '=', self.env.user.id)], limit=1).program_ids.ids
-
-            # Supervisors view projects as pending only if they haven't processed them yet
-            if not self.env.user.has_group('student.group_administrator'):
-                if supervisor_program:
-                    args.append(('pending_program_ids', '=', supervisor_program[0]))
-                else:
-                    raise AccessError("This supervisor account is not registered or not supervising any programs. Contact the administrator for the fix.")
+        # Supervisors view projects as pending only if they haven't processed them yet, in any of their programs
+        if view_type == 'pending_submissions':
+            if not (roles.is_supervisor and roles.supervisor_program_ids):
+                return None
+            return (('pending_program_ids', 'in', tuple(roles.supervisor_program_ids.ids)),)
 
-        return super(Project, self).search(args, offset=offset, limit=limit, order=order)
+        return ()
 
     # === COLOR COMPUTATIONS (Kanban Cards) ===
     # Handle the coloring of the project for kanban/board views
@@ -427,19 +483,21 @@ class Project(models.Model):
 
     # === CREATE / WRITE OVERRIDES ===
     # Prevents the creation of the default log message
-    @api.model
-    def create(self, vals):
-        project = super(Project, self.with_context(tracking_disable=True)).create(vals)
-
-        # ♥ Customizes the creation log message
-        if self.proposal_id:
-            message = _("A new project has been created upon the proposal of %s.") % (self.student_elected)
-        else:
-            message = _("A new project has been created by %s.") % (self.env.user.name)
-        project.message_post(body=message)
+    @api.model_create_multi
+    def create(self, vals_list):
+        projects = super(Project, self.with_context(tracking_disable=True)).create(vals_list)
+
+        # ♥ Customizes the creation log message (skipped with mail_create_nolog, e.g. for generated data)
+        if not self.env.context.get('mail_create_nolog'):
+            for project in projects:
+                if project.proposal_id:
+                    message = _("A new project has been created upon the proposal of %s.") % (project.student_elected.name)
+                else:
+                    message = _("A new project has been created by %s.") % (self.env.user.name)
+                project.message_post(body=message)
 
         # ID/save check is used to unlock file addition and submission eligibility sections
-        return project
+        return projects
 
     def write(self, vals):
         if 'grade' in vals:
@@ -450,7 +508,8 @@ class Project(models.Model):
 
     # Restricts access to project modification to the owning professor (except admin/supervisor)
     def _check_professor_identity(self):
-        if not self.env.user.has_group('student.group_administrator') and not self.env.user.has_group('student.group_supervisor'):
+        roles = self.env['student.role.context'].get()
+        if not roles.is_administrator and not roles.is_supervisor:
             if self.professor_account != self.env.user:
                 raise AccessError("You can only modify your projects.")
 
@@ -465,7 +524,7 @@ class Project(models.Model):
         elif self.state_evaluation == 'draft':
             self.write({'state_evaluation': 'progress'})
             self.write({'project_state': 'pending'})
-            self._update_additional_ownership()
+            self._make_attachments_public()
 
             # Assign availability record programs to the project
             availability_program_ids = self.availability_ids.mapped('program_id.id')
@@ -485,10 +544,9 @@ class Project(models.Model):
             # Send the email --------------------
             subtype_id = self.env.ref('student.student_message_subtype_email')
             template = self.env.ref('student.email_template_project_submission')
-            template.send_mail(self.id,
-                               email_values={'email_to': ','.join([supervisor.email for supervisor in self.program_supervisors]),
-                                             'subtype_id': subtype_id.id},
-                               force_send=True)
+            self.env['student.utils'].queue_mail(template, self.id,
+                                                 email_values={'email_to': ','.join([supervisor.email for supervisor in self.program_supervisors]),
+                                                               'subtype_id': subtype_id.id})
             # -----------------------------------
 
             # Construct the message that is to be sent to the user
@@ -587,7 +645,7 @@ class Project(models.Model):
             # Send the email --------------------
             subtype_id = self.env.ref('student.student_message_subtype_email')
             template = self.env.ref('student.email_template_project_approval')
-            template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+            self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
             # -----------------------------------
 
             # Construct the message that is to be sent to the user
@@ -614,9 +672,9 @@ class Project(models.Model):
 
     @api.constrains("name", "format", "language", "description", "requirements", "results", "additional_files", "professor_review_file", "professor_feedback", "professor_grade", "tag_ids")
     def _check_modifier_professor(self):
+        roles = self.env['student.role.context'].get()
         if (self.env.user.id != self.professor_account.id and
-                not (self.env.user.has_group('student.group_supervisor') or
-                     self.env.user.has_group('student.group_administrator'))):
+                not (roles.is_supervisor or roles.is_administrator)):
             raise UserError("You cannot modify projects of other professors.")
 
     @api.constrains("project_report_file", "project_check_file", "student_feedback", "additional_resources")
@@ -659,7 +717,7 @@ class Project(models.Model):
             # Send the email --------------------
             subtype_id = self.env.ref('student.student_message_subtype_email')
             template = self.env.ref('student.email_template_project_rejection')
-            template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+            self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
             # -----------------------------------
 
             # Construct the message that is to be sent to the user
@@ -689,7 +747,7 @@ class Project(models.Model):
                 # Send the email --------------------
                 subtype_id = self.env.ref('student.student_message_subtype_email')
                 template = self.env.ref('student.email_template_project_return')
-                template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+                self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
                 # -----------------------------------
 
                 # Construct the message that is to be sent to the user
@@ -700,8 +758,82 @@ class Project(models.Model):
 
                 return self.env['student.utils'].message_display('Return', 'The project is returned.', False)
 
+    # === BULK SUPERVISION ===
+
+    # Apply a decision of a supervisor (approved, rejected or returned) on several submitted availabilities at once.
+    # Program and state changes are written per program and per resulting state, and every professor receives a single
+    # summary email for all of their projects.
+    def _apply_supervision_decisions(self, availabilities, decision):
+        user_name = self.env.user.name
+        proposals = self.filtered('proposal_id') if decision == 'approved' else self.browse()
+        projects = self - proposals
+
+        # Accepted proposals become assigned projects directly
+        if proposals:
+            proposals.write({'state_evaluation': 'approved', 'state_publication': 'assigned'})
+            for proposal in proposals:
+                proposal.sudo().create_project_project()
+            group_id = self.env.ref('student.group_elected_student')
+            group_id.users = [(4, user_id) for user_id in proposals.student_elected.student_account.ids]
+
+        # Move the programs out of the pending ones, with one write per program
+        for program in availabilities.program_id:
+            program_projects = availabilities.filtered(lambda a: a.program_id == program).project_id & projects
+            values = {'pending_program_ids': [(3, program.id)]}
+            if decision == 'approved':
+                values['approved_program_ids'] = [(4, program.id)]
+            elif decision == 'returned':
+                values['returned_program_ids'] = [(4, program.id)]
+            program_projects.write(values)
+
+        # Write the collective state of the projects, with one write per resulting state
+        projects_by_state = {}
+        for project in projects:
+            state = project._check_decisions()
+            projects_by_state[state] = projects_by_state.get(state, self.browse()) | project
+        cancelled = projects_by_state.pop('draft', self.browse()) if decision == 'returned' else self.browse()
+        for state, state_projects in projects_by_state.items():
+            values = {'state_evaluation': state}
+            if decision == 'approved':
+                values.update({'state_publication': 'published', 'project_state': 'published'})
+            elif decision == 'rejected':
+                values['project_state'] = 'pending' if state == 'progress' else state
+            state_projects.write(values)
+        # Projects returned by all of their supervisors go back to draft, as after a single return
+        for project in cancelled:
+            project.action_view_project_cancel(True)
+
+        if decision == 'approved':
+            for program in availabilities.program_id:
+                program_projects = availabilities.filtered(lambda a: a.program_id == program).project_id
+                program.sudo().project_ids = [(4, project_id) for project_id in program_projects.ids]
+
+        # Log the decisions in the chatter of the projects and notify each professor once
+        logged = self - cancelled
+        bodies = {}
+        notifications = {}
+        for project in logged:
+            reason = ' '.join(availabilities.filtered(lambda a, p=project: a.project_id == p and a.reason).mapped('reason'))
+            if decision == 'approved':
+                bodies[project.id] = Markup('The project is approved by %s.') % user_name
+                summary = f'Approved by {user_name}'
+            elif decision == 'rejected':
+                bodies[project.id] = Markup('The project is rejected by %s.<br><b>Rejection reason: </b>%s') % (user_name, reason)
+                summary = f'Rejected by {user_name}'
+            else:
+                bodies[project.id] = Markup('The project is returned by %s for the reason below. Resubmission after applying '
+                                            'requested modifications is possible.<br><b>Return reason: </b>%s') % (user_name, reason)
+                summary = f'Returned by {user_name} for revision'
+            if project.professor_account:
+                notifications.setdefault(project.professor_account, []).append((project, summary))
+        # Posted with the subtype of the single decisions, so their followers are notified the same way
+        subtype_id = self.env.ref('student.student_message_subtype_professor_supervisor')
+        for project in logged:
+            project.message_post(body=bodies[project.id], subtype_id=subtype_id.id)
+        self.env['student.notification.digest'].send_grouped(notifications)
+
     def action_view_project_complete(self):
-        if self.project_report_file and self.plagiarism_check_file and self.professor_review_file:
+        if self.project_report_size and self.plagiarism_check_size and self.professor_review_size:
             self.state_publication = 'completed'
             self.project_state = 'completed'
         else:
@@ -728,7 +860,7 @@ class Project(models.Model):
 
     # Creates an application upon clicking "Apply"
     def action_view_project_apply(self):
-        student_record = self.env['student.student'].sudo().search([('student_account.id', '=', self.env.uid)], limit=1)
+        student_record = self.env['student.role.context'].get().student
 
         if not student_record:
             raise AccessError("You are not registered as a student in the system, please contact your academic supervisor.")
@@ -10,7 +10,9 @@ from odoo.exceptions import UserError, ValidationError, AccessError
 class Proposal(models.Model):
 	_name = 'student.proposal'
 	_description = 'PaLMS - Project Proposals'
-	_inherit = ['mail.thread', 'student.utils']
+	_inherit = ['mail.thread', 'student.utils', 'student.attachment.mixin']
+	# Attachment fields whose files are made public
+	_public_attachment_fields = ('additional_files',)
 
 	# === FIELDS ===
 	name = fields.Char('Proposal Name (English)', required=True)
@@ -58,14 +60,15 @@ class Proposal(models.Model):
 
 	# Determines if the title is editable based on user group and proposal state
 	def _compute_name_readonly(self):
+		user = self.env.user
+		roles = self.env['student.role.context'].get()
 		for rec in self:
-			user = self.env.user
 			rec.name_readonly = not (
-					((user.has_group('student.group_student') or user.has_group('student.group_professor'))
+					((roles.is_student or roles.is_professor)
 					 and rec.state == 'draft') or
-					user.has_group('student.group_administrator') or
-					user.has_group('student.group_supervisor') or
-					(user.has_group('student.group_professor')
+					roles.is_administrator or
+					roles.is_supervisor or
+					(roles.is_professor
 					 and user.id == self.commission_head.professor_account.id))
 
 	# Populates contact and academic fields based on the student (proponent)
@@ -95,7 +98,7 @@ class Proposal(models.Model):
 
 	# Assigns current user's student record (if any) to the proposal
 	def _default_proponent(self):
-		student = self.env['student.student'].sudo().search([('student_account.id', '=', self.env.uid)], limit=1)
+		student = self.env['student.role.context'].get().student
 		self._compute_student_details()
 		if student:
 			return student.id
@@ -104,17 +107,6 @@ class Proposal(models.Model):
 
 	# === LIFECYCLE OVERRIDES ===
 
-	@api.model
-	def create(self, vals):
-		record = super().create(vals)
-		record._make_attachments_public()
-		return record
-
-	def _make_attachments_public(self):
-		for proposal in self:
-			for attachment in proposal.additional_files:
-				attachment.write({'public': True})
-
 	# === CONSTRAINTS AND ACCESS RESTRICTIONS ===
 
 	# Restricts editing feedback to the assigned professor
@@ -128,9 +120,9 @@ class Proposal(models.Model):
 
 	@api.constrains('name', 'proposal_professor', 'type', 'format', 'language', 'additional_email', 'additional_phone', 'telegram', 'description', 'results', 'additional_files')
 	def _check_initiator_identity(self):
+		roles = self.env['student.role.context'].get()
 		if (self.env.uid != self.proponent_account.id and
-				not (self.env.user.has_group('student.group_administrator') or
-					 self.env.user.has_group('student.group_supervisor'))):
+				not (roles.is_administrator or roles.is_supervisor)):
 			raise ValidationError("Only the creator of the proposal can modify details.")
 
 	# Prevents deletion by unauthorized users
@@ -144,12 +136,12 @@ class Proposal(models.Model):
 
 	@api.onchange('description', 'results', 'proposal_professor', 'additional_email', 'additional_phone', 'telegram')
 	def _check_user_identity(self):
-		if not self.env.user.has_group('student.group_supervisor'):
+		if not self.env['student.role.context'].get().is_supervisor:
 			if self.proponent_account != self.env.user:
 				raise AccessError("You can only modify proposals that you created. If you require assistance, contact the supervisor.")
 
 	def _check_professor_identity(self):
-		if not self.env.user.has_group('student.group_supervisor'):
+		if not self.env['student.role.context'].get().is_supervisor:
 			if self.professor_account != self.env.user:
 				raise AccessError("You can only respond to the proposals sent to you.")
 
@@ -172,7 +164,7 @@ class Proposal(models.Model):
 			# Send the email --------------------
 			subtype_id = self.env.ref('student.student_message_subtype_email')
 			template = self.env.ref('student.email_template_proposal_send')
-			template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+			self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
 			# -----------------------------------
 
 			# Construct the message that is to be sent to the user
@@ -239,7 +231,7 @@ class Proposal(models.Model):
 			# Send the email --------------------
 			subtype_id = self.env.ref('student.student_message_subtype_email')
 			template = self.env.ref('student.email_template_proposal_accept')
-			template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+			self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
 			# -----------------------------------
 
 			# Construct the message that is to be sent to the user
@@ -270,7 +262,7 @@ class Proposal(models.Model):
 			# Send the email --------------------
 			subtype_id = self.env.ref('student.student_message_subtype_email')
 			template = self.env.ref('student.email_template_proposal_reject')
-			template.send_mail(self.id, email_values={'subtype_id': subtype_id.id}, force_send=True)
+			self.env['student.utils'].queue_mail(template, self.id, email_values={'subtype_id': subtype_id.id})
 			# -----------------------------------
 
 			# Construct the message that is to be sent to the user
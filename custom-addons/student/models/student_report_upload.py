@@ -0,0 +1,162 @@
+# This module defines the resumable uploads of project report files in PaLMS.
+# Large reports are sent in chunks that are appended to a temporary file on disk. Once the file is complete,
+# it is hashed while streaming and moved into the filestore as the attachment of the report field,
+# so the server never holds a whole report in memory.
+
+import filecmp
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import uuid
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools.mimetypes import guess_mimetype
+
+from .student_project import REPORT_FILE_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Size of the blocks copied between the request, the temporary file and the hash
+BLOCK_SIZE = 64 * 1024
+# Default maximum size of an uploaded report, in bytes
+DEFAULT_MAX_SIZE = 200 * 1024 * 1024
+
+
+class ReportUpload(models.TransientModel):
+    _name = 'student.report.upload'
+    _description = 'PaLMS - Report File Uploads'
+    # Abandoned uploads are removed (with their temporary file) after a day
+    _transient_max_hours = 24
+
+    # Identifier the client uses to send and resume the upload
+    token = fields.Char('Token', required=True, readonly=True, index=True, default=lambda self: uuid.uuid4().hex)
+    # Project and report field the file is uploaded to
+    project_id = fields.Many2one('student.project', string='Project', required=True, readonly=True, ondelete='cascade')
+    field_name = fields.Char('Report Field', required=True, readonly=True)
+    filename = fields.Char('File Name', required=True, readonly=True)
+    # Size announced by the client and number of bytes received so far
+    total_size = fields.Integer('Total Size', required=True, readonly=True)
+    received_size = fields.Integer('Received Size', default=0, readonly=True)
+
+    # === UPLOAD LIFECYCLE ===
+
+    # Start the upload of a report file; the current user must be allowed to change the report field
+    @api.model
+    def start_upload(self, project, field_name, filename, total_size):
+        project._check_report_file_upload(field_name)
+
+        max_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'student.report_upload_max_size', DEFAULT_MAX_SIZE))
+        if total_size <= 0 or total_size > max_size:
+            raise UserError(f"The file size must be between 1 byte and {max_size // (1024 * 1024)} MB.")
+
+        upload = self.sudo().create({
+            'project_id': project.id,
+            'field_name': field_name,
+            'filename': filename,
+            'total_size': total_size,
+        })
+        os.makedirs(os.path.dirname(upload._path()), exist_ok=True)
+        open(upload._path(), 'wb').close()
+        return upload
+
+    # Return the upload of the current user with the given token (empty recordset if none)
+    @api.model
+    def get_upload(self, token):
+        return self.sudo().search([('token', '=', token), ('create_uid', '=', self.env.uid)], limit=1)
+
+    # Append a chunk read from a stream at the given offset and return the number of bytes received.
+    # Chunks that do not start at the end of the received data are ignored, so the client can resume from the returned offset.
+    def write_chunk(self, offset, stream):
+        self.ensure_one()
+        if offset != self.received_size:
+            return self.received_size
+
+        received = self.received_size
+        with open(self._path(), 'r+b') as upload_file:
+            upload_file.seek(received)
+            for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                received += len(block)
+                if received > self.total_size:
+                    raise UserError("The uploaded data exceeds the announced file size.")
+                upload_file.write(block)
+        self.received_size = received
+
+        if received == self.total_size:
+            self._finalize()
+        return received
+
+    # Move the complete file into the filestore and attach it to the report field of the project
+    def _finalize(self):
+        self.ensure_one()
+        project = self.project_id
+        Attachment = self.env['ir.attachment'].sudo()
+        path = self._path()
+
+        # Hash the file while streaming it; the checksum is also its filestore name
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as upload_file:
+            head = upload_file.read(1024)
+            upload_file.seek(0)
+            for block in iter(lambda: upload_file.read(BLOCK_SIZE), b''):
+                sha1.update(block)
+        checksum = sha1.hexdigest()
+        mimetype = mimetypes.guess_type(self.filename)[0] or guess_mimetype(head)
+
+        # Replace the previous file of the field
+        Attachment.search([
+            ('res_model', '=', project._name),
+            ('res_field', '=', self.field_name),
+            ('res_id', '=', project.id),
+        ]).unlink()
+        attachment = Attachment.create({
+            'name': self.filename,
+            'res_model': project._name,
+            'res_field': self.field_name,
+            'res_id': project.id,
+            'type': 'binary',
+            'mimetype': mimetype,
+        })
+
+        if Attachment._storage() == 'file':
+            # Same layout as the filestore; identical content already stored (e.g. a resubmitted report) is reused
+            fname = checksum[:2] + '/' + checksum
+            full_path = Attachment._full_path(fname)
+            if os.path.exists(full_path):
+                if not filecmp.cmp(path, full_path, shallow=False):
+                    raise UserError("The report collides with an existing file; please upload it again.")
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                shutil.move(path, full_path)
+            Attachment._mark_for_gc(fname)
+            # The ORM does not let file data columns be written directly
+            self.env.cr.execute(
+                "UPDATE ir_attachment SET store_fname = %s, file_size = %s, checksum = %s WHERE id = %s",
+                (fname, self.total_size, checksum, attachment.id))
+            attachment.invalidate_recordset(['store_fname', 'file_size', 'checksum'])
+        else:
+            # Attachments stored in the database need the whole content
+            with open(path, 'rb') as upload_file:
+                attachment.raw = upload_file.read()
+
+        project.invalidate_recordset([self.field_name])
+        project.modified([self.field_name])
+        project.write({REPORT_FILE_FIELDS[self.field_name][0]: self.filename})
+        _logger.info("PaLMS report upload: %s of project %s stored (%s bytes)", self.field_name, project.id, self.total_size)
+        self.unlink()
+
+    # Temporary file of the upload, kept next to the filestore so it can be moved into it
+    def _path(self):
+        self.ensure_one()
+        return os.path.join(self.env['ir.attachment']._filestore(), 'student_uploads', self.token)
+
+    def unlink(self):
+        paths = [upload._path() for upload in self]
+        res = super().unlink()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return res
@@ -1,5 +1,6 @@
 # This file defines the Review Table and Review Line models used in PaLMS.
-# Professors review student projects by selecting from dynamically generated lines.
+# Professors review student projects by selecting from dynamically generated lines,
+# which are regenerated incrementally so reviewer assignments are kept.
 # It supports automated reviewer assignment, email notifications, and tracking of completion.
 
 from odoo import models, fields, api
@@ -57,13 +58,12 @@ class ReviewTable(models.Model):
                         # Send email to reviewer
                         subtype_id = self.env.ref('student.student_message_subtype_email')
                         template = self.env.ref('student.email_template_reviewer_assigned')
-                        template.send_mail(
-                            line.id,
-                            email_values={
-                                'email_to': user.email,
-                                'subtype_id': subtype_id.id
-                            },
-                            force_send=True
+                        self.env['student.utils'].notify_users(
+                            template,
+                            line,
+                            user,
+                            'Review assignment',
+                            email_values={'subtype_id': subtype_id.id}
                         )
 
                         # Send internal Discuss message
@@ -77,7 +77,7 @@ class ReviewTable(models.Model):
                             message_text,
                             [user],
                             self.env.user,
-                            (str(line.project_id), str(line.project_id.name))
+                            (str(line.project_id.id), str(line.project_id.name))
                         )
 
     # === FIELD LOGIC ===
@@ -89,49 +89,74 @@ class ReviewTable(models.Model):
 
     # === GENERATE REVIEW LINES ===
 
+    # Bring the lines in line with the eligible projects: lines of new projects are added, lines of projects
+    # that are no longer eligible are removed (unless the work was already sent), and reviewer data is kept.
+    # Only the professors are notified about the added projects.
     def action_generate_review_lines(self):
-        for table in self:
-            # Remove existing lines
-            table.line_ids.unlink()
-
-            # Get eligible projects with required documents
-            projects = self.env['student.project'].search([
-                ('project_report_file', '!=', False),
-                ('plagiarism_check_file', '!=', False),
-                ('student_feedback', '!=', False),
-                ('program_ids', 'in', table.program_ids.ids),
-                ('type', '=', table.type)
-            ])
-
-            lines = [(0, 0, {'project_id': project.id}) for project in projects]
-            table.write({'line_ids': lines})
-
-            if lines:
-                # Notify professors associated with these programs
-                professors = self.env['student.professor'].search([
-                    ('professor_faculty.program_ids', 'in', table.program_ids.ids)
-                ]).mapped('professor_account')
-
-                # Send email
-                subtype_id = self.env.ref('student.student_message_subtype_email')
-                template = self.env.ref('student.email_template_review_table_created')
-                template.send_mail(self.id,
-                                   email_values={'email_to': ','.join(professors.mapped('email')),
-                                                 'subtype_id': subtype_id.id},
-                                   force_send=True)
-
-                # Send internal Discuss message
+        # Find eligible projects and professors of all tables with a single query each
+        programs = self.program_ids
+        projects = self.env['student.project'].search([
+            ('project_report_size', '>', 0),
+            ('plagiarism_check_size', '>', 0),
+            ('student_feedback', '!=', False),
+            ('program_ids', 'in', programs.ids),
+            ('type', 'in', list(set(self.mapped('type'))))
+        ])
+        all_professors = self.env['student.professor'].search([
+            ('professor_faculty.program_ids', 'in', programs.ids)
+        ])
+
+        subtype_id = self.env.ref('student.student_message_subtype_email')
+        template = self.env.ref('student.email_template_review_table_created')
+        added_count = removed_count = 0
+
+        for table in self.with_context(skip_reviewer_notifications=True):
+            eligible = projects.filtered(lambda p: p.type == table.type and p.program_ids & table.program_ids)
+            existing = table.line_ids.project_id
+
+            added = eligible - existing
+            removed_lines = table.line_ids.filtered(lambda l: l.project_id not in eligible and not l.sent)
+            if not added and not removed_lines:
+                continue
+
+            table.write({'line_ids': [(2, line.id) for line in removed_lines] +
+                                     [(0, 0, {'project_id': project.id}) for project in added]})
+            added_count += len(added)
+            removed_count += len(removed_lines)
+
+            if not added:
+                continue
+
+            # Notify professors associated with these programs
+            professors = all_professors.filtered(
+                lambda p: p.professor_faculty.program_ids & table.program_ids).mapped('professor_account')
+            new_professors = professors - table.professor_ids
+
+            # Send email to the professors who have not been notified about the table yet
+            if new_professors:
+                self.env['student.utils'].notify_users(template, table, new_professors, 'New review table',
+                                                       email_values={'subtype_id': subtype_id.id})
+
+            # Send internal Discuss message
+            table_link = f"<a href=\"/web#id={table.id}&model=student.review.table&view_type=form\">{table.name}</a>"
+            if existing:
                 message_text = Markup(
-                    f"A new review table <a href=\"/web#id={table.id}&model=student.review.table&view_type=form\">{table.name}</a> has been created. Please select projects for review!")
-                table.env['student.utils'].send_message(
-                    'review_table',
-                    message_text,
-                    professors,
-                    table.creator_id,
-                    (str(table.id), str(table.name))
-                )
+                    f"{len(added)} new project(s) have been added to the review table {table_link}. Please select projects for review!")
+            else:
+                message_text = Markup(
+                    f"A new review table {table_link} has been created. Please select projects for review!")
+            table.env['student.utils'].send_message(
+                'review_table',
+                message_text,
+                professors,
+                table.creator_id,
+                (str(table.id), str(table.name))
+            )
+
+            table.professor_ids = [(6, 0, professors.ids)]
 
-                table.professor_ids = [(6, 0, professors.ids)]
+        return self.env['student.utils'].message_display(
+            'Review Lines', f'{added_count} line(s) added, {removed_count} line(s) removed.', False)
 
     # === COMPLETION CHECK ===
 
@@ -153,7 +178,10 @@ class ReviewTable(models.Model):
     def write(self, vals):
         result = super().write(vals)
         for record in self:
-            record.send_notifications_to_reviewers()
+            # Line regeneration does not change assignments, reviewers are not notified again
+            if not self.env.context.get('skip_reviewer_notifications'):
+                record.send_notifications_to_reviewers()
+            # Regeneration can remove the last unsent lines, so completion is always checked
             record.check_review_completion()
         return result
 
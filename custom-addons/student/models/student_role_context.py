@@ -0,0 +1,164 @@
+# This module defines the role context service of PaLMS.
+# It resolves the student, professor, manager and supervisor records of a user, their faculties and programs,
+# and the PaLMS group flags once, and memoizes them so access checks and search filters do not repeat the lookups.
+# Changes of the role records also refresh the announcement audiences derived from them.
+
+from odoo import api, models, tools
+
+# PaLMS groups exposed as flags of the role context: (flag name, group XML ID)
+ROLE_GROUPS = [
+    ('is_student', 'student.group_student'),
+    ('is_elected_student', 'student.group_elected_student'),
+    ('is_professor', 'student.group_professor'),
+    ('is_supervisor', 'student.group_supervisor'),
+    ('is_manager', 'student.group_manager'),
+    ('is_administrator', 'student.group_administrator'),
+    ('is_system', 'base.group_system'),
+]
+
+
+class RoleContext:
+    # Roles of a user, exposed as (sudo) recordsets bound to the environment of the caller
+
+    def __init__(self, env, data):
+        self._env = env
+        self._data = data
+        for flag, _group in ROLE_GROUPS:
+            setattr(self, flag, data[flag])
+
+    def _browse(self, model, key):
+        return self._env[model].sudo().browse(self._data[key])
+
+    # Role records of the user (empty recordsets when the user does not have the role)
+    @property
+    def student(self):
+        return self._browse('student.student', 'student_id')
+
+    @property
+    def professor(self):
+        return self._browse('student.professor', 'professor_id')
+
+    @property
+    def manager(self):
+        return self._browse('student.manager', 'manager_id')
+
+    @property
+    def supervisor(self):
+        return self._browse('student.supervisor', 'supervisor_id')
+
+    # Program of the student
+    @property
+    def student_program(self):
+        return self._browse('student.program', 'student_program_id')
+
+    # Programs of the faculty of the professor
+    @property
+    def professor_program_ids(self):
+        return self._browse('student.program', 'professor_program_ids')
+
+    # Programs managed or supervised by the user
+    @property
+    def manager_program_ids(self):
+        return self._browse('student.program', 'manager_program_ids')
+
+    @property
+    def supervisor_program_ids(self):
+        return self._browse('student.program', 'supervisor_program_ids')
+
+    # Faculty of the user, by role priority (supervisor, manager, professor, student)
+    @property
+    def faculty(self):
+        return self._browse('student.faculty', 'faculty_id')
+
+    # Managers, supervisors and administrators see every record
+    @property
+    def is_privileged(self):
+        return self.is_manager or self.is_supervisor or self.is_administrator or self.is_system
+
+
+class StudentRoleContext(models.AbstractModel):
+    _name = 'student.role.context'
+    _description = 'PaLMS - Role Context'
+
+    # Return the role context of the current user (or of the given user)
+    @api.model
+    def get(self, uid=None):
+        return RoleContext(self.env, self._get_role_data(uid or self.env.uid))
+
+    # Resolve the roles of a user; the result only holds IDs so it can be shared between requests.
+    # The cache is cleared when role records or group memberships change.
+    @api.model
+    @tools.ormcache('uid')
+    def _get_role_data(self, uid):
+        user = self.env['res.users'].sudo().browse(uid)
+        student = self.env['student.student'].sudo().search([('student_account', '=', uid)], limit=1)
+        professor = self.env['student.professor'].sudo().search([('professor_account', '=', uid)], limit=1)
+        manager = self.env['student.manager'].sudo().search([('manager_account', '=', uid)], limit=1)
+        supervisor = self.env['student.supervisor'].sudo().search([('supervisor_account', '=', uid)], limit=1)
+
+        professor_programs = self.env['student.program']
+        if professor.professor_faculty:
+            professor_programs = self.env['student.program'].sudo().search([
+                ('program_faculty_id', '=', professor.professor_faculty.id)
+            ])
+
+        faculty = (supervisor.supervisor_faculty or manager.manager_faculty or
+                   professor.professor_faculty or student.student_faculty)
+
+        data = {
+            'student_id': student.id,
+            'student_program_id': student.student_program.id,
+            'professor_id': professor.id,
+            'professor_program_ids': tuple(professor_programs.ids),
+            'manager_id': manager.id,
+            'manager_program_ids': tuple(manager.program_ids.ids),
+            'supervisor_id': supervisor.id,
+            'supervisor_program_ids': tuple(supervisor.program_ids.ids),
+            'faculty_id': faculty.id,
+        }
+        for flag, group in ROLE_GROUPS:
+            data[flag] = user.has_group(group)
+        return data
+
+
+class StudentRoleContextMixin(models.AbstractModel):
+    _name = 'student.role.context.mixin'
+    _description = 'PaLMS - Role Context Invalidation'
+
+    # Fields read by the role context; writing any other field keeps the cache
+    _role_context_fields = ()
+
+    # Users whose roles are defined by the records
+    def _role_context_users(self):
+        return self.env['res.users']
+
+    # Announcements whose audience depends on the records
+    def _role_context_announcements(self):
+        return self.env['student.announcement']
+
+    # Clear the cached role contexts and refresh the announcement audiences derived from them
+    def _role_context_changed(self, users, announcements):
+        self.env.registry.clear_cache()
+        announcements._sync_audience()
+        self.env['student.announcement']._sync_user_audience(users)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._role_context_changed(records._role_context_users(), records._role_context_announcements())
+        return records
+
+    def write(self, vals):
+        if not set(vals) & set(self._role_context_fields):
+            return super().write(vals)
+
+        users, announcements = self._role_context_users(), self._role_context_announcements()
+        res = super().write(vals)
+        self._role_context_changed(users | self._role_context_users(), announcements | self._role_context_announcements())
+        return res
+
+    def unlink(self):
+        users, announcements = self._role_context_users(), self._role_context_announcements()
+        res = super().unlink()
+        self._role_context_changed(users, announcements.exists())
+        return res
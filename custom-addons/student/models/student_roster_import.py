@@ -0,0 +1,310 @@
+# This module defines the roster import wizard of PaLMS.
+# A CSV or XLSX roster of students, professors, supervisors and managers is read row by row from the filestore and
+# fully validated before anything is created. The accounts are then created in batches: one multi-create of users
+# (with their partners and group membership) and one of role records per batch, committed batch by batch so the
+# memory used stays flat and an interrupted import can be resumed where it stopped.
+
+import csv
+import datetime
+import io
+import logging
+
+from odoo import Command, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import email_normalize
+
+_logger = logging.getLogger(__name__)
+
+# Roles that can be imported: {role: (role model, account field, faculty field, group xmlid)}
+ROSTER_ROLES = {
+    'student': ('student.student', 'student_account', None, 'student.group_student'),
+    'professor': ('student.professor', 'professor_account', 'professor_faculty', 'student.group_professor'),
+    'supervisor': ('student.supervisor', 'supervisor_account', 'supervisor_faculty', 'student.group_supervisor'),
+    'manager': ('student.manager', 'manager_account', 'manager_faculty', 'student.group_manager'),
+}
+# Columns read from the roster header (case insensitive) and those every row must fill in
+ROSTER_COLUMNS = ('role', 'name', 'email', 'faculty', 'program', 'progress', 'enrolled', 'phone')
+REQUIRED_COLUMNS = ('role', 'name', 'email')
+# Default number of rows created and committed together
+DEFAULT_BATCH_SIZE = 1000
+
+
+class RosterImport(models.TransientModel):
+    _name = 'student.roster.import'
+    _description = 'PaLMS - Roster Import'
+
+    # Roster file (CSV or XLSX) and its name, used to detect the format
+    file = fields.Binary('Roster File', required=True)
+    filename = fields.Char('File Name')
+    # Number of rows created and committed together
+    batch_size = fields.Integer('Batch Size', default=DEFAULT_BATCH_SIZE, required=True)
+    # Whether the new users receive the invitation email to set their password
+    send_invitations = fields.Boolean('Send Invitations', default=False)
+
+    # Import progress
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('error', 'Errors Found'),
+        ('validated', 'Validated'),
+        ('done', 'Imported')
+    ], string='Status', default='draft', readonly=True)
+    row_count = fields.Integer('Rows', readonly=True)
+    imported_count = fields.Integer('Imported Rows', readonly=True)
+    error_count = fields.Integer('Errors', readonly=True)
+    error_report = fields.Text('Error Report', readonly=True)
+
+    # === ACTIONS ===
+
+    # Check the whole roster and report every error; nothing is created
+    def action_validate(self):
+        self.ensure_one()
+        errors = []
+        logins = {}
+        row_count = 0
+        lookups = self._get_lookups()
+
+        for line, values in self._iter_rows():
+            row_count += 1
+            row, row_errors = self._parse_row(values, lookups)
+            errors += [f"Line {line}: {error}" for error in row_errors]
+            if not row:
+                continue
+            if row['login'] in logins:
+                errors.append(f"Line {line}: {row['login']} is already used on line {logins[row['login']]}.")
+            else:
+                logins[row['login']] = line
+
+        # Logins already taken by existing users, checked batch by batch
+        Users = self.env['res.users'].sudo().with_context(active_test=False)
+        login_list = list(logins)
+        for start in range(0, len(login_list), self.batch_size):
+            for user in Users.search_fetch([('login', 'in', login_list[start:start + self.batch_size])], ['login']):
+                errors.append(f"Line {logins[user.login]}: a user with the login {user.login} already exists.")
+
+        if not row_count:
+            errors.append("The roster does not contain any row.")
+        self.write({
+            'state': 'error' if errors else 'validated',
+            'row_count': row_count,
+            'imported_count': 0,
+            'error_count': len(errors),
+            'error_report': '\n'.join(sorted(errors, key=self._error_line)) if errors else False,
+        })
+        return self._reopen()
+
+    # Create the accounts of a validated roster batch by batch. Each batch is committed, so an interrupted import
+    # can be started again and resumes after the last committed row.
+    def action_import(self):
+        self.ensure_one()
+        if self.state != 'validated':
+            raise UserError("Validate the roster before importing it.")
+
+        lookups = self._get_lookups()
+        commit = not self.env.registry.in_test_mode()
+        batch = []
+        for index, (line, values) in enumerate(self._iter_rows()):
+            if index < self.imported_count:
+                continue
+            row, row_errors = self._parse_row(values, lookups)
+            if row_errors:
+                raise UserError(f"Line {line}: {row_errors[0]} Validate the roster again.")
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch, commit)
+                batch = []
+        if batch:
+            self._import_batch(batch, commit)
+
+        self.state = 'done'
+        return self._reopen()
+
+    # === IMPORT ===
+
+    # Create the users and role records of a batch of rows, then commit them and empty the caches
+    def _import_batch(self, rows, commit):
+        groups = {role: self.env.ref(xmlid) for role, (_model, _account, _faculty, xmlid) in ROSTER_ROLES.items()}
+        Users = self.env['res.users'].sudo().with_context(
+            no_reset_password=not self.send_invitations,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            tracking_disable=True,
+        )
+        # Partners are created together with the users they belong to
+        users = Users.create([{
+            'name': row['name'],
+            'login': row['login'],
+            'email': row['login'],
+            'groups_id': [Command.set(groups[row['role']].ids)],
+        } for row in rows])
+
+        rows_by_role = {}
+        for row, user in zip(rows, users):
+            rows_by_role.setdefault(row['role'], []).append((row, user))
+        for role, role_rows in rows_by_role.items():
+            model, account_field, faculty_field, _xmlid = ROSTER_ROLES[role]
+            vals_list = []
+            for row, user in role_rows:
+                vals = {account_field: user.id}
+                if role == 'student':
+                    vals.update({
+                        'student_program': row['program_id'],
+                        'progress': row['progress'],
+                        'enrolled': row['enrolled'],
+                        'student_phone': row['phone'],
+                    })
+                else:
+                    vals[faculty_field] = row['faculty_id']
+                vals_list.append(vals)
+            self.env[model].sudo().create(vals_list)
+
+        # The faculty of the users is read from the role records created above
+        self.env.add_to_compute(users._fields['faculty'], users)
+        self.imported_count += len(rows)
+        self.env.flush_all()
+        _logger.info("PaLMS roster import %s: %s/%s rows imported", self.id, self.imported_count, self.row_count)
+        if commit:
+            self.env.cr.commit()
+        self.env.invalidate_all()
+
+    # === ROSTER READING ===
+
+    # Yield (line number, {column: value}) for every non-empty row of the roster, reading it from the filestore
+    def _iter_rows(self):
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if not attachment:
+            raise UserError("Upload a roster file first.")
+
+        if attachment.store_fname:
+            roster_file = open(attachment._full_path(attachment.store_fname), 'rb')
+        else:
+            roster_file = io.BytesIO(attachment.raw)
+        with roster_file:
+            is_xlsx = (self.filename or '').lower().endswith('.xlsx')
+            rows = self._read_xlsx(roster_file) if is_xlsx else self._read_csv(roster_file)
+            header = [str(cell or '').strip().lower() for cell in next(rows, [])]
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise UserError(f"The roster has no {', '.join(missing)} column.")
+            columns = [(index, column) for index, column in enumerate(header) if column in ROSTER_COLUMNS]
+
+            for line, cells in enumerate(rows, start=2):
+                values = {column: self._cell_value(cells[index]) if index < len(cells) else ''
+                          for index, column in columns}
+                if any(values.values()):
+                    yield line, values
+
+    @api.model
+    def _read_csv(self, roster_file):
+        text = io.TextIOWrapper(roster_file, encoding='utf-8-sig', newline='')
+        first_line = text.readline()
+        try:
+            dialect = csv.Sniffer().sniff(first_line, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader([first_line], dialect)
+        yield from csv.reader(text, dialect)
+
+    @api.model
+    def _read_xlsx(self, roster_file):
+        try:
+            import openpyxl
+        except ImportError:
+            raise UserError("Reading XLSX rosters requires the openpyxl Python library; import the roster as CSV instead.")
+        # Read-only workbooks load the rows lazily
+        workbook = openpyxl.load_workbook(roster_file, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    @api.model
+    def _cell_value(self, cell):
+        if cell is None:
+            return ''
+        if isinstance(cell, float) and cell.is_integer():
+            cell = int(cell)
+        return str(cell).strip()
+
+    # === VALIDATION ===
+
+    # Faculties and programs by lowercase name, loaded once per validation or import
+    def _get_lookups(self):
+        faculties = {}
+        for faculty in self.env['student.faculty'].sudo().search_fetch([], ['name']):
+            faculties.setdefault(faculty.name.strip().lower(), faculty)
+        programs = {}
+        for program in self.env['student.program'].sudo().search_fetch([], ['name', 'program_faculty_id']):
+            key = program.name.strip().lower()
+            programs[key] = programs.get(key, program.browse()) | program
+        progress = [key for key, _label in self.env['student.student']._fields['progress'].selection]
+        return {'faculties': faculties, 'programs': programs, 'progress': progress}
+
+    # Convert a roster row into the values used by the import; returns (row, errors)
+    @api.model
+    def _parse_row(self, values, lookups):
+        errors = []
+        role = values.get('role', '').lower()
+        login = email_normalize(values.get('email', ''))
+        row = {
+            'role': role,
+            'name': values.get('name', ''),
+            'login': login,
+            'faculty_id': False,
+            'program_id': False,
+            'progress': values.get('progress', '').lower() or False,
+            'enrolled': values.get('enrolled') or False,
+            'phone': values.get('phone') or False,
+        }
+
+        if role not in ROSTER_ROLES:
+            errors.append(f"unknown role '{values.get('role', '')}' (expected {', '.join(ROSTER_ROLES)}).")
+        if not row['name']:
+            errors.append("the name is missing.")
+        if not login:
+            errors.append(f"'{values.get('email', '')}' is not a valid email address.")
+
+        faculty = False
+        if values.get('faculty'):
+            faculty = lookups['faculties'].get(values['faculty'].lower())
+            if not faculty:
+                errors.append(f"unknown faculty '{values['faculty']}'.")
+        elif role in ROSTER_ROLES and role != 'student':
+            errors.append(f"the faculty of the {role} is missing.")
+        row['faculty_id'] = faculty.id if faculty else False
+
+        if role == 'student':
+            programs = lookups['programs'].get(values.get('program', '').lower())
+            if programs and faculty:
+                programs = programs.filtered(lambda program: program.program_faculty_id == faculty)
+            if not values.get('program'):
+                errors.append("the program of the student is missing.")
+            elif not programs:
+                errors.append(f"unknown program '{values['program']}'" + (f" in faculty '{faculty.name}'." if faculty else "."))
+            elif len(programs) > 1:
+                errors.append(f"several programs are named '{values['program']}'; fill in the faculty column.")
+            else:
+                row['program_id'] = programs.id
+
+            if row['progress'] not in lookups['progress']:
+                errors.append(f"invalid progress '{values.get('progress', '')}' (expected {', '.join(lookups['progress'])}).")
+            if row['enrolled'] and not (row['enrolled'].isdigit() and 1992 <= int(row['enrolled']) <= datetime.date.today().year):
+                errors.append(f"invalid year of enrollment '{row['enrolled']}'.")
+
+        return (None if errors else row), errors
+
+    @api.model
+    def _error_line(self, error):
+        return int(error.split(':', 1)[0].split()[-1]) if error.startswith('Line ') else 0
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
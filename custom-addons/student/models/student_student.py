@@ -10,6 +10,13 @@ from unidecode import unidecode
 class Student(models.Model):
     _name = "student.student"
     _description = "PaLMS - Students"
+    _inherit = ['student.role.context.mixin']
+    # Fields invalidating the cached role context of users
+    _role_context_fields = ('active', 'student_account', 'student_program')
+
+    # Users whose cached roles depend on the records
+    def _role_context_users(self):
+        return self.sudo().with_context(active_test=False).mapped('student_account')
 
     # === IDENTITY & ACCOUNT ===
 
@@ -42,14 +49,17 @@ class Student(models.Model):
 
     @api.depends('student_program')
     def _compute_faculty(self):
-        self.student_faculty = self.student_program.program_faculty_id.id
+        for student in self:
+            student.student_faculty = student.student_program.program_faculty_id
 
+    # Degrees are looked up once per batch of students, by (level, year)
     @api.depends('student_program', 'progress')
     def _compute_degree(self):
-        self.degree = self.env['student.degree'].sudo().search([
-            ('year', '=', self.progress),
-            ('level', '=', self.student_program.degree)
-        ], limit=1)
+        degrees = {}
+        for degree in self.env['student.degree'].sudo().search_fetch([], ['level', 'year'], order='id desc'):
+            degrees[(degree.level, degree.year)] = degree
+        for student in self:
+            student.degree = degrees.get((student.student_program.degree, student.progress), False)
 
     # Cancel all applications when current project is set
     @api.onchange('current_project')
@@ -82,9 +92,10 @@ class Student(models.Model):
     # Compute name, email, and student ID from user account
     @api.depends("student_account")
     def _get_from_account(self):
-        self.student_email = self.student_account.login
-        self.name = self.student_account.name
-        self.student_id = unidecode(''.join([word[0].upper() for word in self.name.split()[:2]]) + str(self.student_account.id).zfill(4))
+        for student in self:
+            student.student_email = student.student_account.login
+            student.name = student.student_account.name
+            student.student_id = unidecode(''.join([word[0].upper() for word in (student.name or '').split()[:2]]) + str(student.student_account.id).zfill(4))
 
     # === APPLICATIONS ===
 
@@ -93,7 +104,9 @@ class Student(models.Model):
 
     @api.depends('application_ids')
     def _compute_application_count(self):
-        self.application_number = len(self.application_ids)
+        counts = self.env['student.utils'].count_by('student.application', 'applicant', self._origin.ids)
+        for student in self:
+            student.application_number = counts.get(student._origin.id, 0)
 
     # === PROPOSALS ===
 
@@ -102,4 +115,6 @@ class Student(models.Model):
 
     @api.depends('proposal_ids')
     def _compute_proposal_count(self):
-        self.proposal_number = len(self.proposal_ids)
\ No newline at end of file
+        counts = self.env['student.utils'].count_by('student.proposal', 'proponent', self._origin.ids)
+        for student in self:
+            student.proposal_number = counts.get(student._origin.id, 0)
@@ -7,6 +7,13 @@ from datetime import datetime, timedelta
 class Supervisor(models.Model):
     _name = "student.supervisor"
     _description = "PaLMS - Supervisors"
+    _inherit = ['student.role.context.mixin']
+    # Fields invalidating the cached role context of users
+    _role_context_fields = ('active', 'supervisor_account', 'supervisor_faculty')
+
+    # Users whose cached roles depend on the records
+    def _role_context_users(self):
+        return self.sudo().with_context(active_test=False).mapped('supervisor_account')
 
     # Display name of the supervisor, computed from the linked user account
     name = fields.Char(
@@ -45,9 +52,10 @@ class Supervisor(models.Model):
     )
 
     # Compute supervisor name from user account name
-    @api.depends("supervisor_account")
+    @api.depends("supervisor_account", "supervisor_account.name")
     def _compute_name(self):
-        self.name = self.supervisor_account.name
+        for supervisor in self:
+            supervisor.name = supervisor.supervisor_account.name
 
     # Set the faculty of the user account when supervisor account is changed
     @api.onchange("supervisor_account")
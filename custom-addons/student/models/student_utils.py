@@ -5,46 +5,77 @@ from markupsafe import Markup
 from odoo import api, fields, models, _  # _ is used for translations
 from odoo.exceptions import UserError, ValidationError
 
+from .student_instrumentation import touch_channel
+
 # === UTILITY METHODS ===
 
+# Discuss channel naming per notification source: (model of the source record, channel name pattern)
+CHANNEL_SOURCES = {
+    'project': ('student.project', "Project №{id} ({name})"),
+    'application': ('student.application', "Applicaton №{id} for {name}"),
+    'proposal': ('student.proposal', "Project Proposal №{id} ({name})"),
+    'task': ('project.task', "Task №{id} ({name})"),
+    'announcement': ('student.announcement', "Announcement №{id} ({name})"),
+    'milestone': ('student.milestone', "Milestone №{id} ({name})"),
+    'poll': ('poll.poll', "Poll №{id} ({name})"),
+    'review_table': ('student.review.table', "Review Table №{id} ({name})"),
+    'review_line': ('student.project', "Project Review: {name}"),
+    'calendar_event': ('student.calendar.event', "Calendar Event №{id} ({name})"),
+}
+
 class StudentUtils(models.AbstractModel):
     _name = 'student.utils'
     _description = 'PaLMS - Utility Methods'
 
-    # Send a formatted message to a channel with optional creation
+    # Queue a message for a channel; it is posted by the notification outbox worker
     @api.model
-    def send_message(context, source, message_text, recipients, author, data_tuple=-1):
-        tuple_id, tuple_name = data_tuple
-
-        # Compose channel name based on source context
-        if source == 'project':
-            channel_name = "Project №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'application':
-            channel_name = "Applicaton №" + tuple_id + " for " + tuple_name
-        elif source == 'proposal':
-            channel_name = "Project Proposal №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'task':
-            channel_name = "Task №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'announcement':
-            channel_name = "Announcement №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'milestone':
-            channel_name = "Milestone №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'poll':
-            channel_name = "Poll №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'review_table':
-            channel_name = "Review Table №" + tuple_id + " (" + tuple_name + ")"
-        elif source == 'review_line':
-            channel_name = "Project Review: " + tuple_name
-        elif source == 'calendar_event':
-            channel_name = "Calendar Event №" + tuple_id + " (" + tuple_name + ")"
-        else:
+    def send_message(context, source, message_text, recipients, author, data_tuple=-1, channel=None):
+        if source not in CHANNEL_SOURCES:
             raise ValueError(f"Unknown source type: {source}")
+        context.env['student.notification.outbox'].enqueue_message(source, message_text, recipients, author, data_tuple, channel=channel)
+
+    # Queue an email rendered from a template; it is sent by the notification outbox worker
+    @api.model
+    def queue_mail(self, template, res_id, email_values=None):
+        return self.env['student.notification.outbox'].enqueue_mail(template, res_id, email_values)
+
+    # Notify users about a record by email: users in digest mode get a digest item, the others the template email.
+    # Urgent notifications always skip the digest.
+    @api.model
+    def notify_users(self, template, record, users, summary, email_values=None, urgent=False):
+        instant_users = users if urgent else users.filtered(lambda u: u.notification_digest == 'instant')
+        digest_users = users - instant_users
+
+        if instant_users:
+            email_values = dict(email_values or {}, email_to=','.join(instant_users.mapped('email')))
+            self.queue_mail(template, record.id, email_values=email_values)
+        if digest_users:
+            self.env['student.notification.digest.item'].enqueue(digest_users, record, summary)
+
+    # Count the records of a model per value of a relational field with a single grouped query.
+    # Returns a {id: count} dictionary; used by the stored counters so they are computed per batch of records.
+    @api.model
+    def count_by(self, model, field, ids, domain=None):
+        if not ids:
+            return {}
+        groups = self.env[model].sudo()._read_group([(field, 'in', list(ids))] + (domain or []), [field], ['__count'])
+        return {record.id: count for record, count in groups}
+
+    # Post a formatted message to the channel of the source record, creating and registering it if necessary
+    @api.model
+    def _deliver_message(self, source, message_text, recipients, author, data_tuple, channel=None):
+        tuple_id, tuple_name = data_tuple
+        touch_channel(source, tuple_id)
+        registry = self.env['student.channel.registry']
 
-        # Reuse existing channel or create new one
-        channel = context.env['discuss.channel'].sudo().search([('name', '=', channel_name)], limit=1)
+        if not channel:
+            channel = registry.get_channel(source, int(tuple_id))
 
         if not channel:
-            channel = context.env['discuss.channel'].with_context(mail_create_nosubscribe=True).sudo().create({
+            # Compose channel name based on source context
+            channel_name = CHANNEL_SOURCES[source][1].format(id=tuple_id, name=tuple_name)
+
+            channel = self.env['discuss.channel'].with_context(mail_create_nosubscribe=True).sudo().create({
                 'channel_partner_ids': [(6, 0, author.partner_id.id)],
                 'channel_type': 'channel',
                 'name': channel_name,
@@ -53,6 +84,7 @@ class StudentUtils(models.AbstractModel):
             channel.write({
                 'channel_partner_ids': [(4, recipient.partner_id.id) for recipient in recipients]
             })
+            registry.register_channel(source, int(tuple_id), channel)
 
         # Post message to the channel
         channel.sudo().message_post(
@@ -61,6 +93,7 @@ class StudentUtils(models.AbstractModel):
             message_type="comment",
             subtype_xmlid='mail.mt_comment'
         )
+        return channel
 
     # Display client-side popup notification
     def message_display(self, title, message, sticky_bool):
@@ -200,14 +233,29 @@ class ResUsers(models.Model):
     # Computed faculty field based on user groups
     faculty = fields.Many2one('student.faculty', string='Faculty', compute='_compute_faculty', store=True)
 
+    # Projects of the user as a student and as a professor (used by visibility filters as SQL subqueries)
+    student_project_ids = fields.One2many('student.project', 'student_account', string='Projects as Student')
+    professor_project_ids = fields.One2many('student.project', 'professor_account', string='Projects as Professor')
+
+    # Faculties are read from the role records of the whole batch of users
     @api.depends('groups_id')
     def _compute_faculty(self):
+        faculties = {}
+        for model, account, faculty in [
+            ('student.student', 'student_account', 'student_faculty'),
+            ('student.professor', 'professor_account', 'professor_faculty'),
+            ('student.supervisor', 'supervisor_account', 'supervisor_faculty'),
+        ]:
+            records = self.env[model].sudo().search_fetch([(account, 'in', self._origin.ids)], [account, faculty])
+            faculties[model] = {record[account].id: record[faculty] for record in records}
+
         for user in self:
-            self.faculty = False
             # Determine faculty based on group membership
             if user.has_group('student.group_supervisor'):
-                self.faculty = self.env['student.faculty'].sudo().search([('supervisor_ids', 'in', user.id)], limit=1)
+                user.faculty = faculties['student.supervisor'].get(user._origin.id, False)
             elif user.has_group('student.group_professor'):
-                self.faculty = self.env['student.faculty'].sudo().search([('professor_ids', 'in', user.id)], limit=1)
+                user.faculty = faculties['student.professor'].get(user._origin.id, False)
             elif user.has_group('student.group_student'):
-                self.faculty = self.env['student.faculty'].sudo().search([('student_ids', 'in', user.id)], limit=1)
\ No newline at end of file
+                user.faculty = faculties['student.student'].get(user._origin.id, False)
+            else:
+                user.faculty = False
@@ -0,0 +1,2 @@
+# This file imports the test modules of PaLMS so that the Odoo test runner finds them.
+from . import test_query_counts
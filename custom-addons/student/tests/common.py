@@ -0,0 +1,40 @@
+# This module defines the fixtures shared by the PaLMS tests.
+# A small university is generated once per test class with the benchmark generator (see benchmark/generator.py),
+# so the workflows are tested on realistic records: projects in every state with their applications, milestones
+# with results, commissions with defenses, polls and announcements.
+
+from odoo.tests.common import TransactionCase
+
+from ..benchmark import FLOWS, BenchmarkRunner, UniversityGenerator
+
+# Size of the generated university: every workflow finds its records, and a query per record shows in the counts
+FIXTURE_SIZES = {
+    'campuses': 1, 'faculties': 2, 'programs': 4, 'professors': 10, 'students': 80, 'projects': 80,
+    'milestones': 2, 'commissions': 2, 'polls': 1, 'announcements': 6,
+}
+
+
+class PalmsCase(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        UniversityGenerator(cls.env, FIXTURE_SIZES, seed=1).generate()
+        cls.bench = BenchmarkRunner(cls.env)
+
+    # Prepare a benchmark flow for a role and return the callable it measures, to be run from empty caches
+    def prepare_flow(self, name, role):
+        function, _roles = FLOWS[name]
+        call = function(self.bench, role)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        return call
+
+    # Number of queries run by a callable from empty caches, including the flush of its pending writes
+    def count_queries(self, call):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        count = self.cr.sql_log_count
+        call()
+        self.env.flush_all()
+        return self.cr.sql_log_count - count
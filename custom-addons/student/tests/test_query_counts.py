@@ -0,0 +1,177 @@
+# This module tests the number of SQL queries of the main workflows of PaLMS.
+# Every workflow runs from empty caches as a user of the role that triggers it (see the benchmark flows) and must
+# stay under an upper bound; batch operations must also not run more queries when they process more records.
+# A failure means a change added queries to the path, most often one query per record (N+1) inside a loop.
+
+from odoo import Command
+from odoo.tests import tagged
+
+from ..benchmark.flows import COMPETING_APPLICATIONS, application_with_competitors
+from .common import PalmsCase
+
+# Upper bounds on the queries of the workflows on the fixture university: {(flow, role): queries}.
+# Set each bound to the count measured on Odoo 18 plus a small margin, and lower a bound when a path gets cheaper so
+# the gain is kept. The current values are estimates that have not been measured yet, so the suite is left out of
+# the standard test runs (-standard) until they are calibrated.
+QUERY_BOUNDS = {
+    ('application_send', 'student'): 100,
+    ('application_accept', 'professor'): 200,
+    ('application_auto_reject', 'professor'): 60,
+    ('project_submit', 'professor'): 100,
+    ('project_approve', 'supervisor'): 120,
+    ('supervision_bulk_approve', 'supervisor'): 180,
+    ('milestone_create', 'manager'): 180,
+    ('milestone_update', 'manager'): 80,
+    ('announcement_create', 'manager'): 70,
+    ('commission_lock', 'manager'): 110,
+    ('poll_user_change', 'admin'): 70,
+    ('review_table_generation', 'supervisor'): 70,
+    ('project_board', 'student'): 20,
+    ('project_board', 'professor'): 20,
+    ('project_board', 'manager'): 20,
+    ('project_board', 'supervisor'): 20,
+    ('available_projects', 'student'): 20,
+    ('pending_submissions', 'supervisor'): 20,
+    ('supervision_board', 'supervisor'): 20,
+    ('milestone_result_search', 'student'): 12,
+    ('milestone_result_search', 'professor'): 12,
+    ('milestone_result_search', 'manager'): 12,
+}
+# Extra queries tolerated when a batch operation processes all the records instead of a few
+BATCH_SLACK = 2
+
+
+@tagged('post_install', '-at_install', '-standard', 'palms_query_count')
+class TestQueryCounts(PalmsCase):
+
+    # Run a benchmark flow and check its queries against its bound
+    def assertFlowQueryCount(self, name, role):
+        call = self.prepare_flow(name, role)
+        with self.assertQueryCount(QUERY_BOUNDS[name, role]):
+            call()
+
+    # === APPLICATIONS ===
+
+    def test_application_send(self):
+        self.assertFlowQueryCount('application_send', 'student')
+
+    def test_application_accept(self):
+        self.assertFlowQueryCount('application_accept', 'professor')
+
+    def test_application_auto_reject(self):
+        self.assertFlowQueryCount('application_auto_reject', 'professor')
+
+    # === PROJECTS ===
+
+    def test_project_submit(self):
+        self.assertFlowQueryCount('project_submit', 'professor')
+
+    def test_project_approve(self):
+        self.assertFlowQueryCount('project_approve', 'supervisor')
+
+    def test_supervision_bulk_approve(self):
+        self.assertFlowQueryCount('supervision_bulk_approve', 'supervisor')
+
+    # === MILESTONES AND ANNOUNCEMENTS ===
+
+    def test_milestone_create(self):
+        self.assertFlowQueryCount('milestone_create', 'manager')
+
+    def test_milestone_update(self):
+        self.assertFlowQueryCount('milestone_update', 'manager')
+
+    def test_announcement_create(self):
+        self.assertFlowQueryCount('announcement_create', 'manager')
+
+    # === COMMISSIONS, POLLS AND REVIEWS ===
+
+    def test_commission_lock(self):
+        self.assertFlowQueryCount('commission_lock', 'manager')
+
+    def test_poll_user_change(self):
+        self.assertFlowQueryCount('poll_user_change', 'admin')
+
+    def test_review_table_generation(self):
+        self.assertFlowQueryCount('review_table_generation', 'supervisor')
+
+    # === BOARDS ===
+
+    def test_project_board(self):
+        for role in ('student', 'professor', 'manager', 'supervisor'):
+            with self.subTest(role=role):
+                self.assertFlowQueryCount('project_board', role)
+
+    def test_available_projects(self):
+        self.assertFlowQueryCount('available_projects', 'student')
+
+    def test_pending_submissions(self):
+        self.assertFlowQueryCount('pending_submissions', 'supervisor')
+
+    def test_supervision_board(self):
+        self.assertFlowQueryCount('supervision_board', 'supervisor')
+
+    def test_milestone_result_search(self):
+        for role in ('student', 'professor', 'manager'):
+            with self.subTest(role=role):
+                self.assertFlowQueryCount('milestone_result_search', role)
+
+    # === BATCHES ===
+
+    # The stored counters of students and programs are recomputed with the same queries for 5 or all students
+    def test_counter_recompute_batch(self):
+        students = self.env['student.student'].with_context(active_test=False).search([])
+        programs = self.env['student.program'].search([])
+
+        def recompute(students, programs):
+            def call():
+                for records, field_names in [(students, ['application_number', 'proposal_number']),
+                                             (programs, ['student_number', 'project_number'])]:
+                    for field_name in field_names:
+                        self.env.add_to_compute(records._fields[field_name], records)
+            return call
+
+        few = self.count_queries(recompute(students[:5], programs[:1]))
+        every = self.count_queries(recompute(students, programs))
+        self.assertLessEqual(every, few + BATCH_SLACK,
+                             f"Recomputing {len(students)} students took {every} queries, against {few} for 5.")
+
+    # Accepting an application runs the same queries whether the project has one or many competing applications
+    def test_application_accept_competitors(self):
+        projects = self.env['student.project'].search([('state_publication', '=', 'published')], limit=2)
+        few = application_with_competitors(self.env, 1, projects[0])
+        many = application_with_competitors(self.env, 2 * COMPETING_APPLICATIONS, projects[1])
+
+        def accept(application):
+            application = self.bench.as_user(application.application_professor, application)
+            return lambda: application.action_view_application_accept()
+
+        one = self.count_queries(accept(few))
+        several = self.count_queries(accept(many))
+        self.assertLessEqual(several, one + BATCH_SLACK,
+                             f"Accepting with {2 * COMPETING_APPLICATIONS} competitors took {several} queries, against {one} with one.")
+
+    # Competing applications are rejected with the same queries for one or all of them
+    def test_application_auto_reject_batch(self):
+        applications = self.env['student.application'].search([('state', '=', 'sent')])
+
+        one = self.count_queries(lambda: applications[:1]._auto_reject())
+        several = self.count_queries(lambda: applications[1:]._auto_reject())
+        self.assertLessEqual(several, one + BATCH_SLACK,
+                             f"Rejecting {len(applications) - 1} applications took {several} queries, against {one} for one.")
+
+    # Attaching a file to announcements and renaming them runs the same queries for one or several announcements
+    def test_announcement_bulk_edit_batch(self):
+        env = self.bench.as_user(self.bench.user('admin'))
+        announcements = env['student.announcement'].search([])
+        attachment = env['ir.attachment'].create({'name': 'test.txt', 'raw': b'test'})
+
+        def edit(records):
+            def call():
+                records.write({'attachment_ids': [Command.link(attachment.id)]})
+                records.write({'name': 'Edited Announcement'})
+            return call
+
+        one = self.count_queries(edit(announcements[:1]))
+        several = self.count_queries(edit(announcements[1:]))
+        self.assertLessEqual(several, one + BATCH_SLACK,
+                             f"Editing {len(announcements) - 1} announcements took {several} queries, against {one} for one.")